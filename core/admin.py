@@ -3,7 +3,7 @@ from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from .models import (
     User, CandidateProfile, Application, JobPosting, 
     EmployerProfile, SavedJob, CandidateSkill, Education, 
-    Certification, Notification, Address
+    Certification, Notification, NotificationCounter, ApplicationCounterShard, Address, Task, AlertDigestRun
 )
 from .forms import UserChangeForm, UserCreationForm
 
@@ -40,5 +40,14 @@ admin.site.register(CandidateSkill)
 admin.site.register(Education)
 admin.site.register(Certification)
 admin.site.register(Notification)
+admin.site.register(NotificationCounter)
+admin.site.register(ApplicationCounterShard)
 admin.site.register(Address)
+admin.site.register(AlertDigestRun)
 
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ("name", "status", "attempts", "run_at", "finished_at")
+    list_filter = ("status", "name")
+    readonly_fields = ("locked_by", "locked_at", "last_error")
@@ -0,0 +1,135 @@
+"""
+Job alert matching.
+
+Every alert is reduced to the set of keys a job must have to match it: its
+keyword tokens, location tokens and structured filters. ``AlertIndex``
+files each alert under its rarest key only, so a job looks up the postings
+of the keys it has and verifies the few alerts found there, instead of
+testing every alert. Salary, a range filter, is checked during
+verification.
+
+Like the skill match index, it is built with one query, cached per process
+and rebuilt lazily when its generation in the shared cache is bumped.
+"""
+import logging
+import threading
+from collections import Counter, namedtuple
+
+from .cache import JOB_ALERT_INDEX, bump, generation
+from .models import JobAlert, JobPosting, JobSkill
+from .search import build_document, tokenize
+
+logger = logging.getLogger(__name__)
+
+# Alerts without any indexable criteria
+MATCH_ALL = ('all',)
+
+IndexedAlert = namedtuple('IndexedAlert', ['id', 'candidate_id', 'name', 'frequency', 'keys', 'salary_min'])
+
+
+def alert_keys(keywords='', location='', job_type='', experience_level='', is_remote=False):
+    keys = {('kw', token) for token in tokenize(keywords)}
+    keys.update(('loc', token) for token in tokenize(location))
+    if job_type:
+        keys.add(('type', job_type.upper()))
+    if experience_level:
+        keys.add(('level', experience_level.upper()))
+    if is_remote:
+        keys.add(('type', JobPosting.LocationType.REMOTE))
+    return frozenset(keys)
+
+
+def job_keys(job, skill_names=()):
+    document = build_document(job.title, job.description, job.requirements, job.responsibilities, skill_names)
+    keys = {('kw', token) for text in document.values() for token in tokenize(text)}
+    keys.update(
+        ('loc', token)
+        for text in (job.location, job.city, job.state, job.country)
+        for token in tokenize(text or '')
+    )
+    # Alerts' job_type may hold either the location type or the employment type
+    for value in (job.job_type, job.employment_type):
+        if value:
+            keys.add(('type', value))
+    if job.experience_level:
+        keys.add(('level', job.experience_level))
+    return keys
+
+
+class AlertIndex:
+    def __init__(self, alerts=()):
+        alerts = list(alerts)
+        frequency = Counter(key for alert in alerts for key in alert.keys)
+
+        self.postings = {}
+        for alert in alerts:
+            anchor = min(alert.keys, key=lambda key: (frequency[key], key)) if alert.keys else MATCH_ALL
+            self.postings.setdefault(anchor, []).append(alert)
+        self.size = len(alerts)
+
+    @classmethod
+    def build(cls):
+        rows = (
+            JobAlert.objects
+            .filter(is_active=True, candidate__user__is_active=True)
+            .values_list('id', 'candidate_id', 'alert_name', 'frequency', 'keywords', 'location', 'job_type',
+                         'experience_level', 'is_remote', 'salary_min')
+            .iterator(chunk_size=5000)
+        )
+        return cls(
+            IndexedAlert(alert_id, candidate_id, name, frequency,
+                         alert_keys(keywords, location, job_type, experience_level, is_remote), salary_min)
+            for (alert_id, candidate_id, name, frequency, keywords, location, job_type,
+                 experience_level, is_remote, salary_min) in rows
+        )
+
+    def __len__(self):
+        return self.size
+
+    def match(self, keys, salary=None, frequencies=None):
+        """
+        Alerts whose keys are all in ``keys``, with a salary floor ``salary``
+        meets. Returns the alerts in id order.
+        """
+        matches = []
+        for key in (*keys, MATCH_ALL):
+            for alert in self.postings.get(key, ()):
+                if frequencies and alert.frequency not in frequencies:
+                    continue
+                if alert.salary_min is not None and (salary is None or salary < alert.salary_min):
+                    continue
+                if alert.keys <= keys:
+                    matches.append(alert)
+        matches.sort(key=lambda alert: alert.id)
+        return matches
+
+
+class AlertMatcher:
+    """Process wide, lazily rebuilt AlertIndex"""
+    _lock = threading.Lock()
+    _index = None
+    _version = None
+
+    @classmethod
+    def get_index(cls):
+        version = generation(JOB_ALERT_INDEX)
+        with cls._lock:
+            if cls._index is None or cls._version != version:
+                cls._index = AlertIndex.build()
+                cls._version = version
+                logger.info(f"Built job alert index for {len(cls._index)} alerts")
+            return cls._index
+
+    @staticmethod
+    def invalidate():
+        bump(JOB_ALERT_INDEX)
+
+    @classmethod
+    def match_job(cls, job, frequencies=None):
+        """Active alerts matching the job, optionally only those with the given frequencies"""
+        skill_names = JobSkill.objects.filter(job=job).values_list('skill__name', flat=True)
+        return cls.get_index().match(
+            job_keys(job, skill_names),
+            salary=job.salary_max or job.salary_min,
+            frequencies=frequencies,
+        )
@@ -0,0 +1,103 @@
+"""
+Stateless JWT authentication.
+
+Access tokens carry the user's id, email and role. ``StatelessJWTAuthentication``
+trusts them on safe requests and hands the view a ``ClaimsUser`` instead of
+loading the row; the row is only read if the view touches another field.
+Unsafe requests still load the user, so writes see its current state.
+
+Revoked tokens are kept out by the ``Denylist``, a copy of the unexpired
+``TokenRevocation`` rows held in every process. It is reloaded only when
+its generation in the shared cache is bumped, so checking a token costs a
+cache read rather than a query.
+"""
+import threading
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+
+from .cache import TOKEN_DENYLIST, bump, generation
+from .models import ClaimsUser, TokenRevocation
+
+
+def token_user_id(token):
+    """The user id claim, simplejwt stores it as a string"""
+    user_id = token.get(settings.SIMPLE_JWT['USER_ID_CLAIM'])
+    return None if user_id is None else ClaimsUser._meta.pk.to_python(user_id)
+
+
+class Denylist:
+    """Process wide, lazily reloaded set of revoked tokens"""
+    _lock = threading.Lock()
+    _version = None
+    _tokens = frozenset()
+    _users = {}  # user id -> tokens issued before this timestamp are revoked
+
+    @classmethod
+    def load(cls):
+        version = generation(TOKEN_DENYLIST)
+        if cls._version == version:
+            return
+        with cls._lock:
+            if cls._version == version:
+                return
+            tokens, users = set(), {}
+            rows = TokenRevocation.objects.filter(expires_at__gt=timezone.now()).values_list(
+                'user_id', 'jti', 'created_at'
+            )
+            for user_id, jti, created_at in rows:
+                if jti:
+                    tokens.add(jti)
+                else:
+                    # Rounded down like iat, so a token issued in the same second still works
+                    users[user_id] = max(users.get(user_id, 0), int(created_at.timestamp()))
+            cls._tokens, cls._users, cls._version = frozenset(tokens), users, version
+
+    @classmethod
+    def is_revoked(cls, token):
+        cls.load()
+        if token.get('jti') in cls._tokens:
+            return True
+        revoked_before = cls._users.get(token_user_id(token))
+        return revoked_before is not None and token.get('iat', 0) < revoked_before
+
+    @staticmethod
+    def invalidate():
+        bump(TOKEN_DENYLIST)
+
+
+def revoke_token(token):
+    """Revoke one token, a validated access or refresh token"""
+    TokenRevocation.objects.create(
+        user_id=token_user_id(token),
+        jti=token['jti'],
+        expires_at=datetime.fromtimestamp(token['exp'], tz=dt_timezone.utc),
+    )
+    Denylist.invalidate()
+
+
+def revoke_user_tokens(user_id):
+    """Revoke every access token issued to the user so far"""
+    TokenRevocation.objects.revoke_users([user_id])
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that builds the user from the token on safe requests"""
+    claims = ('email', 'role')
+    stateless = False
+
+    def authenticate(self, request):
+        self.stateless = request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if Denylist.is_revoked(validated_token):
+            raise AuthenticationFailed('Token has been revoked', code='token_revoked')
+        user_id = token_user_id(validated_token)
+        if not self.stateless or user_id is None or any(claim not in validated_token for claim in self.claims):
+            return super().get_user(validated_token)
+        return ClaimsUser.from_claims(user_id, validated_token['email'], validated_token['role'])
@@ -0,0 +1,144 @@
+"""
+Namespaced, versioned cache keys.
+
+Every cached value declares the entities it was built from. Its key embeds
+the current generation of each of them::
+
+    user_profile:42:g1729123456000001
+
+Model signals ``bump`` an entity's generation when it changes. That is one
+increment no matter how many entries depend on it; entries built on an old
+generation are never read again and expire with their timeout.
+
+A generation starts from the clock rather than 1, so a counter that was
+evicted never comes back with a number older entries were stored under.
+
+Expensive values go through ``get_or_compute``, which keeps concurrent
+misses from all recomputing the same value, see its docstring.
+"""
+import math
+import random
+import time
+import uuid
+
+from django.core.cache import cache
+
+DEFAULT_TIMEOUT = 60 * 60
+
+# Entities values depend on, all but the last are per object
+USER = 'user'                    # login data and profile of a user
+USER_APPLICATIONS = 'user_applications'  # applications a user sent or received
+USER_NOTIFICATIONS = 'user_notifications'
+APPLICATION = 'application'
+JOB = 'job'
+JOB_BOARD = 'job_board'          # anything aggregated over every job, like facet counts
+SKILL_MATCH_INDEX = 'skill_match_index'
+JOB_ALERT_INDEX = 'job_alert_index'
+TOKEN_DENYLIST = 'token_denylist'
+
+
+def _generation_key(entity, pk=None):
+    return f'gen:{entity}' if pk is None else f'gen:{entity}:{pk}'
+
+
+def _seed():
+    return time.time_ns() // 1000
+
+
+def generations(*dependencies):
+    """Current generation of each ``(entity, pk)`` or ``(entity,)`` dependency"""
+    keys = [_generation_key(*dependency) for dependency in dependencies]
+    found = cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        for key in missing:
+            cache.add(key, _seed(), timeout=None)
+        found.update(cache.get_many(missing))
+    return [found.get(key, 0) for key in keys]
+
+
+def generation(entity, pk=None):
+    return generations((entity, pk))[0]
+
+
+def bump(entity, pk=None):
+    """Invalidate every value that depends on ``entity``"""
+    key = _generation_key(entity, pk)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _seed(), timeout=None)
+
+
+def bump_many(entity, pks):
+    for pk in set(pks):
+        bump(entity, pk)
+
+
+def make_key(namespace, *parts, depends_on=()):
+    """
+    Cache key for ``namespace`` and ``parts`` that changes whenever one of
+    the ``depends_on`` entities is bumped.
+    """
+    key = ':'.join([namespace, *(str(part) for part in parts)])
+    if depends_on:
+        key += ':g' + '.'.join(str(gen) for gen in generations(*depends_on))
+    return key
+
+
+
+# How long an expired value may still be served while it is being refreshed
+STALE_TIMEOUT = 5 * 60
+# Longest a recomputation may hold the refresh lock
+LOCK_TIMEOUT = 30
+LOCK_POLL_INTERVAL = 0.05
+
+
+def get_or_compute(key, compute, timeout=DEFAULT_TIMEOUT, beta=1.0):
+    """
+    Cache-aside read of ``key``, calling ``compute()`` on a miss.
+
+    Values are stored with the time they took to compute. A read refreshes
+    them a little before they expire, with a probability that grows as
+    expiry nears and with the cost of recomputing (XFetch), so hot entries
+    are refreshed by one request instead of expiring under all of them.
+
+    Only the request that takes the refresh lock recomputes. The others are
+    served the stale value while there is one, or wait for the new value
+    when there is none, e.g. after a generation bump.
+    """
+    entry = cache.get(key)
+    now = time.time()
+    if entry is not None:
+        value, delta, expires = entry
+        # -log(random()) is exponentially distributed, mostly small but now and then large
+        if now - delta * beta * math.log(1.0 - random.random()) < expires:
+            return value
+
+    lock_key = f'lock:{key}'
+    token = uuid.uuid4().hex
+    if not cache.add(lock_key, token, timeout=LOCK_TIMEOUT):
+        if entry is not None:
+            return entry[0]
+        deadline = now + LOCK_TIMEOUT
+        while True:
+            time.sleep(LOCK_POLL_INTERVAL)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry[0]
+            # The lock was released with nothing cached, e.g. compute() raised, so take over
+            if cache.add(lock_key, token, timeout=LOCK_TIMEOUT):
+                break
+            if time.time() >= deadline:
+                # The refreshing request died or is very slow, don't wait any longer
+                return compute()
+
+    try:
+        started = time.time()
+        value = compute()
+        delta = time.time() - started
+        cache.set(key, (value, delta, time.time() + timeout), timeout=timeout + STALE_TIMEOUT)
+        return value
+    finally:
+        if cache.get(lock_key) == token:
+            cache.delete(lock_key)
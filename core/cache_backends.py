@@ -0,0 +1,286 @@
+"""
+Two-tier cache backend.
+
+``TwoTierCache`` keeps a small LRU in each process in front of a shared
+cache (Redis in production). Reads that hit the LRU skip the network, so
+hot entries such as the ``/me`` payload, job details and the cache
+generation counters cost a dictionary lookup.
+
+Local entries live for ``LOCAL_TIMEOUT`` seconds at most. Every write goes
+to the shared cache, then an invalidation message with the written keys is
+published, so the other processes drop their local copies right away; the
+short local timeout bounds staleness if a message is lost.
+
+    CACHES = {
+        'shared': {'BACKEND': 'django_redis.cache.RedisCache', 'LOCATION': REDIS_URL},
+        'default': {
+            'BACKEND': 'core.cache_backends.TwoTierCache',
+            'LOCATION': 'shared',
+            'OPTIONS': {'LOCAL_MAX_ENTRIES': 2048, 'LOCAL_TIMEOUT': 5},
+        },
+    }
+"""
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+
+class LocalLRU:
+    """Bounded, thread safe LRU of pickled values with per-entry expiry"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=MISSING):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires, payload = entry
+            if expires <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+        return pickle.loads(payload)
+
+    def set(self, key, value, timeout):
+        payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._data[key] = (time.monotonic() + timeout, payload)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+def evict(local, keys):
+    """Drop ``keys`` from a LocalLRU, or everything when ``keys`` is None"""
+    if keys is None:
+        local.clear()
+    else:
+        for key in keys:
+            local.delete(key)
+
+
+class LocalInvalidationBus:
+    """
+    Delivers invalidations to the other local tiers of this process. Enough
+    for a single process server and for tests; use the Redis bus when
+    several workers share the cache.
+    """
+    _subscribers = {}
+    _lock = threading.Lock()
+
+    def __init__(self, local, shared_alias, options):
+        self.local = local
+        self.channel = options.get('CHANNEL', 'cache-invalidation')
+        with self._lock:
+            self._subscribers.setdefault(self.channel, []).append(local)
+
+    def publish(self, keys):
+        for local in list(self._subscribers.get(self.channel, ())):
+            if local is not self.local:
+                evict(local, keys)
+
+
+class RedisInvalidationBus:
+    """
+    Publishes invalidations on a Redis channel and evicts the keys other
+    processes publish, from a daemon thread started in each process.
+    """
+
+    def __init__(self, local, shared_alias, options):
+        self.local = local
+        self.shared_alias = shared_alias
+        self.channel = options.get('CHANNEL', 'cache-invalidation')
+        client_factory = options.get('CLIENT_FACTORY')
+        self.client_factory = import_string(client_factory) if client_factory else self._shared_client
+        self.origin = uuid.uuid4().hex
+        threading.Thread(target=self._listen, name='cache-invalidation', daemon=True).start()
+
+    def _shared_client(self):
+        shared = caches[self.shared_alias]
+        if hasattr(shared, 'client'):  # django-redis
+            return shared.client.get_client(write=True)
+        return shared._cache.get_client(write=True)  # django.core.cache.backends.redis
+
+    def publish(self, keys):
+        message = json.dumps({'origin': self.origin, 'keys': keys})
+        try:
+            self.client_factory().publish(self.channel, message)
+        except Exception:
+            logger.exception("Failed to publish cache invalidation, other workers expire the keys on their own")
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.client_factory().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                # Messages may have been missed while disconnected
+                self.local.clear()
+                for message in pubsub.listen():
+                    self.handle(message.get('data'))
+            except Exception:
+                logger.exception("Cache invalidation listener lost its connection, reconnecting")
+                time.sleep(1)
+
+    def handle(self, data):
+        try:
+            message = json.loads(data)
+        except (TypeError, ValueError):
+            return
+        if message.get('origin') != self.origin:
+            evict(self.local, message.get('keys'))
+
+
+# Django creates a cache backend per thread, the local tier is per process.
+# Keyed by pid so a forked worker starts its own, with its own listener.
+_local_tiers = {}
+_local_tiers_lock = threading.Lock()
+
+
+def get_local_tier(shared_alias, options):
+    key = (os.getpid(), shared_alias, options.get('CHANNEL', 'cache-invalidation'))
+    with _local_tiers_lock:
+        if key not in _local_tiers:
+            local = LocalLRU(options.get('LOCAL_MAX_ENTRIES', 1024))
+            bus_class = import_string(options.get('BUS', 'core.cache_backends.RedisInvalidationBus'))
+            _local_tiers[key] = (local, bus_class(local, shared_alias, options))
+        return _local_tiers[key]
+
+
+class TwoTierCache(BaseCache):
+    def __init__(self, location, params):
+        options = params.get('OPTIONS', {})
+        super().__init__(params)
+        self.shared_alias = location or options.get('SHARED', 'shared')
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        self.local, self.bus = get_local_tier(self.shared_alias, options)
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def _local_timeout(self, timeout):
+        timeout = self.get_backend_timeout(timeout)
+        return self.local_timeout if timeout is None else min(timeout, self.local_timeout)
+
+    def _written(self, *keys):
+        self.bus.publish(list(keys))
+
+    def get(self, key, default=None, version=None):
+        full_key = self.make_and_validate_key(key, version=version)
+        value = self.local.get(full_key)
+        if value is not MISSING:
+            return value
+        value = self.shared.get(key, MISSING, version=version)
+        if value is MISSING:
+            return default
+        self.local.set(full_key, value, self.local_timeout)
+        return value
+
+    def get_many(self, keys, version=None):
+        found, missing = {}, []
+        for key in keys:
+            value = self.local.get(self.make_and_validate_key(key, version=version))
+            if value is MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+        if missing:
+            shared = self.shared.get_many(missing, version=version)
+            for key, value in shared.items():
+                self.local.set(self.make_and_validate_key(key, version=version), value, self.local_timeout)
+            found.update(shared)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        full_key = self.make_and_validate_key(key, version=version)
+        self.shared.set(key, value, timeout=timeout, version=version)
+        self.local.set(full_key, value, self._local_timeout(timeout))
+        self._written(full_key)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout=timeout, version=version)
+        full_keys = []
+        for key, value in data.items():
+            full_key = self.make_and_validate_key(key, version=version)
+            if key not in failed:
+                self.local.set(full_key, value, self._local_timeout(timeout))
+            full_keys.append(full_key)
+        self._written(*full_keys)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        full_key = self.make_and_validate_key(key, version=version)
+        if not self.shared.add(key, value, timeout=timeout, version=version):
+            return False
+        self.local.set(full_key, value, self._local_timeout(timeout))
+        self._written(full_key)
+        return True
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout=timeout, version=version)
+
+    def delete(self, key, version=None):
+        full_key = self.make_and_validate_key(key, version=version)
+        self.local.delete(full_key)
+        deleted = self.shared.delete(key, version=version)
+        self._written(full_key)
+        return deleted
+
+    def delete_many(self, keys, version=None):
+        full_keys = [self.make_and_validate_key(key, version=version) for key in keys]
+        for full_key in full_keys:
+            self.local.delete(full_key)
+        self.shared.delete_many(keys, version=version)
+        self._written(*full_keys)
+
+    def has_key(self, key, version=None):
+        if self.local.get(self.make_and_validate_key(key, version=version)) is not MISSING:
+            return True
+        return self.shared.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        full_key = self.make_and_validate_key(key, version=version)
+        self.local.delete(full_key)
+        value = self.shared.incr(key, delta, version=version)
+        self.local.set(full_key, value, self.local_timeout)
+        self._written(full_key)
+        return value
+
+    def decr(self, key, delta=1, version=None):
+        return self.incr(key, -delta, version=version)
+
+    def clear(self):
+        self.shared.clear()
+        self.local.clear()
+        self.bus.publish(None)
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
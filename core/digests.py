@@ -0,0 +1,228 @@
+"""
+DAILY and WEEKLY job alert digests.
+
+A run covers the postings published up to its ``window_end``. It walks the
+candidates with due alerts of one frequency in id order, a chunk at a
+time, so memory is bounded by the chunk and the window's postings rather
+than by the number of alerts. The window's postings are held in an
+inverted index by key; each alert only verifies the postings filed under
+its rarest key.
+
+Every chunk commits its notification rows, its queued emails, the alerts'
+``last_sent_at`` and the run's checkpoint together. A crashed run resumes
+after the last committed candidate with the same window.
+"""
+import logging
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.html import escape
+
+from .alerts import alert_keys, job_keys
+from .emails import PrecompiledEmail, frontend_url, job_url, render_subject, tag
+from .models import AlertDigestRun, CandidateProfile, JobAlert, JobNotification, JobPosting, JobSkill
+from .queue import enqueue_many
+from .tasks import deliver_bulk_email
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {
+    JobAlert.Frequency.DAILY: timedelta(days=1),
+    JobAlert.Frequency.WEEKLY: timedelta(days=7),
+}
+# Alerts run slightly early rather than skip a cycle when cron drifts
+DUE_TOLERANCE = timedelta(hours=1)
+# A digest never reaches further back than this many periods
+MAX_LOOKBACK_PERIODS = 2
+# Jobs listed in one digest, the rest are behind a "see more" link
+MAX_DIGEST_JOBS = 25
+# SendGrid rejects a personalization whose substitutions exceed this
+MAX_SUBSTITUTION_BYTES = 10000
+
+WindowJob = namedtuple('WindowJob', ['id', 'posted_at', 'keys', 'salary', 'item'])
+
+
+class PostingIndex:
+    """The window's postings, filed under each of their keys"""
+
+    def __init__(self, jobs):
+        self.jobs = jobs
+        self.postings = {}
+        for position, job in enumerate(jobs):
+            for key in job.keys:
+                self.postings.setdefault(key, []).append(position)
+
+    @classmethod
+    def build(cls, since, until):
+        queryset = (
+            JobPosting.objects
+            .filter(status=JobPosting.Status.ACTIVE, posted_at__gt=since, posted_at__lte=until)
+            .select_related('employer')
+            .order_by('-posted_at', '-id')
+        )
+        skill_names = {}
+        for job_id, name in JobSkill.objects.filter(job__in=queryset).values_list('job_id', 'skill__name'):
+            skill_names.setdefault(job_id, []).append(name)
+
+        jobs = [
+            WindowJob(
+                job.id, job.posted_at, job_keys(job, skill_names.get(job.id, ())),
+                job.salary_max or job.salary_min,
+                render_to_string('emails/job_alert_digest_item.html', {'job': job, 'job_url': job_url(job)}),
+            )
+            for job in queryset.iterator(chunk_size=1000)
+        ]
+        return cls(jobs)
+
+    def match(self, keys, since, salary_min=None):
+        """Postings newer than ``since`` that have every key, newest first"""
+        if keys:
+            positions = min((self.postings.get(key, ()) for key in keys), key=len)
+        else:
+            positions = range(len(self.jobs))
+        matches = []
+        for position in positions:
+            job = self.jobs[position]
+            if job.posted_at <= since or not keys <= job.keys:
+                continue
+            if salary_min is not None and (job.salary is None or job.salary < salary_min):
+                continue
+            matches.append(position)
+        return matches
+
+
+class DigestEmail(PrecompiledEmail):
+    def __init__(self, frequency):
+        context = {
+            'frequency': frequency.label.lower(),
+            'first_name': tag('first_name'),
+            'job_count': tag('job_count'),
+            'jobs': tag('jobs'),
+            'more': tag('more'),
+        }
+        super().__init__(
+            subject=render_subject('emails/job_alert_digest_subject.txt', context),
+            body=render_to_string('emails/job_alert_digest.html', context),
+            tags=['first_name', 'job_count', 'jobs', 'more'],
+        )
+        self.more = render_to_string('emails/job_alert_digest_more.html', {'jobs_url': frontend_url('jobs')})
+
+    def recipient_values(self, first_name, items):
+        """
+        Lists the newest ``items`` that fit, within ``MAX_DIGEST_JOBS`` and
+        the substitution size limit, and links to the rest.
+        """
+        values = {'first_name': escape(first_name or 'there'), 'job_count': str(len(items)), 'more': self.more}
+        budget = MAX_SUBSTITUTION_BYTES - substitutions_size(self.substitutions(jobs='', **values))
+        shown = []
+        for item in items[:MAX_DIGEST_JOBS]:
+            budget -= len(item.encode())
+            if budget < 0:
+                break
+            shown.append(item)
+        values['jobs'] = ''.join(shown)
+        if len(shown) == len(items):
+            values['more'] = ''
+        return values
+
+
+def substitutions_size(substitutions):
+    return sum(len(key.encode()) + len(value.encode()) for key, value in substitutions.items())
+
+
+def get_or_start_run(frequency, now=None):
+    """Resume the unfinished run of ``frequency``, or start one ending now"""
+    run = AlertDigestRun.objects.filter(frequency=frequency, finished_at__isnull=True).first()
+    if run is None:
+        run = AlertDigestRun.objects.create(frequency=frequency, window_end=now or timezone.now())
+    return run
+
+
+def run_digest(frequency, chunk_size=1000, now=None):
+    frequency = JobAlert.Frequency(frequency)
+    period = PERIODS[frequency]
+    run = get_or_start_run(frequency, now)
+    if run.candidates_processed:
+        logger.info(f"Resuming {frequency} digest after candidate {run.last_candidate_id}")
+
+    window_start = run.window_end - period * MAX_LOOKBACK_PERIODS
+    index = PostingIndex.build(window_start, run.window_end)
+    email = DigestEmail(frequency)
+    logger.info(f"{frequency} digest window has {len(index.jobs)} new postings")
+
+    due = (
+        JobAlert.objects
+        .filter(frequency=frequency, is_active=True, candidate__user__is_active=True)
+        .exclude(last_sent_at__gt=run.window_end - period + DUE_TOLERANCE)
+    )
+    while True:
+        candidate_ids = list(
+            due.filter(candidate_id__gt=run.last_candidate_id)
+            .order_by('candidate_id')
+            .values_list('candidate_id', flat=True)
+            .distinct()[:chunk_size]
+        )
+        if not candidate_ids:
+            break
+        with transaction.atomic():
+            run.emails_queued += send_chunk(run, index, email, due.filter(candidate_id__in=candidate_ids), window_start)
+            run.last_candidate_id = candidate_ids[-1]
+            run.candidates_processed += len(candidate_ids)
+            run.save(update_fields=['last_candidate_id', 'candidates_processed', 'emails_queued', 'updated_at'])
+
+    run.finished_at = timezone.now()
+    run.save(update_fields=['finished_at', 'updated_at'])
+    return run
+
+
+def send_chunk(run, index, email, alerts, window_start):
+    """Digest one chunk of candidates, returns the number of emails queued"""
+    rows = list(alerts.values_list(
+        'id', 'candidate_id', 'keywords', 'location', 'job_type', 'experience_level', 'is_remote',
+        'salary_min', 'last_sent_at', 'created_at',
+    ))
+
+    # Jobs per candidate across all of their alerts
+    found = {}
+    for (alert_id, candidate_id, keywords, location, job_type, experience_level, is_remote,
+         salary_min, last_sent_at, created_at) in rows:
+        since = max(last_sent_at or created_at, window_start)
+        keys = alert_keys(keywords, location, job_type, experience_level, is_remote)
+        found.setdefault(candidate_id, set()).update(index.match(keys, since, salary_min))
+
+    # Jobs the candidate already heard about, from a match or an earlier digest, are left out
+    pairs = [(candidate_id, index.jobs[position].id) for candidate_id, positions in found.items() for position in positions]
+    created = set(JobNotification.objects.create_missing_pairs(pairs))
+
+    users = {
+        candidate_id: (email_address, first_name)
+        for candidate_id, email_address, first_name in CandidateProfile.objects
+        .filter(id__in=found)
+        .values_list('id', 'user__email', 'user__first_name')
+    }
+
+    recipients = []
+    for candidate_id, positions in found.items():
+        # Positions follow the index order, newest first
+        new = sorted(position for position in positions if (candidate_id, index.jobs[position].id) in created)
+        if not new:
+            continue
+        email_address, first_name = users[candidate_id]
+        recipients.append({
+            'to': email_address,
+            'substitutions': email.substitutions(
+                **email.recipient_values(first_name, [index.jobs[position].item for position in new])
+            ),
+        })
+
+    batch_size = settings.MAIL_BATCH_SIZE
+    enqueue_many(deliver_bulk_email, [
+        {'subject': email.subject, 'body': email.body, 'recipients': recipients[start:start + batch_size]}
+        for start in range(0, len(recipients), batch_size)
+    ])
+    alerts.update(last_sent_at=run.window_end)
+    return len(recipients)
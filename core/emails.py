@@ -0,0 +1,119 @@
+"""
+Email rendering.
+
+Templates live in ``templates/emails``. A fan-out renders the template once
+per job with substitution tags (``-first_name-``) standing in for the
+per-recipient values. ``PrecompiledEmail`` splits that body at the tags
+once, so each recipient only costs escaping their own values and a join.
+The same tags are handed to the bulk mail transport, which lets SendGrid
+do the substitution instead.
+"""
+import re
+
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.utils.html import escape
+
+
+def tag(name):
+    return f'-{name}-'
+
+
+def frontend_url(path):
+    """Absolute link to a front end page, mail clients can't follow relative ones"""
+    return f"{settings.FRONTEND_URL.rstrip('/')}/{path.lstrip('/')}"
+
+
+def job_url(job):
+    return frontend_url(f'jobs/{job.pk}')
+
+
+def render_subject(template_name, context):
+    # Subjects can't span lines
+    return ' '.join(render_to_string(template_name, context).split())
+
+
+class PrecompiledEmail:
+    """
+    A body rendered once with ``tags`` left as placeholders, filled in per
+    recipient with ``render`` or handed to the transport as substitutions.
+    """
+
+    def __init__(self, subject, body, tags, html=True):
+        self.subject = subject
+        self.body = body
+        self.html = html
+        self.tags = [tag(name) for name in tags]
+
+        # Alternating literal text and tag names: ['<p>Hi ', 'first_name', ',</p>...']
+        pattern = re.compile('|'.join(re.escape(t) for t in self.tags)) if self.tags else None
+        self.parts = []
+        position = 0
+        for found in (pattern.finditer(body) if pattern else ()):
+            self.parts.append(body[position:found.start()])
+            self.parts.append(found.group()[1:-1])
+            position = found.end()
+        self.parts.append(body[position:])
+
+    def substitutions(self, **values):
+        """Tag to value mapping for one recipient, values are already escaped markup"""
+        return {tag(name): value for name, value in values.items()}
+
+    def render(self, **values):
+        """The full body for one recipient"""
+        parts = self.parts[:]
+        parts[1::2] = [values.get(name, '') for name in parts[1::2]]
+        return ''.join(parts)
+
+
+class JobMatchEmail(PrecompiledEmail):
+    """The job match alert, rendered once per job"""
+
+    def __init__(self, job, skill_names):
+        context = {
+            'job': job,
+            'job_url': job_url(job),
+            'first_name': tag('first_name'),
+            'matching_skills': tag('matching_skills'),
+        }
+        super().__init__(
+            subject=render_subject('emails/job_match_subject.txt', context),
+            body=render_to_string('emails/job_match.html', context),
+            tags=['first_name', 'matching_skills'],
+        )
+        # Every required skill's list item is escaped once, recipients only join theirs
+        self.skill_items = {skill_id: f'<li>{escape(name)}</li>' for skill_id, name in skill_names.items()}
+
+    def recipient_values(self, first_name, skill_ids):
+        return {
+            'first_name': escape(first_name or 'there'),
+            'matching_skills': ''.join([self.skill_items[skill_id] for skill_id in skill_ids]),
+        }
+
+
+class JobAlertEmail(PrecompiledEmail):
+    """The instant job alert, rendered once per job"""
+
+    def __init__(self, job):
+        context = {
+            'job': job,
+            'job_url': job_url(job),
+            'first_name': tag('first_name'),
+            'alert_name': tag('alert_name'),
+        }
+        super().__init__(
+            subject=render_subject('emails/job_alert_subject.txt', context),
+            body=render_to_string('emails/job_alert.html', context),
+            tags=['first_name', 'alert_name'],
+        )
+
+    def recipient_values(self, first_name, alert_name):
+        return {'first_name': escape(first_name or 'there'), 'alert_name': escape(alert_name)}
+
+
+def application_update_email(application):
+    context = {'job': application.job, 'candidate': application.candidate}
+    return (
+        render_subject('emails/application_update_subject.txt', context),
+        render_to_string('emails/application_update.txt', context).strip(),
+    )
@@ -0,0 +1,48 @@
+"""
+Streamed file exports.
+
+The formatters turn an iterable of row dicts into an iterator of encoded
+lines for a StreamingHttpResponse, so a row is sent as soon as it is read
+and the whole file is never held in memory.
+"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+# Spreadsheets run cells starting with these as formulas
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class Echo:
+    """File-like object handing back what csv.writer writes to it"""
+
+    def write(self, value):
+        return value
+
+
+def csv_cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_lines(rows, fields):
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields).encode()
+    for row in rows:
+        yield writer.writerow([csv_cell(row[field]) for field in fields]).encode()
+
+
+def jsonl_lines(rows, fields):
+    for row in rows:
+        yield (json.dumps({field: row[field] for field in fields}, cls=DjangoJSONEncoder) + '\n').encode()
+
+
+# Export format -> (content type, formatter)
+FORMATS = {
+    'csv': ('text/csv', csv_lines),
+    'jsonl': ('application/x-ndjson', jsonl_lines),
+}
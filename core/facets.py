@@ -0,0 +1,210 @@
+"""
+Faceted counts for the job board sidebar.
+
+All scalar facets come from a single GROUP BY over the filtered active jobs,
+folded per dimension in Python. Category counts take one more GROUP BY over
+the categories through table. Results are cached per normalized filter
+signature and dropped by bumping the job board generation whenever a job
+changes.
+"""
+import hashlib
+import json
+from collections import defaultdict
+
+from django.db.models import Case, Count, IntegerField, Q, Value, When
+
+from .cache import JOB_BOARD, bump, get_or_compute, make_key
+from .models import JobPosting
+
+FACETS_TIMEOUT = 60 * 5
+
+CHOICE_FILTERS = {
+    'employment_type': JobPosting.EmploymentType,
+    'job_type': JobPosting.LocationType,
+    'experience_level': JobPosting.ExperienceLevel,
+}
+TEXT_FILTERS = ['country', 'city']
+
+# (key, lower bound inclusive, upper bound exclusive) on salary_min
+SALARY_BUCKETS = [
+    ('0-30k', 0, 30000),
+    ('30k-60k', 30000, 60000),
+    ('60k-100k', 60000, 100000),
+    ('100k-150k', 100000, 150000),
+    ('150k+', 150000, None),
+]
+SALARY_NOT_SPECIFIED = 'not_specified'
+
+# Largest id the database can compare against, a signed 64 bit integer
+MAX_ID = 2 ** 63 - 1
+
+
+def _split(values):
+    for value in values:
+        for part in str(value).split(','):
+            part = part.strip()
+            if part:
+                yield part
+
+
+def _parse_id(value):
+    """A positive integer id, None for anything else, e.g. '²' or out of range numbers"""
+    if not (value.isascii() and value.isdigit()):
+        return None
+    try:
+        number = int(value)
+    except ValueError:
+        return None
+    return number if 0 < number <= MAX_ID else None
+
+
+def normalize_filters(params):
+    """
+    Reduce query params to a canonical filter dict so equivalent requests share
+    one cache entry. Unknown keys and values are dropped.
+    """
+    filters = {}
+
+    for key, choices in CHOICE_FILTERS.items():
+        values = {value.upper() for value in _split(params.getlist(key))}
+        values &= set(choices.values)
+        if values:
+            filters[key] = sorted(values)
+
+    for key in TEXT_FILTERS:
+        values = {value for value in _split(params.getlist(key))}
+        if values:
+            filters[key] = sorted(values)
+
+    categories = {_parse_id(value) for value in _split(params.getlist('category'))} - {None}
+    if categories:
+        filters['category'] = sorted(categories)
+
+    valid_buckets = {key for key, _, _ in SALARY_BUCKETS} | {SALARY_NOT_SPECIFIED}
+    buckets = set(_split(params.getlist('salary'))) & valid_buckets
+    if buckets:
+        filters['salary'] = sorted(buckets)
+
+    return filters
+
+
+def filter_signature(filters):
+    raw = json.dumps(filters, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def _salary_bucket_q(bucket):
+    if bucket == SALARY_NOT_SPECIFIED:
+        return Q(salary_min__isnull=True)
+    for key, low, high in SALARY_BUCKETS:
+        if key == bucket:
+            q = Q(salary_min__gte=low)
+            if high is not None:
+                q &= Q(salary_min__lt=high)
+            return q
+    return Q(pk__in=[])
+
+
+def apply_job_filters(queryset, filters):
+    """Apply normalized filters to a JobPosting queryset"""
+    for key in list(CHOICE_FILTERS) + TEXT_FILTERS:
+        if key in filters:
+            queryset = queryset.filter(**{f'{key}__in': filters[key]})
+
+    if 'category' in filters:
+        queryset = queryset.filter(
+            pk__in=JobPosting.categories.through.objects
+            .filter(category_id__in=filters['category'])
+            .values('jobposting_id')
+        )
+
+    if 'salary' in filters:
+        q = Q()
+        for bucket in filters['salary']:
+            q |= _salary_bucket_q(bucket)
+        queryset = queryset.filter(q)
+
+    return queryset
+
+
+def _salary_bucket_expression():
+    whens = [When(salary_min__isnull=True, then=Value(-1))]
+    for index, (_, low, high) in enumerate(SALARY_BUCKETS):
+        condition = Q(salary_min__gte=low)
+        if high is not None:
+            condition &= Q(salary_min__lt=high)
+        whens.append(When(condition, then=Value(index)))
+    return Case(*whens, default=Value(-1), output_field=IntegerField())
+
+
+def compute_facets(filters):
+    """Compute every facet count for the filtered active jobs"""
+    jobs = apply_job_filters(
+        JobPosting.objects.filter(status=JobPosting.Status.ACTIVE, is_active=True),
+        filters,
+    )
+
+    rows = (
+        jobs.annotate(salary_bucket=_salary_bucket_expression())
+        .values('employment_type', 'job_type', 'experience_level', 'country', 'city', 'salary_bucket')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+
+    total = 0
+    counts = {key: defaultdict(int) for key in ['employment_type', 'job_type', 'experience_level', 'country', 'salary']}
+    city_counts = defaultdict(int)
+    for row in rows:
+        count = row['count']
+        total += count
+        for key in ['employment_type', 'job_type', 'experience_level']:
+            counts[key][row[key]] += count
+        if row['country']:
+            counts['country'][row['country']] += count
+        if row['city']:
+            city_counts[(row['city'], row['country'])] += count
+        bucket = row['salary_bucket']
+        counts['salary'][SALARY_BUCKETS[bucket][0] if bucket >= 0 else SALARY_NOT_SPECIFIED] += count
+
+    category_rows = (
+        JobPosting.categories.through.objects
+        .filter(jobposting_id__in=jobs.values('id'))
+        .values('category_id', 'category__name')
+        .annotate(count=Count('jobposting_id'))
+        .order_by()
+    )
+
+    def ranked(items):
+        return sorted(items, key=lambda item: (-item['count'], str(item['value'])))
+
+    return {
+        'total': total,
+        'facets': {
+            **{
+                key: ranked({'value': value, 'count': count} for value, count in counts[key].items())
+                for key in ['employment_type', 'job_type', 'experience_level', 'country']
+            },
+            'city': ranked(
+                {'value': city, 'country': country, 'count': count}
+                for (city, country), count in city_counts.items()
+            ),
+            'category': ranked(
+                {'value': row['category_id'], 'name': row['category__name'], 'count': row['count']}
+                for row in category_rows
+            ),
+            'salary': [
+                {'value': key, 'count': counts['salary'].get(key, 0)}
+                for key in [bucket for bucket, _, _ in SALARY_BUCKETS] + [SALARY_NOT_SPECIFIED]
+            ],
+        },
+    }
+
+
+def get_facets(filters):
+    """Cached compute_facets, keyed by the normalized filter signature"""
+    cache_key = make_key('job_facets', filter_signature(filters), depends_on=[(JOB_BOARD,)])
+    return get_or_compute(cache_key, lambda: compute_facets(filters), timeout=FACETS_TIMEOUT)
+
+
+def invalidate_facets():
+    bump(JOB_BOARD)
@@ -0,0 +1,163 @@
+"""
+Password hashing off the request path.
+
+PBKDF2 is CPU bound by design. Hashes run on a small shared pool, so a
+burst of logins can use at most ``PASSWORD_HASHING_WORKERS`` cores and the
+rest of the API keeps the others. hashlib releases the GIL while hashing,
+so the pool threads really run in parallel. When more hashes are waiting
+than ``PASSWORD_HASHING_QUEUE``, new logins are turned away at once rather
+than queued behind a storm, which bounds login latency.
+
+In front of that, ``login_admission`` keeps token buckets per client IP
+and per email, so credential stuffing from one address or against one
+account is throttled before it costs a hash. Buckets are per process, and
+the client IP is REMOTE_ADDR, so the proxy in front must set it.
+"""
+import asyncio
+import functools
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, identify_hasher, make_password
+from rest_framework.exceptions import Throttled
+
+from .ratelimit import TokenBucket
+
+
+class HashingBusy(Throttled):
+    default_detail = 'Too many sign-ins in progress, try again shortly.'
+
+
+class HashingPool:
+    def __init__(self, workers, queue):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hashing')
+        self.slots = threading.BoundedSemaphore(workers + queue)
+
+    def submit(self, fn, *args):
+        """Run ``fn`` on the pool, raises HashingBusy when it is saturated"""
+        if not self.slots.acquire(blocking=False):
+            raise HashingBusy(wait=1)
+        try:
+            future = self.executor.submit(fn, *args)
+        except BaseException:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda _: self.slots.release())
+        return future
+
+    def run(self, fn, *args):
+        return self.submit(fn, *args).result()
+
+    async def arun(self, fn, *args):
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+
+@functools.cache
+def get_pool():
+    workers = settings.PASSWORD_HASHING_WORKERS or max(1, (os.cpu_count() or 2) // 2)
+    return HashingPool(workers, settings.PASSWORD_HASHING_QUEUE)
+
+
+def hash_password(raw_password):
+    return get_pool().run(make_password, raw_password)
+
+
+def _check(raw_password, encoded):
+    """Whether the password matches, and whether its hash should be upgraded"""
+    if encoded is None:
+        # Hash anyway so unknown emails take as long as wrong passwords
+        make_password(raw_password)
+        return False, False
+    if not check_password(raw_password, encoded):
+        return False, False
+    try:
+        return True, identify_hasher(encoded).must_update(encoded)
+    except ValueError:
+        return True, False
+
+
+def _upgrade(user, raw_password):
+    # update() so a rehash isn't taken for a password change
+    user.password = make_password(raw_password)
+    get_user_model()._default_manager.filter(pk=user.pk).update(password=user.password)
+
+
+def _find_user(email):
+    User = get_user_model()
+    return User._default_manager.filter(**{User.USERNAME_FIELD: email}).first()
+
+
+def verify_credentials(email, raw_password):
+    """The user with these credentials, or None"""
+    user = _find_user(email)
+    matches, must_update = get_pool().run(_check, raw_password, user.password if user else None)
+    if not matches:
+        return None
+    if must_update:
+        _upgrade(user, raw_password)
+    return user
+
+
+async def check_credentials(email, raw_password):
+    """verify_credentials for async views, awaiting the hash without holding a thread"""
+    user = await sync_to_async(_find_user)(email)
+    matches, must_update = await get_pool().arun(_check, raw_password, user.password if user else None)
+    if not matches:
+        return None
+    if must_update:
+        await sync_to_async(_upgrade)(user, raw_password)
+    return user
+
+
+class KeyedTokenBuckets:
+    """A TokenBucket per key, keeping the ``max_keys`` most recently used"""
+
+    def __init__(self, rate, capacity, max_keys=10000):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def try_acquire(self, key):
+        if not self.rate:
+            return True
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.capacity)
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+        return bucket.try_acquire()
+
+
+@functools.cache
+def get_admission():
+    return (
+        KeyedTokenBuckets(settings.LOGIN_RATE_PER_IP / 60, settings.LOGIN_BURST_PER_IP),
+        KeyedTokenBuckets(settings.LOGIN_RATE_PER_EMAIL / 60, settings.LOGIN_BURST_PER_EMAIL),
+        KeyedTokenBuckets(settings.LOGIN_RATE_PER_ACCOUNT / 60, settings.LOGIN_BURST_PER_ACCOUNT),
+    )
+
+
+def client_ip(request):
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def login_admission(request, email):
+    """Raise Throttled when the client, the client on one account, or the account tries to sign in too often"""
+    per_ip, per_email, per_account = get_admission()
+    ip = client_ip(request)
+    email = (email or '').lower()
+    # The tight per email limit is keyed on the address too, so nobody can lock the owner out.
+    # The looser per account one still stops guessing spread over many addresses
+    for buckets, key in ((per_ip, ip), (per_email, (ip, email)), (per_account, email)):
+        if not buckets.try_acquire(key):
+            raise Throttled(wait=1 / buckets.rate)
@@ -0,0 +1,99 @@
+"""
+Idempotency-Key support for unsafe endpoints.
+
+A client that may retry a request sends the same ``Idempotency-Key``
+header with every attempt. The first attempt claims the key in the
+``idempotency`` cache, which every process shares, and runs the view; its successful response is kept for
+IDEMPOTENCY_KEY_TTL seconds and replayed to later attempts without running
+the view again. An attempt that arrives while the first is still running
+gets a 409, and reusing a key for a different request a 422. Failed
+attempts release the key so they can be retried.
+"""
+import functools
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.response import Response
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+# How long a claimed key blocks retries if its worker dies mid-request
+IN_PROGRESS_TIMEOUT = 60
+# Retries land on any worker, so this alias must not be per process
+CACHE_ALIAS = 'idempotency'
+
+
+def request_fingerprint(request):
+    """Digest of what the request asks for, uploads by name and size rather than content"""
+    fields = {
+        name: [value.name, value.size] if hasattr(value, 'size') else value
+        for name, value in request.data.items()
+    }
+    raw = json.dumps([request.method, request.path, fields], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).digest()
+
+
+def store_key(scope, user_id, key):
+    return f'idempotency:{scope}:{user_id}:{hashlib.sha256(key.encode()).hexdigest()}'
+
+
+def idempotent(scope):
+    """
+    Let clients retry the decorated view action with an Idempotency-Key.
+    Keys are per user and ``scope``, requests without one run as usual.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(self, request, *args, **kwargs):
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            if key is None or not request.user.is_authenticated:
+                return view(self, request, *args, **kwargs)
+            if not key or len(key) > MAX_KEY_LENGTH:
+                return Response(
+                    {'error': f'{IDEMPOTENCY_HEADER} must be 1 to {MAX_KEY_LENGTH} characters'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            cache = caches[CACHE_ALIAS]
+            cache_key = store_key(scope, request.user.pk, key)
+            fingerprint = request_fingerprint(request)
+            # Stored as (fingerprint, status code, data), without a status code while running
+            if cache.add(cache_key, (fingerprint, None, None), timeout=IN_PROGRESS_TIMEOUT):
+                return run(view, self, request, args, kwargs, cache_key, fingerprint)
+
+            stored = cache.get(cache_key)
+            if stored is None:  # Released or expired in between
+                return wrapper(self, request, *args, **kwargs)
+            stored_fingerprint, status_code, data = stored
+            if status_code is None:
+                return Response(
+                    {'error': f'A request with this {IDEMPOTENCY_HEADER} is still in progress'},
+                    status=status.HTTP_409_CONFLICT
+                )
+            if stored_fingerprint != fingerprint:
+                return Response(
+                    {'error': f'{IDEMPOTENCY_HEADER} was already used for a different request'},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                )
+            response = Response(data, status=status_code)
+            response['Idempotent-Replayed'] = 'true'
+            return response
+        return wrapper
+    return decorator
+
+
+def run(view, viewset, request, args, kwargs, cache_key, fingerprint):
+    cache = caches[CACHE_ALIAS]
+    try:
+        response = view(viewset, request, *args, **kwargs)
+    except BaseException:
+        cache.delete(cache_key)
+        raise
+    if status.is_success(response.status_code):
+        cache.set(cache_key, (fingerprint, response.status_code, response.data), timeout=settings.IDEMPOTENCY_KEY_TTL)
+    else:
+        cache.delete(cache_key)
+    return response
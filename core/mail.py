@@ -0,0 +1,181 @@
+"""
+Batched outbound email.
+
+``send_mass_mail`` groups messages that share a subject and body into bulk
+sends, one personalization per recipient, so a job alert fan-out costs one
+provider request per ``MAIL_BATCH_SIZE`` recipients instead of one per
+candidate. Per-recipient parts of the body are written as substitution tags
+(``-name-``) and filled in by the provider.
+
+The transport named by ``MAIL_TRANSPORT`` is created once per process and
+keeps its HTTP connections open between sends. ``LocmemTransport`` records
+messages in ``outbox`` instead of sending them, for tests and benchmarks.
+"""
+import json
+import logging
+import re
+import threading
+import time
+from collections import namedtuple
+
+import urllib3
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .ratelimit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+SENDGRID_SEND_URL = 'https://api.sendgrid.com/v3/mail/send'
+SENDGRID_MAX_PERSONALIZATIONS = 1000
+
+EmailMessage = namedtuple('EmailMessage', ['to', 'subject', 'body', 'html', 'substitutions'])
+EmailMessage.__new__.__defaults__ = (True, None)
+
+
+class MailDeliveryError(Exception):
+    pass
+
+
+class DeliveryReport:
+    def __init__(self):
+        self.sent = 0
+        self.failed = []
+        self.requests = 0
+        self.elapsed = 0.0
+
+    @property
+    def rate(self):
+        """Delivered messages per second"""
+        return self.sent / self.elapsed if self.elapsed else 0.0
+
+    def __repr__(self):
+        return (f'<DeliveryReport sent={self.sent} failed={len(self.failed)} '
+                f'requests={self.requests} rate={self.rate:.0f}/s>')
+
+
+def substitute(body, substitutions):
+    """Fill in substitution tags in one pass, so values can't introduce new tags"""
+    if not substitutions:
+        return body
+    pattern = re.compile('|'.join(re.escape(tag) for tag in substitutions))
+    return pattern.sub(lambda found: substitutions[found.group()], body)
+
+
+class SendGridTransport:
+    """Posts to the v3 mail send API over a pooled keep-alive connection"""
+    max_batch_size = SENDGRID_MAX_PERSONALIZATIONS
+
+    def __init__(self, api_key=None, timeout=10.0, maxsize=10):
+        self.api_key = api_key or settings.SENDGRID_API_KEY
+        self.http = urllib3.PoolManager(
+            maxsize=maxsize,
+            block=True,
+            timeout=urllib3.Timeout(connect=timeout, read=timeout),
+            # Only connection failures are retried here, the POST was never sent. After a read
+            # timeout or an error status it may have been, so the task queue retries the batch
+            retries=urllib3.Retry(total=2, connect=2, read=0, backoff_factor=0.5),
+        )
+
+    def build_payload(self, messages):
+        first = messages[0]
+        return {
+            'from': {'email': settings.DEFAULT_FROM_EMAIL},
+            'subject': first.subject,
+            'content': [{'type': 'text/html' if first.html else 'text/plain', 'value': first.body}],
+            'personalizations': [
+                {'to': [{'email': message.to}], **({'substitutions': message.substitutions} if message.substitutions else {})}
+                for message in messages
+            ],
+        }
+
+    def send(self, messages):
+        """Send messages sharing a subject and body in one request"""
+        response = self.http.request(
+            'POST',
+            SENDGRID_SEND_URL,
+            body=json.dumps(self.build_payload(messages)).encode(),
+            headers={'Authorization': f'Bearer {self.api_key}', 'Content-Type': 'application/json'},
+        )
+        if response.status >= 300:
+            raise MailDeliveryError(f'SendGrid returned {response.status}: {response.data[:200]!r}')
+
+
+class LocmemTransport:
+    """Keeps sent messages in memory, with the substitutions applied"""
+    max_batch_size = SENDGRID_MAX_PERSONALIZATIONS
+    outbox = []
+    requests = 0
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+
+    def send(self, messages):
+        if self.latency:
+            time.sleep(self.latency)
+        LocmemTransport.requests += 1
+        LocmemTransport.outbox.extend(
+            message._replace(body=substitute(message.body, message.substitutions), substitutions=None)
+            for message in messages
+        )
+
+    @classmethod
+    def reset(cls):
+        cls.outbox = []
+        cls.requests = 0
+
+
+_transports = {}
+_buckets = {}
+_lock = threading.Lock()
+
+
+def get_transport():
+    path = getattr(settings, 'MAIL_TRANSPORT', 'core.mail.SendGridTransport')
+    with _lock:
+        if path not in _transports:
+            _transports[path] = import_string(path)()
+        return _transports[path]
+
+
+def get_rate_limiter():
+    """Process wide bucket for ``MAIL_RATE_LIMIT`` messages per second"""
+    rate = getattr(settings, 'MAIL_RATE_LIMIT', 0)
+    with _lock:
+        if rate not in _buckets:
+            _buckets[rate] = TokenBucket(rate, capacity=max(rate, SENDGRID_MAX_PERSONALIZATIONS) if rate else None)
+        return _buckets[rate]
+
+
+def batch_messages(messages, batch_size):
+    """Group messages by subject, body and format, in chunks of ``batch_size``"""
+    groups = {}
+    for message in messages:
+        groups.setdefault((message.subject, message.body, message.html), []).append(message)
+    for group in groups.values():
+        for start in range(0, len(group), batch_size):
+            yield group[start:start + batch_size]
+
+
+def send_mass_mail(messages, transport=None, batch_size=None):
+    """Send ``EmailMessage`` tuples in bulk, returning a ``DeliveryReport``"""
+    transport = transport or get_transport()
+    limiter = get_rate_limiter()
+    batch_size = min(batch_size or getattr(settings, 'MAIL_BATCH_SIZE', 1000), transport.max_batch_size)
+
+    report = DeliveryReport()
+    started = time.perf_counter()
+    for batch in batch_messages(messages, batch_size):
+        limiter.acquire(len(batch))
+        report.requests += 1
+        try:
+            transport.send(batch)
+        except Exception as e:
+            logger.error(f"Failed to send {len(batch)} emails for {batch[0].subject!r}: {e}")
+            report.failed.extend(batch)
+        else:
+            report.sent += len(batch)
+    report.elapsed = time.perf_counter() - started
+
+    logger.info(f"Mail delivery: {report!r}")
+    return report
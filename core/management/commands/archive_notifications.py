@@ -0,0 +1,44 @@
+# management/commands/archive_notifications.py
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.retention import (
+    archive, archive_path, coalesce_notifications, expired_job_notifications, expired_notifications,
+)
+
+
+class Command(BaseCommand):
+    help = 'Coalesce duplicate notifications and archive old ones to gzipped JSON lines files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.NOTIFICATION_RETENTION_DAYS,
+                            help='Archive notifications older than this')
+        parser.add_argument('--job-notification-days', type=int, default=settings.JOB_NOTIFICATION_RETENTION_DAYS,
+                            help='Archive job notifications older than this')
+        parser.add_argument('--archive-dir', default=settings.ARCHIVE_DIR)
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows deleted per transaction')
+        parser.add_argument('--pause', type=float, default=0.1, help='Seconds to sleep between batches')
+        parser.add_argument('--skip-coalesce', action='store_true')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the rows that would be archived')
+
+    def handle(self, *args, **options):
+        querysets = [
+            expired_notifications(options['days']),
+            expired_job_notifications(options['job_notification_days']),
+        ]
+        if options['dry_run']:
+            for queryset in querysets:
+                self.stdout.write(f'{queryset.count()} {queryset.model._meta.verbose_name_plural} to archive')
+            return
+
+        if not options['skip_coalesce']:
+            removed = coalesce_notifications(batch_size=options['batch_size'], pause=options['pause'])
+            self.stdout.write(f'Removed {removed} duplicate notifications')
+
+        for queryset in querysets:
+            path = archive_path(queryset.model, options['archive_dir'])
+            archived = archive(queryset, path, batch_size=options['batch_size'], pause=options['pause'])
+            where = f' to {path}' if archived else ''
+            self.stdout.write(self.style.SUCCESS(
+                f'Archived {archived} {queryset.model._meta.verbose_name_plural}{where}'
+            ))
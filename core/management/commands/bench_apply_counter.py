@@ -0,0 +1,92 @@
+# management/commands/bench_apply_counter.py
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection, transaction
+from django.db.models.signals import post_save
+
+from core.models import Application, ApplicationCounterShard, CandidateProfile, EmployerProfile, JobPosting, User
+from core.signals import count_application, send_application_notifications
+
+
+class Command(BaseCommand):
+    help = 'Apply to one job from many threads at once, recounting on every apply against sharded counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--applies', type=int, default=1000)
+        parser.add_argument('--threads', type=int, default=100, help='Applies start together across this many threads')
+
+    def handle(self, *args, **options):
+        # Counting is measured, not the notification emails
+        post_save.disconnect(send_application_notifications, sender=Application)
+        users = []
+        try:
+            employer_user = User.objects.create_user(email='bench-apply-employer@jobboard.local', role=User.Role.EMPLOYER)
+            users = [employer_user] + User.objects.bulk_create(
+                User(email=f'bench-apply-{i}@jobboard.local', role=User.Role.CANDIDATE)
+                for i in range(options['applies'] * 2)
+            )
+            candidate_ids = [
+                profile.id for profile in CandidateProfile.objects.bulk_create(CandidateProfile(user=user) for user in users[1:])
+            ]
+            employer = EmployerProfile.objects.get(user=employer_user)
+
+            self.stdout.write(f'{"mode":>8} {"applies":>8} {"errors":>7} {"applies/s":>10} {"p99 ms":>8} {"stored":>7} {"count":>6}')
+            for mode, candidates in (('recount', candidate_ids[::2]), ('sharded', candidate_ids[1::2])):
+                job = JobPosting.objects.create(employer=employer, title='Popular job', description='Bench')
+                self.run(mode, job, candidates, options['threads'])
+        finally:
+            post_save.connect(send_application_notifications, sender=Application)
+            User.objects.filter(id__in=[user.id for user in users]).delete()
+
+    def run(self, mode, job, candidates, threads):
+        if mode == 'recount':
+            post_save.disconnect(count_application, sender=Application)
+        latencies, errors = [], []
+        barrier = threading.Barrier(min(threads, len(candidates)))
+
+        def apply(share):
+            barrier.wait()
+            try:
+                for candidate_id in share:
+                    started = time.perf_counter()
+                    try:
+                        self.apply(mode, job, candidate_id)
+                    except DatabaseError as exc:
+                        errors.append(exc)
+                    latencies.append(time.perf_counter() - started)
+            finally:
+                connection.close()
+
+        workers = [
+            threading.Thread(target=apply, args=(candidates[i::barrier.parties],))
+            for i in range(barrier.parties)
+        ]
+        started = time.perf_counter()
+        try:
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+        finally:
+            post_save.connect(count_application, sender=Application)
+        elapsed = time.perf_counter() - started
+
+        ApplicationCounterShard.objects.fold(job.id)
+        job.refresh_from_db(fields=['applications_count'])
+        p99 = statistics.quantiles(latencies, n=100)[98] * 1000
+        self.stdout.write(
+            f'{mode:>8} {len(candidates):>8} {len(errors):>7} {len(candidates) / elapsed:>10.0f} '
+            f'{p99:>8.1f} {job.applications.count():>7} {job.applications_count:>6}'
+        )
+
+    @staticmethod
+    @transaction.atomic
+    def apply(mode, job, candidate_id):
+        Application.objects.create(job_id=job.id, candidate_id=candidate_id)
+        if mode == 'recount':
+            # What Application.save used to do
+            job.applications_count = job.applications.filter(is_active=True).count()
+            job.save(update_fields=['applications_count'])
@@ -0,0 +1,58 @@
+# management/commands/bench_auth.py
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from core.authentication import Denylist, StatelessJWTAuthentication
+from core.models import User
+from core.serializer import LoginSerializer
+
+
+class Command(BaseCommand):
+    help = 'Compare authenticated requests/sec of JWTAuthentication and StatelessJWTAuthentication'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            User.objects.create_user(email='bench-auth@jobboard.local', password='bench', role=User.Role.CANDIDATE)
+            access = LoginSerializer().validate({'email': 'bench-auth@jobboard.local', 'password': 'bench'})['access']
+            factory = APIRequestFactory()
+            Denylist.load()
+
+            self.stdout.write(f'{"authentication":>28} {"requests/s":>11} {"queries/request":>16}')
+            for authentication_class in (JWTAuthentication, StatelessJWTAuthentication):
+                view = self.view(authentication_class)
+
+                def request():
+                    return view(factory.get('/bench/', HTTP_AUTHORIZATION=f'Bearer {access}'))
+
+                assert request().status_code == 200
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    for _ in range(options['requests']):
+                        request()
+                    elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'{authentication_class.__name__:>28} {options["requests"] / elapsed:>11.0f} '
+                    f'{len(queries) / options["requests"]:>16.2f}'
+                )
+
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def view(authentication_class):
+        class WhoAmI(APIView):
+            authentication_classes = [authentication_class]
+
+            def get(self, request):
+                return Response({'id': request.user.id, 'role': request.user.role})
+
+        return WhoAmI.as_view()
@@ -0,0 +1,61 @@
+# management/commands/bench_email_render.py
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+
+from core.emails import JobMatchEmail, job_url
+from core.models import EmployerProfile, JobPosting
+
+
+class Command(BaseCommand):
+    help = 'Measure the per-recipient cost of rendering job match emails'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipients', type=int, default=50000)
+        parser.add_argument('--sample', type=int, default=2000,
+                            help='Recipients rendered with the full template, the whole batch would take minutes')
+
+    def handle(self, *args, **options):
+        job = JobPosting(
+            id=1,
+            title='Senior Backend Engineer',
+            description='Build and scale the APIs behind the job board. ' * 10,
+            location='Nairobi',
+            employer=EmployerProfile(company_name='Acme'),
+        )
+        skill_names = {skill_id: f'Skill {skill_id}' for skill_id in range(1, 9)}
+        rng = random.Random(0)
+        recipients = [
+            (f'Candidate {i}', sorted(rng.sample(list(skill_names), rng.randint(1, 5))))
+            for i in range(options['recipients'])
+        ]
+
+        self.stdout.write(f'{"mode":>22} {"recipients":>11} {"us/recipient":>13} {"batch seconds":>14}')
+
+        def full_render(first_name, skill_ids):
+            return render_to_string('emails/job_match.html', {
+                'job': job,
+                'job_url': job_url(job),
+                'first_name': first_name,
+                'matching_skills': ''.join(f'<li>{skill_names[skill_id]}</li>' for skill_id in skill_ids),
+            })
+        self.measure('template per recipient', recipients[:options['sample']], full_render, len(recipients))
+
+        started = time.perf_counter()
+        email = JobMatchEmail(job, skill_names)
+        self.stdout.write(f'{"shared render once":>22} {1:>11} {(time.perf_counter() - started) * 1e6:>13.1f}')
+
+        self.measure('precompiled render', recipients,
+                     lambda name, skills: email.render(**email.recipient_values(name, skills)))
+        self.measure('bulk substitutions', recipients,
+                     lambda name, skills: email.substitutions(**email.recipient_values(name, skills)))
+
+    def measure(self, mode, recipients, render, batch=None):
+        started = time.perf_counter()
+        for first_name, skill_ids in recipients:
+            render(first_name, skill_ids)
+        per_recipient = (time.perf_counter() - started) / len(recipients)
+        batch = batch or len(recipients)
+        self.stdout.write(f'{mode:>22} {len(recipients):>11} {per_recipient * 1e6:>13.1f} {per_recipient * batch:>14.2f}')
@@ -0,0 +1,86 @@
+# management/commands/bench_job_list.py
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+
+from core.models import JobPosting, User
+from core.pagination import JobCursorPagination
+from core.views import JobView
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the cursor-paginated job list as the table grows (runs in a rolled back transaction)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+        parser.add_argument('--requests', type=int, default=30, help='Requests per measurement')
+
+    def handle(self, *args, **options):
+        self.factory = APIRequestFactory()
+        self.view = JobView.as_view({'get': 'list'})
+
+        with transaction.atomic():
+            employer = User.objects.create_user(
+                email='bench-employer@jobboard.local', password=None, role=User.Role.EMPLOYER
+            ).employer_profile
+
+            self.stdout.write(f'{"jobs":>8} {"first page ms":>15} {"deep page ms":>15}')
+            total = 0
+            for size in sorted(options['sizes']):
+                self.seed_jobs(employer, start=total, count=size - total)
+                total = size
+
+                first = self.measure('/api/jobs/', options['requests'])
+                deep = self.measure(f'/api/jobs/?cursor={self.cursor_at(total // 2)}', options['requests'])
+                self.stdout.write(f'{total:>8} {first:>15.2f} {deep:>15.2f}')
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS('Done, benchmark data rolled back'))
+
+    def seed_jobs(self, employer, start, count):
+        now = timezone.now()
+        batch = []
+        for i in range(start, start + count):
+            batch.append(JobPosting(
+                employer=employer,
+                posted_by=employer,
+                title=f'Bench job {i}',
+                description='Benchmark job posting',
+                employment_type=JobPosting.EmploymentType.FULL_TIME,
+                job_type=JobPosting.LocationType.REMOTE,
+                experience_level=JobPosting.ExperienceLevel.SENIOR,
+                status=JobPosting.Status.ACTIVE,
+                # Every tenth job shares a timestamp to exercise the id tie-breaker
+                posted_at=now - timedelta(seconds=i - i % 10),
+            ))
+            if len(batch) >= 1000:
+                JobPosting.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            JobPosting.objects.bulk_create(batch)
+
+    def cursor_at(self, offset):
+        job = (
+            JobPosting.objects
+            .filter(status=JobPosting.Status.ACTIVE, is_active=True)
+            .order_by('-posted_at', '-id')
+            .only('id', 'posted_at')[offset]
+        )
+        pagination = JobCursorPagination()
+        return pagination.encode_cursor(pagination.get_position(job))
+
+    def measure(self, path, requests):
+        timings = []
+        for _ in range(requests):
+            request = self.factory.get(path, HTTP_HOST='localhost')
+            started = time.perf_counter()
+            response = self.view(request)
+            response.render()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
@@ -0,0 +1,52 @@
+# management/commands/bench_mail_fanout.py
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.mail import EmailMessage, SendGridTransport, send_mass_mail
+
+
+class StubSendGridTransport(SendGridTransport):
+    """Builds and serializes the real request body, then waits ``latency`` instead of posting it"""
+
+    def __init__(self, latency):
+        super().__init__(api_key='bench')
+        self.latency = latency
+        self.requests = 0
+
+    def send(self, messages):
+        json.dumps(self.build_payload(messages))
+        time.sleep(self.latency)
+        self.requests += 1
+
+
+class Command(BaseCommand):
+    help = 'Measure job alert delivery rate, one request per message against bulk sends'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipients', type=int, default=10000)
+        parser.add_argument('--latency-ms', type=float, default=80.0, help='Simulated provider round trip')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--sample', type=int, default=200,
+                            help='Messages sent one per request, the full fan-out would take minutes')
+
+    def handle(self, *args, **options):
+        latency = options['latency_ms'] / 1000
+        body = '<html><body><h2>Backend Engineer</h2>' + 'x' * 2000 + '<ul>-matching_skills-</ul></body></html>'
+        messages = [
+            EmailMessage(f'candidate{i}@jobboard.local', 'New Job Match: Backend Engineer', body,
+                         substitutions={'-matching_skills-': '<li>Python</li><li>Django</li>'})
+            for i in range(options['recipients'])
+        ]
+
+        self.stdout.write(f'{"mode":>12} {"messages":>9} {"requests":>9} {"seconds":>9} {"msg/s":>9}')
+        single = send_mass_mail(messages[:options['sample']], transport=StubSendGridTransport(latency), batch_size=1)
+        self.report('per message', single)
+        bulk = send_mass_mail(messages, transport=StubSendGridTransport(latency), batch_size=options['batch_size'])
+        self.report('batched', bulk)
+
+        self.stdout.write(self.style.SUCCESS(f'Speedup: {bulk.rate / single.rate:.0f}x'))
+
+    def report(self, mode, report):
+        self.stdout.write(f'{mode:>12} {report.sent:>9} {report.requests:>9} {report.elapsed:>9.2f} {report.rate:>9.0f}')
@@ -0,0 +1,63 @@
+# management/commands/bench_pipeline.py
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Application, CandidateProfile, JobPosting, User
+from core.pagination import ApplicationCursorPagination
+from core.services import ApplicationService
+
+
+class Command(BaseCommand):
+    help = "Time building an employer's applicant pipeline (runs in a rolled back transaction)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', type=int, default=50)
+        parser.add_argument('--applications', type=int, default=100000)
+        parser.add_argument('--per-column', type=int, default=5)
+        parser.add_argument('--requests', type=int, default=20, help='Boards built per measurement')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            employer_user = User.objects.create_user(email='bench-pipeline@jobboard.local', role=User.Role.EMPLOYER)
+            self.seed(employer_user.employer_profile, options['jobs'], options['applications'])
+
+            paginator = ApplicationCursorPagination()
+            timings = []
+            for _ in range(options['requests']):
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    board = ApplicationService.get_pipeline(employer_user, options['per_column'], paginator)
+                    timings.append((time.perf_counter() - started) * 1000)
+
+            total = sum(job['total'] for job in board['jobs'])
+            self.stdout.write(
+                f'{len(board["jobs"])} jobs, {total} applications: median {statistics.median(timings):.1f} ms, '
+                f'max {max(timings):.1f} ms, {len(queries)} queries'
+            )
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS('Done, benchmark data rolled back'))
+
+    def seed(self, employer, job_count, application_count):
+        jobs = JobPosting.objects.bulk_create(
+            JobPosting(employer=employer, title=f'Bench job {i}', description='Bench') for i in range(job_count)
+        )
+        # Each candidate applies to every job once
+        candidate_count = -(-application_count // job_count)
+        users = User.objects.bulk_create(
+            User(email=f'bench-pipeline-{i}@jobboard.local', first_name='Bench', last_name=str(i))
+            for i in range(candidate_count)
+        )
+        candidates = CandidateProfile.objects.bulk_create(CandidateProfile(user=user) for user in users)
+        statuses = Application.Status.values
+        Application.objects.bulk_create(
+            (
+                Application(job=jobs[i % job_count], candidate=candidates[i // job_count], status=statuses[i % len(statuses)])
+                for i in range(application_count)
+            ),
+            batch_size=5000,
+        )
@@ -0,0 +1,28 @@
+# management/commands/fold_application_counts.py
+from django.core.management.base import BaseCommand
+
+from core.cache import JOB, bump
+from core.models import ApplicationCounterShard, JobPosting
+
+
+class Command(BaseCommand):
+    help = "Fold the application counter shards into the jobs' applications_count, run it every minute or so"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recount', action='store_true',
+                            help='Count every job\'s applications instead, to repair drift')
+
+    def handle(self, *args, **options):
+        if options['recount']:
+            job_ids = JobPosting.objects.values_list('id', flat=True)
+        else:
+            job_ids = ApplicationCounterShard.objects.exclude(delta=0).values_list('job_id', flat=True).distinct()
+
+        changed = 0
+        for job_id in sorted(job_ids):
+            if ApplicationCounterShard.objects.fold(job_id, recount=options['recount']):
+                # update() skips the post_save receivers
+                bump(JOB, job_id)
+                changed += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Updated applications_count of {changed} jobs'))
@@ -0,0 +1,53 @@
+# management/commands/reconcile_notification_counters.py
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from core.cache import USER_NOTIFICATIONS, bump
+from core.models import Notification, NotificationCounter
+
+
+class Command(BaseCommand):
+    help = 'Repair unread notification counters that drifted from the notifications'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report the counters that drifted')
+
+    def handle(self, *args, **options):
+        actual = dict(
+            Notification.objects.filter(is_read=False)
+            .values('user_id')
+            .annotate(unread=Count('id'))
+            .order_by()
+            .values_list('user_id', 'unread')
+        )
+        stored = dict(NotificationCounter.objects.values_list('user_id', 'unread'))
+
+        drifted = [
+            user_id for user_id in actual.keys() | stored.keys()
+            if actual.get(user_id, 0) != stored.get(user_id, 0)
+        ]
+        repaired = 0
+        for user_id in sorted(drifted):
+            if options['dry_run']:
+                self.stdout.write(f'User {user_id}: counter {stored.get(user_id, 0)}, unread {actual.get(user_id, 0)}')
+                continue
+            if self.repair(user_id):
+                repaired += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(drifted)} of {len(actual.keys() | stored.keys())} counters drifted, {repaired} repaired'
+        ))
+
+    def repair(self, user_id):
+        """Recount one user with their counter locked, so concurrent updates queue behind it"""
+        with transaction.atomic():
+            NotificationCounter.objects.bulk_create([NotificationCounter(user_id=user_id)], ignore_conflicts=True)
+            counter = NotificationCounter.objects.select_for_update().get(user_id=user_id)
+            unread = Notification.objects.filter(user_id=user_id, is_read=False).count()
+            if counter.unread == unread:
+                return False
+            counter.unread = unread
+            counter.save(update_fields=['unread', 'updated_at'])
+        bump(USER_NOTIFICATIONS, user_id)
+        return True
@@ -0,0 +1,17 @@
+# management/commands/send_alert_digests.py
+from django.core.management.base import BaseCommand
+from core.digests import PERIODS, run_digest
+
+
+class Command(BaseCommand):
+    help = 'Queue DAILY or WEEKLY job alert digests, resuming an interrupted run'
+
+    def add_arguments(self, parser):
+        parser.add_argument('frequency', choices=[str(frequency) for frequency in PERIODS])
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Candidates per transaction')
+
+    def handle(self, *args, **options):
+        run = run_digest(options['frequency'], chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{run}: {run.candidates_processed} candidates, {run.emails_queued} digests queued'
+        ))
@@ -0,0 +1,158 @@
+"""
+Skill matching between job postings and candidates.
+
+``CandidateSkillIndex`` keeps two sets of bitsets (Python ints): per skill, a
+bit for each candidate that has it, and per candidate, a bit for each
+``Skill.id`` they have. Scoring a job adds the required skills' bitsets with
+a bit-sliced counter, so every candidate's overlap count is computed in one
+pass of big-int operations instead of one query per candidate. The
+per-candidate bitsets then give each match's overlapping skills.
+
+The index is built with a single query and cached per process. Candidate
+skill changes bump the index generation in the shared cache so every worker
+rebuilds lazily on its next match.
+"""
+import logging
+import threading
+from collections import namedtuple
+
+from .cache import SKILL_MATCH_INDEX, bump, generation
+from .models import CandidateSkill, JobSkill, Skill
+
+logger = logging.getLogger(__name__)
+
+SkillMatch = namedtuple('SkillMatch', ['candidate_id', 'score', 'matched_skill_ids', 'matched_skills'])
+
+
+def _bit_positions(bits):
+    """Yield the positions of the set bits of ``bits``, lowest first"""
+    digits = bin(bits)[:1:-1]
+    position = digits.find('1')
+    while position != -1:
+        yield position
+        position = digits.find('1', position + 1)
+
+
+class CandidateSkillIndex:
+    def __init__(self, pairs=()):
+        self.candidate_ids = []
+        self.candidate_bitsets = []
+        self.positions = {}
+
+        skill_positions = {}
+        for candidate_id, skill_id in pairs:
+            position = self.positions.get(candidate_id)
+            if position is None:
+                position = self.positions[candidate_id] = len(self.candidate_ids)
+                self.candidate_ids.append(candidate_id)
+                self.candidate_bitsets.append(0)
+            self.candidate_bitsets[position] |= 1 << skill_id
+            skill_positions.setdefault(skill_id, []).append(position)
+
+        # Set bits in a byte buffer, ORing into a growing int is quadratic
+        size = len(self.candidate_ids) // 8 + 1
+        self.skill_bitsets = {}
+        for skill_id, positions in skill_positions.items():
+            buffer = bytearray(size)
+            for position in positions:
+                buffer[position >> 3] |= 1 << (position & 7)
+            self.skill_bitsets[skill_id] = int.from_bytes(buffer, 'little')
+
+    @classmethod
+    def build(cls):
+        pairs = (
+            CandidateSkill.objects
+            .filter(is_active=True)
+            .values_list('candidate_id', 'skill_id')
+            .iterator(chunk_size=5000)
+        )
+        return cls(pairs)
+
+    def __len__(self):
+        return len(self.candidate_ids)
+
+    def score(self, skill_ids):
+        """
+        Count, for every candidate at once, how many of ``skill_ids`` they have.
+
+        Returns the bit planes of the per-candidate counts: bit ``p`` of
+        ``planes[i]`` is bit ``i`` of candidate ``p``'s count.
+        """
+        planes = []
+        for skill_id in set(skill_ids):
+            carry = self.skill_bitsets.get(skill_id, 0)
+            for i, plane in enumerate(planes):
+                if not carry:
+                    break
+                planes[i], carry = plane ^ carry, plane & carry
+            if carry:
+                planes.append(carry)
+        return planes
+
+    def match(self, skill_ids, min_score=1):
+        """Return ``SkillMatch`` tuples for every candidate, best match first"""
+        skill_ids = list(dict.fromkeys(skill_ids))
+        planes = self.score(skill_ids)
+        if not planes:
+            return []
+
+        everyone = (1 << len(self.candidate_ids)) - 1
+        job_bitset = 0
+        for skill_id in skill_ids:
+            job_bitset |= 1 << skill_id
+
+        matches = []
+        for score in range(len(skill_ids), min_score - 1, -1):
+            # Candidates whose count equals ``score`` exactly
+            bits = everyone
+            for i, plane in enumerate(planes):
+                bits &= plane if score >> i & 1 else ~plane
+            if score >> len(planes):
+                bits = 0
+            tier = []
+            for position in _bit_positions(bits):
+                matched = list(_bit_positions(self.candidate_bitsets[position] & job_bitset))
+                tier.append(SkillMatch(self.candidate_ids[position], score, matched, []))
+            tier.sort(key=lambda match: match.candidate_id)
+            matches.extend(tier)
+        return matches
+
+
+class SkillMatcher:
+    """Process wide, lazily rebuilt CandidateSkillIndex"""
+    _lock = threading.Lock()
+    _index = None
+    _version = None
+
+    @classmethod
+    def get_index(cls):
+        version = generation(SKILL_MATCH_INDEX)
+        with cls._lock:
+            if cls._index is None or cls._version != version:
+                cls._index = CandidateSkillIndex.build()
+                cls._version = version
+                logger.info(f"Built skill match index for {len(cls._index)} candidates")
+            return cls._index
+
+    @staticmethod
+    def invalidate():
+        bump(SKILL_MATCH_INDEX)
+
+    @classmethod
+    def match_job(cls, job, min_score=1):
+        """
+        Rank candidates against the job's required skills, attaching the
+        names of the overlapping skills to every match.
+        """
+        required_skill_ids = list(
+            JobSkill.objects.filter(job=job, is_required=True).values_list('skill_id', flat=True)
+        )
+        if not required_skill_ids:
+            return []
+
+        matches = cls.get_index().match(required_skill_ids, min_score=min_score)
+        skill_names = dict(Skill.objects.filter(id__in=required_skill_ids).values_list('id', 'name'))
+        return [
+            match._replace(matched_skills=[skill_names[skill_id] for skill_id in match.matched_skill_ids])
+            for match in matches
+        ]
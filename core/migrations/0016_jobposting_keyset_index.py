@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:09
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_posted_at(apps, schema_editor):
+    JobPosting = apps.get_model("core", "JobPosting")
+    JobPosting.objects.filter(status="ACTIVE", posted_at__isnull=True).update(
+        posted_at=F("created_at")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0015_alter_address_user"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_posted_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="jobposting",
+            index=models.Index(
+                fields=["status", "-posted_at", "-id"],
+                name="core_jobpos_status_d8aa53_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,159 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# The full-text index and document layout as they were when this migration
+# was written, frozen here so later changes to core.search can't alter it
+
+FTS_TABLE = "core_jobsearchdocument_fts"
+
+SQLITE_SCHEMA = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, body, skills,
+        content='core_jobsearchdocument', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS core_jobsearchdocument_ai AFTER INSERT ON core_jobsearchdocument BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, body, skills)
+        VALUES (new.id, new.title, new.body, new.skills);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS core_jobsearchdocument_ad AFTER DELETE ON core_jobsearchdocument BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body, skills)
+        VALUES ('delete', old.id, old.title, old.body, old.skills);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS core_jobsearchdocument_au AFTER UPDATE ON core_jobsearchdocument BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body, skills)
+        VALUES ('delete', old.id, old.title, old.body, old.skills);
+        INSERT INTO {FTS_TABLE}(rowid, title, body, skills)
+        VALUES (new.id, new.title, new.body, new.skills);
+    END
+    """,
+]
+
+POSTGRES_SCHEMA = [
+    """
+    ALTER TABLE core_jobsearchdocument ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(skills, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(body, '')), 'C')
+    ) STORED
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS core_jobsearchdocument_vector_idx
+    ON core_jobsearchdocument USING GIN (search_vector)
+    """,
+]
+
+
+def build_document(title, description, requirements, responsibilities, skill_names):
+    body_parts = [description or ""]
+    for items in (requirements, responsibilities):
+        if isinstance(items, (list, tuple)):
+            body_parts.extend(str(item) for item in items if item)
+        elif items:
+            body_parts.append(str(items))
+    return {
+        "title": title or "",
+        "body": "\n".join(part for part in body_parts if part),
+        "skills": " ".join(sorted(skill_names)),
+    }
+
+
+def create_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for statement in {"sqlite": SQLITE_SCHEMA, "postgresql": POSTGRES_SCHEMA}.get(vendor, []):
+        schema_editor.execute(statement)
+
+
+def drop_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        for trigger in ("ai", "ad", "au"):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS core_jobsearchdocument_{trigger}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS core_jobsearchdocument_vector_idx")
+        schema_editor.execute("ALTER TABLE core_jobsearchdocument DROP COLUMN IF EXISTS search_vector")
+
+
+def backfill_documents(apps, schema_editor):
+    JobPosting = apps.get_model("core", "JobPosting")
+    JobSkill = apps.get_model("core", "JobSkill")
+    JobSearchDocument = apps.get_model("core", "JobSearchDocument")
+
+    skill_names = {}
+    for job_id, name in JobSkill.objects.values_list("job_id", "skill__name"):
+        skill_names.setdefault(job_id, []).append(name)
+
+    jobs = JobPosting.objects.values_list(
+        "id", "title", "description", "requirements", "responsibilities"
+    )
+    JobSearchDocument.objects.bulk_create(
+        [
+            JobSearchDocument(
+                job_id=job_id,
+                **build_document(
+                    title,
+                    description,
+                    requirements,
+                    responsibilities,
+                    skill_names.get(job_id, []),
+                ),
+            )
+            for job_id, title, description, requirements, responsibilities in jobs
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0016_jobposting_keyset_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="JobSearchDocument",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("is_active", models.BooleanField(default=True)),
+                ("title", models.CharField(max_length=200)),
+                ("body", models.TextField(blank=True)),
+                ("skills", models.TextField(blank=True)),
+                (
+                    "job",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="search_document",
+                        to="core.jobposting",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Job Search Document",
+                "verbose_name_plural": "Job Search Documents",
+            },
+        ),
+        migrations.RunPython(create_index, drop_index),
+        migrations.RunPython(backfill_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0018_task"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AlertDigestRun",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("is_active", models.BooleanField(default=True)),
+                (
+                    "frequency",
+                    models.CharField(
+                        choices=[
+                            ("INSTANT", "Instant"),
+                            ("DAILY", "Daily"),
+                            ("WEEKLY", "Weekly"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("window_end", models.DateTimeField()),
+                ("last_candidate_id", models.BigIntegerField(default=0)),
+                ("candidates_processed", models.IntegerField(default=0)),
+                ("emails_queued", models.IntegerField(default=0)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "ordering": ["-window_end"],
+            },
+        ),
+        migrations.AddField(
+            model_name="jobalert",
+            name="last_sent_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="jobalert",
+            index=models.Index(
+                fields=["frequency", "candidate"], name="core_jobale_frequen_8e8da6_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0020_notification_counters"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["user", "-created_at", "-id"],
+                name="core_notifi_user_id_ea1d2f_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def recount_applications(apps, schema_editor):
+    """Withdrawn applications no longer count"""
+    Application = apps.get_model("core", "Application")
+    JobPosting = apps.get_model("core", "JobPosting")
+
+    counts = (
+        Application.objects.filter(job=OuterRef("pk"), is_active=True, is_withdrawn=False)
+        .values("job")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    JobPosting.objects.update(applications_count=Coalesce(Subquery(counts), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0022_stateless_jwt"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ApplicationCounterShard",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("is_active", models.BooleanField(default=True)),
+                ("shard", models.PositiveSmallIntegerField()),
+                ("delta", models.IntegerField(default=0)),
+                (
+                    "job",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="application_counter_shards",
+                        to="core.jobposting",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Application Counter Shard",
+                "verbose_name_plural": "Application Counter Shards",
+                "unique_together": {("job", "shard")},
+            },
+        ),
+        migrations.RunPython(recount_applications, migrations.RunPython.noop),
+    ]
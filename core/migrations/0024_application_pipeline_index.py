@@ -0,0 +1,24 @@
+# Generated by Django 6.0.1 on 2026-10-17 02:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0023_application_counter_shards"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="application",
+            name="core_applic_job_id_472dfd_idx",
+        ),
+        migrations.AddIndex(
+            model_name="application",
+            index=models.Index(
+                fields=["job", "status", "is_active", "-applied_at", "-id"],
+                name="core_applic_job_id_d316f0_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-17 09:20
+
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_cache_tables(apps, schema_editor):
+    # The idempotency store is a DatabaseCache when there is no Redis,
+    # a no-op for tables that already exist or other backends
+    call_command("createcachetable", database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0024_application_pipeline_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_cache_tables, migrations.RunPython.noop),
+    ]
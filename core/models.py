@@ -1,14 +1,36 @@
+import random
+
 from cryptography.hazmat.primitives.ciphers.algorithms import Camellia
-from django.db import models
+from django.conf import settings
+from django.db import connections, models, transaction
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator, MaxValueValidator, ValidationError
 from django.utils.text import slugify
+from django.utils import timezone
+from django.urls import reverse
 from .static_backend import PublicMediaStorage, PrivateMediaStorage
+from .cache import TOKEN_DENYLIST, USER_NOTIFICATIONS, bump
+
+
+class UserQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        if not any(field in kwargs for field in User.TOKEN_FIELDS):
+            return super().update(**kwargs)
+        # Bulk updates skip the save signal, so they revoke the tokens here
+        with transaction.atomic(using=self.db):
+            user_ids = list(self.values_list('pk', flat=True))
+            updated = super().update(**kwargs)
+            TokenRevocation.objects.revoke_users(user_ids)
+        return updated
+
 
 class UserManager(BaseUserManager):
     use_in_migrations = True
 
+    def get_queryset(self):
+        return UserQuerySet(self.model, using=self._db)
+
     def create_user(self, email, password=None, **extra_fields):
         if not email:
             raise ValueError("The Email field must be set")
@@ -53,6 +75,7 @@ class User(AbstractUser):
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = []
+    TOKEN_FIELDS = ('password', 'is_active', 'email', 'role')  # What a token vouches for
 
     objects = UserManager()
 
@@ -71,6 +94,62 @@ class User(AbstractUser):
     def is_admin(self):
         return self.role == self.Role.ADMIN
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets a save that changes what tokens vouch for revoke them
+        instance._loaded_token_fields = instance.token_fields()
+        return instance
+
+    def token_fields(self):
+        return tuple(self.__dict__.get(field) for field in self.TOKEN_FIELDS)
+
+
+class ClaimsUser(User):
+    """
+    User built from the claims of a verified access token, without a query.
+    Only id, email and role are set, reading any other field loads the row.
+    """
+    class Meta:
+        proxy = True
+
+    @classmethod
+    def from_claims(cls, user_id, email, role):
+        return cls.from_db(None, ['id', 'email', 'role'], [user_id, email, role])
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        # A deferred field was read, load the whole row once rather than field by field
+        deferred = self.get_deferred_fields()
+        if fields and set(fields) <= deferred:
+            fields = list(deferred)
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+
+
+class TokenRevocationManager(models.Manager):
+    def revoke_users(self, user_ids):
+        """Revoke every access token issued to the users so far"""
+        now = timezone.now()
+        expires_at = now + settings.SIMPLE_JWT['ACCESS_TOKEN_LIFETIME']
+        self.filter(expires_at__lte=now).delete()
+        self.bulk_create([self.model(user_id=user_id, expires_at=expires_at) for user_id in user_ids])
+        bump(TOKEN_DENYLIST)
+
+
+class TokenRevocation(BaseModel):
+    """
+    Revoked access tokens, either one token by ``jti`` or every token of the
+    user issued before ``created_at``. Rows are only needed until the tokens
+    they revoke expire.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='token_revocations')
+    jti = models.CharField(max_length=255, blank=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    objects = TokenRevocationManager()
+
+    def __str__(self):
+        return f"{self.user_id}: {self.jti or 'all tokens'} until {self.expires_at:%Y-%m-%d %H:%M}"
+
 
 class CandidateProfile(BaseModel):
     class Gender(models.TextChoices):
@@ -406,6 +485,8 @@ class JobPosting(BaseModel):
             models.Index(fields=['status', 'is_active']),
             models.Index(fields=['job_type', 'experience_level']),
             models.Index(fields=['city', 'country']),
+            # Keyset pagination of the public job board
+            models.Index(fields=['status', '-posted_at', '-id']),
         ]
 
 
@@ -414,6 +495,20 @@ class JobPosting(BaseModel):
             if self.salary_max < self.salary_min:
                 raise ValidationError("Maximum salary cannot be less than minimum salary.")
 
+    def save(self, *args, **kwargs):
+        # Active jobs are always ordered by posted_at on the job board
+        if self.status == self.Status.ACTIVE and not self.posted_at:
+            self.posted_at = timezone.now()
+            # Read by post_save receivers that notify candidates about new jobs
+            self._published = True
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'posted_at'}
+        super().save(*args, **kwargs)
+
+    def get_absolute_url(self):
+        return reverse('jobs-detail', args=[self.pk])
+
     def __str__(self):
         return f"{self.title} - {self.employer.company_name}"
 
@@ -433,6 +528,25 @@ class JobSkill(BaseModel):
         return f"{self.job.title} - {self.skill.name} ({req_type})"
 
 
+class JobSearchDocument(BaseModel):
+    """
+    Denormalized full-text document for a job posting, rebuilt by core.search.
+    The full-text index itself (FTS5 on SQLite, tsvector on Postgres) lives
+    next to this table and is created in migrations.
+    """
+    job = models.OneToOneField(JobPosting, on_delete=models.CASCADE, related_name='search_document')
+    title = models.CharField(max_length=200)
+    body = models.TextField(blank=True)
+    skills = models.TextField(blank=True)
+
+    class Meta:
+        verbose_name = 'Job Search Document'
+        verbose_name_plural = 'Job Search Documents'
+
+    def __str__(self):
+        return f"Search document for {self.job_id}"
+
+
 # ==================== APPLICATION MODELS ====================
 
 class Application(BaseModel):
@@ -469,20 +583,82 @@ class Application(BaseModel):
         unique_together = ['job', 'candidate']
         indexes = [
             models.Index(fields=['status', 'is_active']),
-            models.Index(fields=['job', 'status']),
+            # Employer pipeline counts and its columns, newest applicant first
+            models.Index(fields=['job', 'status', 'is_active', '-applied_at', '-id']),
         ]
 
     def __str__(self):
         return f"{self.candidate.user.get_full_name()} -> {self.job.title}"
 
-    def save(self, *args, **kwargs):
-        is_new = self.pk is None
-        super().save(*args, **kwargs)
-        
-        # Update job application count
-        if is_new:
-            self.job.applications_count = self.job.applications.filter(is_active=True).count()
-            self.job.save(update_fields=['applications_count'])
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets a save that withdraws or deactivates the application adjust the job's count
+        if 'is_active' in instance.__dict__ and 'is_withdrawn' in instance.__dict__:
+            instance._loaded_counted = instance.is_counted
+        return instance
+
+    @property
+    def is_counted(self):
+        """Whether the application counts towards the job's applications_count"""
+        return self.is_active and not self.is_withdrawn
+
+
+class ApplicationCounterManager(models.Manager):
+    def add(self, job_id, delta):
+        """Add ``delta`` to a random shard of the job, so concurrent applies rarely update the same row"""
+        if not delta:
+            return
+        shard = random.randrange(settings.APPLICATION_COUNTER_SHARDS)
+        self.bulk_create([self.model(job_id=job_id, shard=shard)], ignore_conflicts=True)
+        self.filter(job_id=job_id, shard=shard).update(delta=models.F('delta') + delta, updated_at=timezone.now())
+
+    def pending(self, job_id):
+        """Applications added to the job since its shards were last folded"""
+        return self.filter(job_id=job_id).aggregate(total=models.Sum('delta'))['total'] or 0
+
+    def fold(self, job_id, recount=False):
+        """
+        Move the job's shards into JobPosting.applications_count, returns the
+        change to the count. ``recount`` counts the applications instead, to
+        repair drift, and is best run while the job takes no applications.
+        """
+        with transaction.atomic(using=self.db):
+            # Locked shards make concurrent adds wait for the fold to commit
+            shards = list(self.select_for_update().filter(job_id=job_id).values_list('id', 'delta'))
+            self.filter(id__in=[shard_id for shard_id, delta in shards if delta]).update(
+                delta=0, updated_at=timezone.now()
+            )
+            if recount:
+                job = JobPosting.objects.select_for_update().only('applications_count').get(pk=job_id)
+                count = Application.objects.filter(job_id=job_id, is_active=True, is_withdrawn=False).count()
+                change = count - job.applications_count
+            else:
+                change = sum(delta for _, delta in shards)
+            if change:
+                JobPosting.objects.filter(pk=job_id).update(applications_count=models.F('applications_count') + change)
+        return change
+
+
+class ApplicationCounterShard(BaseModel):
+    """
+    Part of the change to a job's applications_count not yet folded into
+    it. Applies spread over APPLICATION_COUNTER_SHARDS rows instead of all
+    writing the job row; fold_application_counts folds them back.
+    """
+    job = models.ForeignKey(JobPosting, on_delete=models.CASCADE, related_name='application_counter_shards')
+    shard = models.PositiveSmallIntegerField()
+    delta = models.IntegerField(default=0)
+
+    objects = ApplicationCounterManager()
+
+    class Meta:
+        verbose_name = 'Application Counter Shard'
+        verbose_name_plural = 'Application Counter Shards'
+        unique_together = ['job', 'shard']
+
+    def __str__(self):
+        return f"Job {self.job_id} shard {self.shard}: {self.delta:+d}"
 
 
 class ApplicationStatusHistory(BaseModel):
@@ -543,15 +719,99 @@ class JobAlert(BaseModel):
     salary_min = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     is_remote = models.BooleanField(default=False)
     frequency = models.CharField(max_length=20, choices=Frequency.choices, default=Frequency.DAILY)
+    # End of the posting window covered by the last digest
+    last_sent_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         verbose_name = 'Job Alert'
         verbose_name_plural = 'Job Alerts'
         ordering = ['-created_at']
+        indexes = [
+            # Digest runs walk the candidates of one frequency in id order
+            models.Index(fields=['frequency', 'candidate']),
+        ]
 
     def __str__(self):
         return f"{self.candidate.user.get_full_name()} - {self.alert_name}"
 
+
+class AlertDigestRun(BaseModel):
+    """Progress of a digest run, so a crashed run resumes where it stopped"""
+    frequency = models.CharField(max_length=20, choices=JobAlert.Frequency.choices)
+    window_end = models.DateTimeField()
+    last_candidate_id = models.BigIntegerField(default=0)
+    candidates_processed = models.IntegerField(default=0)
+    emails_queued = models.IntegerField(default=0)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-window_end']
+
+    def __str__(self):
+        return f"{self.frequency} digest until {self.window_end:%Y-%m-%d %H:%M}"
+
+
+class JobNotificationManager(models.Manager):
+    def create_missing(self, job, candidate_ids, chunk_size=5000):
+        """
+        Insert a notification of ``job`` for every candidate that doesn't
+        have one yet. Returns the ids of the candidates that got a new row,
+        so only they are emailed.
+        """
+        pairs = [(candidate_id, job.pk) for candidate_id in candidate_ids]
+        return [candidate_id for candidate_id, _ in self.create_missing_pairs(pairs, chunk_size)]
+
+    def create_missing_pairs(self, pairs, chunk_size=5000):
+        """
+        Insert a notification for every ``(candidate_id, job_posting_id)``
+        pair that doesn't have one yet, ``chunk_size`` rows per statement.
+        Returns the pairs that were inserted.
+        """
+        pairs = list(pairs)
+        connection = connections[self.db]
+        if connection.vendor not in ('sqlite', 'postgresql') or not connection.features.can_return_rows_from_bulk_insert:
+            return self._create_missing_fallback(pairs, chunk_size)
+
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        now = timezone.now()
+        created = []
+        with connection.cursor() as cursor:
+            for start in range(0, len(pairs), chunk_size):
+                chunk = pairs[start:start + chunk_size]
+                # The WHERE clause stops SQLite reading ON CONFLICT as a join constraint
+                cursor.execute(
+                    f"INSERT INTO {table} "
+                    f"(created_at, updated_at, is_active, sent_at, candidate_id, job_posting_id) "
+                    f"SELECT %s, %s, %s, %s, column1, column2 "
+                    f"FROM (VALUES {', '.join(['(%s, %s)'] * len(chunk))}) AS pairs "
+                    f"WHERE true "
+                    f"ON CONFLICT (candidate_id, job_posting_id) DO NOTHING "
+                    f"RETURNING candidate_id, job_posting_id",
+                    [now, now, True, now, *(value for pair in chunk for value in pair)],
+                )
+                created.extend(tuple(row) for row in cursor.fetchall())
+        return created
+
+    def _create_missing_fallback(self, pairs, chunk_size):
+        """Backends without ON CONFLICT ... RETURNING, concurrent writers can race here"""
+        created = []
+        for start in range(0, len(pairs), chunk_size):
+            chunk = pairs[start:start + chunk_size]
+            existing = set(
+                self.filter(
+                    candidate_id__in={candidate_id for candidate_id, _ in chunk},
+                    job_posting_id__in={job_id for _, job_id in chunk},
+                ).values_list('candidate_id', 'job_posting_id')
+            )
+            new = [pair for pair in chunk if pair not in existing]
+            self.bulk_create(
+                [self.model(candidate_id=candidate_id, job_posting_id=job_id) for candidate_id, job_id in new],
+                ignore_conflicts=True,
+            )
+            created.extend(new)
+        return created
+
+
 class JobNotification(BaseModel):
     """Track which job postings have been sent to which candidates"""
     candidate = models.ForeignKey(
@@ -566,6 +826,8 @@ class JobNotification(BaseModel):
     )
     sent_at = models.DateTimeField(auto_now_add=True)
     read_at = models.DateTimeField(null=True, blank=True)
+
+    objects = JobNotificationManager()
     
     class Meta:
         verbose_name = 'Job Notification'
@@ -599,6 +861,59 @@ class CompanyReview(BaseModel):
         return f"{self.company.company_name} - {self.rating} stars"
 
 
+class NotificationCounterManager(models.Manager):
+    def add(self, deltas):
+        """Apply ``{user_id: delta}`` to the users' unread counters"""
+        for user_id, delta in deltas.items():
+            if not delta:
+                continue
+            if delta > 0:
+                # First notification of the user, a concurrent insert is fine
+                self.bulk_create([self.model(user_id=user_id)], ignore_conflicts=True)
+            self.filter(user_id=user_id).update(unread=models.F('unread') + delta, updated_at=timezone.now())
+
+    def unread(self, user_id):
+        unread = self.filter(user_id=user_id).values_list('unread', flat=True).first()
+        return max(unread or 0, 0)
+
+
+class NotificationCounter(BaseModel):
+    """
+    Unread notifications of a user, kept in step with Notification so the
+    unread badge is a primary key lookup. reconcile_notification_counters
+    repairs any drift.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='notification_counter')
+    unread = models.IntegerField(default=0)
+
+    objects = NotificationCounterManager()
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread} unread"
+
+
+class NotificationQuerySet(models.QuerySet):
+    def mark_read(self, user_id=None):
+        """
+        Mark the unread notifications read, returns how many were. Pass the
+        ``user_id`` when they all belong to one user to skip looking it up.
+        """
+        total = 0
+        if user_id is not None:
+            user_ids = [user_id]
+        else:
+            user_ids = list(self.filter(is_read=False).values_list('user_id', flat=True).distinct())
+        for user_id in user_ids:
+            with transaction.atomic(using=self.db):
+                # Only rows this update flips count, concurrent reads can't decrement twice
+                count = self.filter(user_id=user_id, is_read=False).update(is_read=True, read_at=timezone.now())
+                NotificationCounter.objects.add({user_id: -count})
+            # update() skips the post_save receivers
+            bump(USER_NOTIFICATIONS, user_id)
+            total += count
+        return total
+
+
 class Notification(BaseModel):
     class NotificationType(models.TextChoices):
         APPLICATION_STATUS = 'APPLICATION_STATUS', _('Application Status Update')
@@ -621,19 +936,64 @@ class Notification(BaseModel):
     is_read = models.BooleanField(default=False)
     read_at = models.DateTimeField(null=True, blank=True)
 
+    objects = NotificationQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Notification'
         verbose_name_plural = 'Notifications'
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['user', 'is_read']),
+            models.Index(fields=['user', '-created_at', '-id']),
         ]
 
     def __str__(self):
         return f"{self.user.email} - {self.title}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets a save that flips is_read adjust the unread counter
+        instance._loaded_is_read = instance.__dict__.get('is_read')
+        return instance
+
     def mark_as_read(self):
         if not self.is_read:
-            self.is_read = True
-            self.read_at = models.functions.Now()
-            self.save(update_fields=['is_read', 'read_at'])
\ No newline at end of file
+            Notification.objects.filter(pk=self.pk).mark_read()
+            self.refresh_from_db(fields=['is_read', 'read_at'])
+            self._loaded_is_read = self.is_read
+
+
+class Task(BaseModel):
+    """A unit of background work, claimed and run by the run_worker command"""
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', _('Pending')
+        RUNNING = 'RUNNING', _('Running')
+        SUCCEEDED = 'SUCCEEDED', _('Succeeded')
+        FAILED = 'FAILED', _('Failed')
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+
+    # Retries
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+
+    # Lease held by the worker running the task
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Task'
+        verbose_name_plural = 'Tasks'
+        ordering = ['run_at']
+        indexes = [
+            models.Index(fields=['status', 'run_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
@@ -0,0 +1,127 @@
+import base64
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over a descending (field, id) ordering.
+
+    The cursor holds the (field, id) pair of the last row of the previous page,
+    so every page is a single index range scan no matter how deep the client
+    goes. The ordering field must not be NULL for paginated rows.
+    """
+    ordering_field = 'created_at'
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        field = self.ordering_field
+
+        queryset = queryset.order_by(f'-{field}', '-id')
+
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            value, pk = cursor
+            # The redundant upper bound lets the planner seek into the index
+            queryset = queryset.filter(
+                Q(**{f'{field}__lt': value}) | Q(**{field: value, 'id__lt': pk}),
+                **{f'{field}__lte': value},
+            )
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.next_position = self.get_position(rows[-1]) if self.has_next else None
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_position(self, obj):
+        return getattr(obj, self.ordering_field), obj.pk
+
+    def encode_cursor(self, position):
+        value, pk = position
+        if hasattr(value, 'isoformat'):
+            # Keep full microsecond precision, the cursor must match exactly
+            value = value.isoformat()
+        raw = json.dumps([value, pk])
+        return base64.urlsafe_b64encode(raw.encode('ascii')).decode('ascii')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            value, pk = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            value = self.parse_value(value)
+            # A bool is an int to Python but never a primary key
+            if value is None or type(pk) is not int:
+                raise ValueError
+            return value, pk
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def parse_value(self, value):
+        """The ordering field's value from the cursor, None if it isn't one"""
+        return parse_datetime(value)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class JobCursorPagination(KeysetPagination):
+    """Newest-first pagination for the public job board"""
+    ordering_field = 'posted_at'
+
+
+class NotificationCursorPagination(KeysetPagination):
+    """Newest-first pagination of a user's notifications"""
+    ordering_field = 'created_at'
+
+
+class ApplicationCursorPagination(KeysetPagination):
+    """Newest-first pagination of one column of an employer's pipeline"""
+    ordering_field = 'applied_at'
+    page_size = 10
+
+    def get_position(self, row):
+        # Columns are paged as values() rows
+        return row[self.ordering_field], row['id']
@@ -0,0 +1,218 @@
+"""
+Database backed task queue.
+
+Handlers are registered with ``@task`` and enqueued with ``enqueue`` once the
+surrounding transaction commits, so no broker is needed and a task never
+runs against rows that were rolled back. The ``run_worker`` management
+command claims due tasks, runs them on a thread pool and retries failures
+with exponential backoff.
+"""
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+BACKOFF_BASE = 5  # seconds
+BACKOFF_MAX = 60 * 60
+LEASE_TIMEOUT = timedelta(minutes=10)
+
+_registry = {}
+
+
+def task(name=None, max_attempts=5):
+    """Register a function as a task handler, it receives the payload as kwargs"""
+    def decorator(func):
+        task_name = name or f'{func.__module__}.{func.__name__}'
+        _registry[task_name] = (func, max_attempts)
+        func.task_name = task_name
+        return func
+    return decorator
+
+
+def get_handler(name):
+    try:
+        return _registry[name]
+    except KeyError:
+        raise LookupError(f'No task handler registered as {name!r}')
+
+
+def enqueue(func_or_name, delay=None, **payload):
+    """
+    Queue a task once the current transaction commits. Payload values must be
+    JSON serializable, pass ids rather than model instances.
+    """
+    name = getattr(func_or_name, 'task_name', func_or_name)
+    func, max_attempts = get_handler(name)
+
+    if getattr(settings, 'TASK_QUEUE_EAGER', False):
+        transaction.on_commit(lambda: func(**payload))
+        return
+
+    run_at = timezone.now() + delay if delay else None
+
+    def create():
+        Task.objects.create(
+            name=name,
+            payload=payload,
+            max_attempts=max_attempts,
+            **({'run_at': run_at} if run_at else {}),
+        )
+
+    transaction.on_commit(create)
+
+
+def enqueue_many(func_or_name, payloads):
+    """Queue one task per payload with a single INSERT once the transaction commits"""
+    name = getattr(func_or_name, 'task_name', func_or_name)
+    func, max_attempts = get_handler(name)
+    payloads = list(payloads)
+
+    if getattr(settings, 'TASK_QUEUE_EAGER', False):
+        transaction.on_commit(lambda: [func(**payload) for payload in payloads])
+        return
+
+    transaction.on_commit(lambda: Task.objects.bulk_create(
+        [Task(name=name, payload=payload, max_attempts=max_attempts) for payload in payloads],
+        batch_size=500,
+    ))
+
+
+def backoff(attempts):
+    """Seconds to wait before the next attempt, exponential with jitter"""
+    delay = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+    return delay + random.uniform(0, delay / 4)
+
+
+def claim(worker_id, limit):
+    """Atomically lease up to ``limit`` due tasks to ``worker_id``"""
+    now = timezone.now()
+    due = Task.objects.filter(status=Task.Status.PENDING, run_at__lte=now).order_by('run_at', 'id')
+    lease = {
+        'status': Task.Status.RUNNING,
+        'locked_by': worker_id,
+        'locked_at': now,
+        'attempts': F('attempts') + 1,
+    }
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(due.select_for_update(skip_locked=True).values_list('id', flat=True)[:limit])
+            Task.objects.filter(id__in=ids).update(**lease)
+    else:
+        # No row locks (SQLite): take each row with a conditional UPDATE
+        ids = []
+        for task_id in due.values_list('id', flat=True)[:limit * 2]:
+            if Task.objects.filter(id=task_id, status=Task.Status.PENDING).update(**lease):
+                ids.append(task_id)
+                if len(ids) == limit:
+                    break
+
+    return list(Task.objects.filter(id__in=ids).order_by('run_at', 'id'))
+
+
+def release_expired_leases():
+    """Put tasks back in the queue when their worker died mid-run"""
+    expired = Task.objects.filter(
+        status=Task.Status.RUNNING,
+        locked_at__lt=timezone.now() - LEASE_TIMEOUT,
+    )
+    return expired.update(status=Task.Status.PENDING, locked_by='', locked_at=None)
+
+
+def run_task(task_obj):
+    """Run a claimed task and record its outcome"""
+    try:
+        func, _ = get_handler(task_obj.name)
+        func(**task_obj.payload)
+    except Exception as e:
+        logger.exception(f"Task {task_obj.id} ({task_obj.name}) failed on attempt {task_obj.attempts}")
+        update = {'last_error': f'{type(e).__name__}: {e}', 'locked_by': '', 'locked_at': None}
+        if task_obj.attempts >= task_obj.max_attempts:
+            update.update(status=Task.Status.FAILED, finished_at=timezone.now())
+        else:
+            update.update(
+                status=Task.Status.PENDING,
+                run_at=timezone.now() + timedelta(seconds=backoff(task_obj.attempts)),
+            )
+        Task.objects.filter(id=task_obj.id).update(**update)
+        return False
+
+    Task.objects.filter(id=task_obj.id).update(
+        status=Task.Status.SUCCEEDED, finished_at=timezone.now(), locked_by='', locked_at=None
+    )
+    return True
+
+
+def run_pending(limit=100, worker_id='inline'):
+    """Run due tasks in the calling thread, mostly useful in tests and scripts"""
+    processed = 0
+    while processed < limit:
+        tasks = claim(worker_id, min(10, limit - processed))
+        if not tasks:
+            break
+        for task_obj in tasks:
+            run_task(task_obj)
+        processed += len(tasks)
+    return processed
+
+
+class Worker:
+    """Claims due tasks and runs them on a bounded thread pool"""
+
+    def __init__(self, concurrency=4, poll_interval=1.0):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        self.stopping = threading.Event()
+        self.slots = threading.BoundedSemaphore(concurrency)
+
+    def stop(self, *args):
+        self.stopping.set()
+
+    def _run(self, task_obj):
+        try:
+            run_task(task_obj)
+        finally:
+            # Every pool thread holds its own connection
+            connection.close()
+            self.slots.release()
+
+    def run(self, burst=False):
+        """Process tasks until stopped, or until the queue is empty when ``burst``"""
+        logger.info(f"Worker {self.worker_id} started with concurrency {self.concurrency}")
+        last_lease_check = 0
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='task-worker') as pool:
+            while not self.stopping.is_set():
+                if time.monotonic() - last_lease_check > LEASE_TIMEOUT.total_seconds() / 2:
+                    release_expired_leases()
+                    last_lease_check = time.monotonic()
+
+                close_old_connections()
+                free = 0
+                while self.slots.acquire(blocking=False):
+                    free += 1
+                tasks = claim(self.worker_id, free) if free else []
+                for _ in range(free - len(tasks)):
+                    self.slots.release()
+
+                for task_obj in tasks:
+                    pool.submit(self._run, task_obj)
+
+                if not tasks:
+                    if burst and free == self.concurrency:
+                        break
+                    self.stopping.wait(self.poll_interval)
+        logger.info(f"Worker {self.worker_id} stopped")
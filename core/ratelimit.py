@@ -0,0 +1,57 @@
+"""
+Token bucket used to keep outbound work under a provider's rate limits.
+"""
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Allows ``rate`` tokens per second with bursts of up to ``capacity``.
+    A rate of 0 or None disables the limit. Safe to share between threads.
+    """
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate or 0
+        self.capacity = capacity or self.rate
+        self.tokens = self.capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, tokens=1):
+        """Take ``tokens`` if they are available right now"""
+        if not self.rate:
+            return True
+        with self._lock:
+            self._refill()
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1):
+        """
+        Block until ``tokens`` are available and take them. Requests larger
+        than the capacity are let through once the bucket is full, then
+        leave it in debt so the average rate still holds.
+        """
+        if not self.rate:
+            return 0
+        waited = 0
+        while True:
+            with self._lock:
+                self._refill()
+                needed = min(tokens, self.capacity)
+                if self.tokens >= needed:
+                    self.tokens -= tokens
+                    return waited
+                delay = (needed - self.tokens) / self.rate
+            self.sleep(delay)
+            waited += delay
@@ -0,0 +1,225 @@
+"""
+Real-time notification push.
+
+New ``Notification`` rows are published to a broker once their transaction
+commits, and every Server-Sent Events stream of the notification's user
+writes them out (see ``views.notification_stream``).
+
+``InMemoryBroker`` fans out within one process, so it misses notifications
+created by ``run_worker`` and only suits tests. ``RedisBroker`` publishes
+on a Redis channel and each web process relays what it receives to its own
+streams, so a notification created by ``run_worker`` reaches a user
+connected to any worker. Without Redis, ``DatabaseBroker`` gets there by
+having each web process poll the notifications table instead.
+
+Streams are held open by an asyncio task each, so serve them from the ASGI
+application in ``jobboard/asgi.py``; under WSGI every open stream ties up a
+thread.
+"""
+import asyncio
+import functools
+import json
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, connection
+from django.utils.module_loading import import_string
+
+from .models import Notification
+from .serializer import NotificationSerializer
+
+logger = logging.getLogger(__name__)
+
+# Events buffered per stream before the client is made to reconnect and replay
+QUEUE_SIZE = 100
+
+
+class Subscription:
+    """Queue of one stream, fed from any thread"""
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.overflowed = False
+
+    def put(self, message):
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            pass  # The stream's loop is gone
+
+    def _put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Too slow a reader, it catches up from the database on reconnect
+            self.overflowed = True
+
+    async def get(self, timeout):
+        """Next message, None when the stream should end"""
+        if self.overflowed:
+            return None
+        message = await asyncio.wait_for(self.queue.get(), timeout)
+        return None if self.overflowed else message
+
+
+class InMemoryBroker:
+    def __init__(self):
+        self._subscriptions = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        """Call from the stream's event loop"""
+        subscription = Subscription(user_id)
+        with self._lock:
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self._subscriptions.pop(subscription.user_id, None)
+
+    def subscriber_count(self, user_id=None):
+        with self._lock:
+            if user_id is not None:
+                return len(self._subscriptions.get(user_id, ()))
+            return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+
+    def publish(self, user_id, message):
+        self.deliver(user_id, message)
+
+    def deliver(self, user_id, message):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            subscription.put(message)
+
+
+class RedisBroker(InMemoryBroker):
+    """Fans out across processes through Redis pub/sub"""
+
+    def __init__(self, url=None, channel='notifications'):
+        import redis
+
+        super().__init__()
+        self.client = redis.Redis.from_url(url or settings.REDIS_URL)
+        self.channel = channel
+        self._pid = None
+
+    def subscribe(self, user_id):
+        self.ensure_listening()
+        return super().subscribe(user_id)
+
+    def ensure_listening(self):
+        # Only processes with streams listen, and threads don't survive a fork
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                threading.Thread(target=self._listen, name='notification-relay', daemon=True).start()
+
+    def publish(self, user_id, message):
+        try:
+            self.client.publish(self.channel, json.dumps({'user_id': user_id, 'message': message}))
+        except Exception:
+            logger.exception("Failed to publish notification, clients get it when they reconnect")
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for item in pubsub.listen():
+                    data = json.loads(item['data'])
+                    self.deliver(data['user_id'], data['message'])
+            except Exception:
+                logger.exception("Notification relay lost its connection, reconnecting")
+                time.sleep(1)
+
+
+class DatabaseBroker(InMemoryBroker):
+    """
+    Fans out across processes through the notifications table. The rows are
+    committed before they are published, so publishing is a no-op and each
+    process with streams polls for rows newer than the last it looked at.
+    """
+
+    def __init__(self, interval=None):
+        super().__init__()
+        self.interval = interval or settings.NOTIFICATION_POLL_INTERVAL
+        self._pid = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def subscribe(self, user_id):
+        self.ensure_polling()
+        return super().subscribe(user_id)
+
+    def ensure_polling(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._poll, name='notification-poll', daemon=True)
+                self._thread.start()
+
+    def publish(self, user_id, message):
+        pass
+
+    def close(self):
+        """Stop polling and wait for the poll thread to finish"""
+        self._stop.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join()
+
+    def _poll(self):
+        last_id = None
+        while not self._stop.is_set():
+            close_old_connections()
+            try:
+                newest = Notification.objects.order_by('-id').values_list('id', flat=True).first() or 0
+                with self._lock:
+                    user_ids = list(self._subscriptions)
+                if last_id is not None and newest > last_id and user_ids:
+                    # A row committed out of id order is missed, the client replays it on reconnect
+                    notifications = (
+                        Notification.objects
+                        .filter(id__gt=last_id, id__lte=newest, user_id__in=user_ids)
+                        .order_by('id')
+                    )
+                    for notification in notifications:
+                        self.deliver(notification.user_id, notification_message(notification))
+                last_id = newest
+            except Exception:
+                logger.exception("Notification poll failed, retrying")
+            self._stop.wait(self.interval)
+        connection.close()
+
+
+@functools.cache
+def get_broker():
+    return import_string(settings.NOTIFICATION_BROKER)()
+
+
+def notification_message(notification):
+    return json.loads(json.dumps(NotificationSerializer(notification).data, cls=DjangoJSONEncoder))
+
+
+def publish_notifications(notifications):
+    broker = get_broker()
+    for notification in notifications:
+        broker.publish(notification.user_id, notification_message(notification))
+
+
+def format_event(message):
+    return f"id: {message['id']}\nevent: notification\ndata: {json.dumps(message)}\n\n"
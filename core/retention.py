@@ -0,0 +1,132 @@
+"""
+Notification retention.
+
+``coalesce_notifications`` drops repeated notifications, keeping the
+newest of each. ``archive`` moves rows older than the retention age into a
+gzipped JSON lines file and deletes them, a bounded batch per transaction
+with a pause in between, so the hot tables and their indexes stay small
+without long locks or replication lag.
+
+A batch is written and flushed to the archive before it is deleted. A run
+that dies in between leaves the batch in both places, never in neither.
+Deletes skip the per-row signals, the unread counters and notification
+caches of the affected users are adjusted per batch instead.
+"""
+import gzip
+import json
+import logging
+import time
+from collections import Counter
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .cache import USER_NOTIFICATIONS, bump_many
+from .models import JobNotification, Notification, NotificationCounter
+
+logger = logging.getLogger(__name__)
+
+# Notifications are the same when all of these are
+DUPLICATE_FIELDS = ('user_id', 'notification_type', 'title', 'content', 'reference_type', 'reference_id')
+
+
+def delete_rows(model, ids):
+    """Delete rows by id with one statement, without the per-row signals"""
+    if not ids:
+        return 0
+    connection = connections[model.objects.db]
+    table = connection.ops.quote_name(model._meta.db_table)
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE id IN ({placeholders})", ids)
+        return cursor.rowcount
+
+
+def delete_notifications(ids):
+    with transaction.atomic():
+        rows = list(Notification.objects.filter(id__in=ids).values_list('user_id', 'is_read'))
+        unread = Counter(user_id for user_id, is_read in rows if not is_read)
+        deleted = delete_rows(Notification, ids)
+        NotificationCounter.objects.add({user_id: -count for user_id, count in unread.items()})
+    bump_many(USER_NOTIFICATIONS, [user_id for user_id, _ in rows])
+    return deleted
+
+
+def coalesce_notifications(batch_size=1000, pause=0.0):
+    """Delete all but the newest of every set of identical notifications"""
+    groups = (
+        Notification.objects
+        .values(*DUPLICATE_FIELDS)
+        .annotate(keep=Max('id'), copies=Count('id'))
+        .filter(copies__gt=1)
+        .order_by()
+    )
+    removed = 0
+    duplicates = []
+    for group in groups.iterator(chunk_size=batch_size):
+        keep = group.pop('keep')
+        group.pop('copies')
+        duplicates.extend(
+            Notification.objects.filter(**group).exclude(id=keep).values_list('id', flat=True)
+        )
+        while len(duplicates) >= batch_size:
+            removed += delete_notifications(duplicates[:batch_size])
+            duplicates = duplicates[batch_size:]
+            time.sleep(pause)
+    removed += delete_notifications(duplicates)
+    return removed
+
+
+def archive_path(model, directory=None):
+    directory = Path(directory or settings.ARCHIVE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory / f'{model._meta.model_name}-{timezone.now():%Y%m%dT%H%M%S}.jsonl.gz'
+
+
+def archive(queryset, path, batch_size=1000, pause=0.0):
+    """
+    Write the rows of ``queryset`` to ``path`` and delete them, in id order,
+    ``batch_size`` rows at a time. Returns the number of rows archived.
+    """
+    model = queryset.model
+    delete = delete_notifications if model is Notification else lambda ids: delete_rows(model, ids)
+
+    archived = 0
+    last_id = 0
+    with gzip.open(path, 'wt', encoding='utf-8') as archive_file:
+        while True:
+            # Seek past the last batch rather than rescan what was just deleted
+            rows = list(queryset.filter(id__gt=last_id).order_by('id').values()[:batch_size])
+            if not rows:
+                break
+            for row in rows:
+                archive_file.write(json.dumps(row, cls=DjangoJSONEncoder) + '\n')
+            archive_file.flush()
+
+            ids = [row['id'] for row in rows]
+            delete(ids)
+            archived += len(rows)
+            last_id = ids[-1]
+            logger.info(f"Archived {archived} {model._meta.verbose_name_plural} to {path}")
+            time.sleep(pause)
+
+    if not archived:
+        path.unlink()
+    return archived
+
+
+def expired_notifications(days=None):
+    cutoff = timezone.now() - timedelta(days=days or settings.NOTIFICATION_RETENTION_DAYS)
+    return Notification.objects.filter(created_at__lt=cutoff)
+
+
+def expired_job_notifications(days=None):
+    # These rows keep a candidate from hearing of a job twice, jobs are only
+    # matched when published and digests look back two periods at most
+    cutoff = timezone.now() - timedelta(days=days or settings.JOB_NOTIFICATION_RETENTION_DAYS)
+    return JobNotification.objects.filter(sent_at__lt=cutoff)
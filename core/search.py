@@ -0,0 +1,199 @@
+"""
+Full-text job search.
+
+Each job posting has a denormalized ``JobSearchDocument`` (title, body and
+skill names) that is rebuilt whenever the job or its skills change. The
+documents are indexed by the database itself, as set up by migration 0017:
+
+* SQLite: an external-content FTS5 table kept in sync by triggers, ranked
+  with the built-in ``bm25()`` function.
+* PostgreSQL: a generated, weighted ``tsvector`` column with a GIN index,
+  ranked with ``ts_rank_cd``.
+
+Other backends fall back to a LIKE prefilter with BM25 scoring in Python.
+"""
+import math
+import re
+from collections import Counter
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .models import JobPosting, JobSearchDocument, JobSkill
+
+FTS_TABLE = 'core_jobsearchdocument_fts'
+
+# Column weights for title, body and skills
+TITLE_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+SKILLS_WEIGHT = 4.0
+
+MAX_QUERY_TERMS = 16
+FALLBACK_CANDIDATES = 1000
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+def build_document(title, description, requirements, responsibilities, skill_names):
+    """Flatten job fields into the (title, body, skills) search columns"""
+    body_parts = [description or '']
+    for items in (requirements, responsibilities):
+        if isinstance(items, (list, tuple)):
+            body_parts.extend(str(item) for item in items if item)
+        elif items:
+            body_parts.append(str(items))
+    return {
+        'title': title or '',
+        'body': '\n'.join(part for part in body_parts if part),
+        'skills': ' '.join(sorted(skill_names)),
+    }
+
+
+def index_job(job_id):
+    """Rebuild the search document of a single job"""
+    job = JobPosting.objects.filter(pk=job_id).only(
+        'id', 'title', 'description', 'requirements', 'responsibilities'
+    ).first()
+    if job is None:
+        return None
+
+    skill_names = JobSkill.objects.filter(job_id=job_id).values_list('skill__name', flat=True)
+    document = build_document(
+        job.title, job.description, job.requirements, job.responsibilities, skill_names
+    )
+    search_document, _ = JobSearchDocument.objects.update_or_create(job_id=job_id, defaults=document)
+    return search_document
+
+
+def schedule_index_job(job_id):
+    """Rebuild the job's document once the current transaction commits"""
+    transaction.on_commit(lambda: index_job(job_id))
+
+
+def rebuild_search_index(chunk_size=1000):
+    """Rebuild every search document from scratch, one chunk of jobs at a time"""
+    count = 0
+    last_id = 0
+    while True:
+        jobs = list(
+            JobPosting.objects.filter(id__gt=last_id).order_by('id')
+            .values_list('id', 'title', 'description', 'requirements', 'responsibilities')[:chunk_size]
+        )
+        if not jobs:
+            return count
+
+        job_ids = [job[0] for job in jobs]
+        skill_names = {}
+        for job_id, name in JobSkill.objects.filter(job_id__in=job_ids).values_list('job_id', 'skill__name'):
+            skill_names.setdefault(job_id, []).append(name)
+
+        with transaction.atomic():
+            JobSearchDocument.objects.filter(job_id__in=job_ids).delete()
+            JobSearchDocument.objects.bulk_create([
+                JobSearchDocument(job_id=job_id, **build_document(
+                    title, description, requirements, responsibilities, skill_names.get(job_id, [])
+                ))
+                for job_id, title, description, requirements, responsibilities in jobs
+            ])
+
+        count += len(jobs)
+        last_id = job_ids[-1]
+
+
+def search_jobs(query, limit=20, offset=0):
+    """
+    Return ``[(job_id, score), ...]`` for active jobs matching every term of
+    ``query``, best match first. Terms are prefix matched.
+    """
+    terms = tokenize(query)[:MAX_QUERY_TERMS]
+    if not terms:
+        return []
+
+    if connection.vendor == 'sqlite':
+        return _search_sqlite(terms, limit, offset)
+    if connection.vendor == 'postgresql':
+        return _search_postgres(terms, limit, offset)
+    return _search_fallback(terms, limit, offset)
+
+
+def _search_sqlite(terms, limit, offset):
+    match = ' '.join(f'"{term}"*' for term in terms)
+    sql = f"""
+        SELECT d.job_id, bm25({FTS_TABLE}, %s, %s, %s) AS rank
+        FROM {FTS_TABLE}
+        JOIN core_jobsearchdocument d ON d.id = {FTS_TABLE}.rowid
+        JOIN core_jobposting j ON j.id = d.job_id
+        WHERE {FTS_TABLE} MATCH %s AND j.status = %s AND j.is_active
+        ORDER BY rank
+        LIMIT %s OFFSET %s
+    """
+    params = [TITLE_WEIGHT, BODY_WEIGHT, SKILLS_WEIGHT, match, JobPosting.Status.ACTIVE, limit, offset]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        # bm25() is lower-is-better, flip it so scores read naturally
+        return [(job_id, -rank) for job_id, rank in cursor.fetchall()]
+
+
+def _search_postgres(terms, limit, offset):
+    tsquery = ' & '.join(f'{term}:*' for term in terms)
+    sql = """
+        SELECT d.job_id, ts_rank_cd(d.search_vector, q, 32) AS rank
+        FROM core_jobsearchdocument d
+        JOIN core_jobposting j ON j.id = d.job_id,
+             to_tsquery('english', %s) q
+        WHERE d.search_vector @@ q AND j.status = %s AND j.is_active
+        ORDER BY rank DESC
+        LIMIT %s OFFSET %s
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [tsquery, JobPosting.Status.ACTIVE, limit, offset])
+        return cursor.fetchall()
+
+
+def _search_fallback(terms, limit, offset, k1=1.2, b=0.75):
+    """LIKE prefilter, then Okapi BM25 over the candidate documents"""
+    documents = JobSearchDocument.objects.filter(
+        job__status=JobPosting.Status.ACTIVE, job__is_active=True
+    )
+    for term in terms:
+        documents = documents.filter(
+            Q(title__icontains=term) | Q(body__icontains=term) | Q(skills__icontains=term)
+        )
+    candidates = list(documents.values_list('job_id', 'title', 'body', 'skills')[:FALLBACK_CANDIDATES])
+    if not candidates:
+        return []
+
+    weights = (TITLE_WEIGHT, BODY_WEIGHT, SKILLS_WEIGHT)
+    tokenized = []
+    for job_id, *columns in candidates:
+        counts = Counter()
+        for weight, column in zip(weights, columns):
+            for token in tokenize(column):
+                counts[token] += weight
+        tokenized.append((job_id, counts, sum(counts.values())))
+
+    avg_length = sum(length for _, _, length in tokenized) / len(tokenized) or 1.0
+    total = len(tokenized)
+    document_frequency = {
+        term: sum(1 for _, counts, _ in tokenized if any(t.startswith(term) for t in counts))
+        for term in terms
+    }
+
+    scored = []
+    for job_id, counts, length in tokenized:
+        score = 0.0
+        for term in terms:
+            frequency = sum(value for token, value in counts.items() if token.startswith(term))
+            if not frequency:
+                continue
+            df = document_frequency[term]
+            idf = math.log(1 + (total - df + 0.5) / (df + 0.5))
+            score += idf * frequency * (k1 + 1) / (frequency + k1 * (1 - b + b * length / avg_length))
+        scored.append((job_id, score))
+
+    scored.sort(key=lambda hit: hit[1], reverse=True)
+    return scored[offset:offset + limit]
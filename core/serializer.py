@@ -1,8 +1,7 @@
 from rest_framework import serializers
 from rest_framework_simplejwt.tokens import RefreshToken
-from django.contrib.auth import authenticate
 from django.utils import timezone
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from .models import (
     User, Application, JobPosting, CandidateProfile, 
     EmployerProfile, CandidateSkill, Education, 
@@ -10,6 +9,7 @@ from .models import (
     CompanyReview, JobSkill, Category
 )
 import os
+from .hashing import hash_password, login_admission, verify_credentials
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -29,12 +29,12 @@ class LoginSerializer(serializers.ModelSerializer):
         email = attrs.get('email')
         password = attrs.get('password')
 
-        # auhenticate user
-        user = authenticate(
-            request = self.context.get('request'),
-            username=email,
-            password=password
-        )
+        request = self.context.get('request')
+        if request is not None:
+            login_admission(request, email)
+
+        # authenticate user, the hash runs on the bounded hashing pool
+        user = verify_credentials(email, password)
 
         if not user:
             raise serializers.ValidationError({'detail': 'Invalid credentials'}, code=400)
@@ -42,6 +42,10 @@ class LoginSerializer(serializers.ModelSerializer):
         if not user.is_active:
             raise serializers.ValidationError({'detail': 'User is not active'}, code=400)
 
+        return {'user': user, **self.issue_tokens(user)}
+
+    @staticmethod
+    def issue_tokens(user):
         # generate JWT tokens
         refresh = RefreshToken.for_user(user)
 
@@ -49,7 +53,6 @@ class LoginSerializer(serializers.ModelSerializer):
         refresh['role'] = user.role
 
         return {
-            'user': user,
             'refresh': str(refresh),
             'access': str(refresh.access_token),
         }
@@ -73,7 +76,7 @@ class RegisterSerializer(serializers.ModelSerializer):
         # pop confirm_password from validated_data
         password = validated_data.pop('confirm_password')
         user = User(**validated_data)
-        user.set_password(password) # hash password
+        user.password = hash_password(password)
         user.save()
         return user
 
@@ -128,11 +131,16 @@ class ApplyJobSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         job = self.context.get('job')
         candidate_profile = self.context.get('request').user.candidate
-        return Application.objects.create(
-            job=job,
-            candidate=candidate_profile,
-            **validated_data
-        )
+        try:
+            with transaction.atomic():
+                return Application.objects.create(
+                    job=job,
+                    candidate=candidate_profile,
+                    **validated_data
+                )
+        except IntegrityError:
+            # A concurrent apply got past the duplicate check first
+            raise serializers.ValidationError("You have already applied for this job")
 
 
 class SkillSerializer(serializers.ModelSerializer):
@@ -146,6 +154,7 @@ class JobSkillSerializer(serializers.ModelSerializer):
     """Serializer for job skills"""
     skill = SkillSerializer(read_only=True)
     skill_id = serializers.IntegerField(write_only=True)
+    minimum_experience = serializers.IntegerField(source='minimum_years', required=False, allow_null=True)
     
     class Meta:
         model = JobSkill
@@ -170,7 +179,7 @@ class JobPostingSerializer(serializers.ModelSerializer):
     
     # Nested fields for read
     categories = CategorySerializer(many=True, read_only=True)
-    required_skills = JobSkillSerializer(many=True, read_only=True, source='jobskill_set')
+    required_skills = JobSkillSerializer(many=True, read_only=True, source='job_skills')
     
     # Write-only fields for creating/updating
     category_ids = serializers.ListField(
@@ -269,7 +278,7 @@ class JobPostingSerializer(serializers.ModelSerializer):
                 job=job_posting,
                 skill_id=skill_data['skill_id'],
                 is_required=skill_data.get('is_required', True),
-                minimum_experience=skill_data.get('minimum_experience', 0)
+                minimum_years=skill_data.get('minimum_years')
             )
         
         return job_posting
@@ -302,12 +311,48 @@ class JobPostingSerializer(serializers.ModelSerializer):
                     job=instance,
                     skill_id=skill_data['skill_id'],
                     is_required=skill_data.get('is_required', True),
-                    minimum_experience=skill_data.get('minimum_experience', 0)
+                    minimum_years=skill_data.get('minimum_years')
                 )
         
         return instance
 
 
+class JobListSerializer(serializers.ModelSerializer):
+    """Serializer for job cards on the job board (read only)"""
+    employer = serializers.SerializerMethodField()
+
+    class Meta:
+        model = JobPosting
+        fields = [
+            'id', 'title', 'employer',
+            'employment_type', 'job_type', 'experience_level',
+            # Location
+            'location', 'city', 'state', 'country',
+            # Salary
+            'salary_min', 'salary_max', 'currency', 'is_salary_disclosed',
+            # Dates & metrics
+            'status', 'posted_at', 'application_deadline', 'applications_count',
+        ]
+        read_only_fields = fields
+
+    # Columns the list query has to load, keep in sync with Meta.fields
+    load_fields = [
+        'id', 'title', 'employment_type', 'job_type', 'experience_level',
+        'location', 'city', 'state', 'country',
+        'salary_min', 'salary_max', 'currency', 'is_salary_disclosed',
+        'status', 'posted_at', 'application_deadline', 'applications_count',
+        'employer__id', 'employer__company_name', 'employer__logo',
+    ]
+
+    def get_employer(self, obj):
+        """Get employer card information"""
+        return {
+            'id': obj.employer.id,
+            'company_name': obj.employer.company_name,
+            'logo': obj.employer.logo.url if obj.employer.logo else None,
+        }
+
+
 class GetJobSerializer(serializers.ModelSerializer):
     """Serializer for job (read only)"""
     # Employer info
@@ -315,7 +360,7 @@ class GetJobSerializer(serializers.ModelSerializer):
     
     # Nested fields
     categories = CategorySerializer(many=True, read_only=True)
-    required_skills = JobSkillSerializer(many=True, read_only=True, source='jobskill_set')
+    required_skills = JobSkillSerializer(many=True, read_only=True, source='job_skills')
     
     # Location display
     location_display = serializers.SerializerMethodField()
@@ -1,8 +1,46 @@
+from django.db import connections, transaction
+from django.db.models import Count
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from rest_framework.exceptions import NotFound
+from . import tasks
+from .cache import APPLICATION, USER_APPLICATIONS, bump, bump_many
 from .models import (
-    Application, Notification, SavedJob, 
-    CandidateProfile, EmployerProfile, CompanyReview
+    Application, ApplicationStatusHistory, Notification, SavedJob, 
+    CandidateProfile, EmployerProfile, CompanyReview, NotificationCounter, JobPosting
 )
+from .queue import enqueue
+
+
+# Columns read per UNION ALL, SQLite allows 500 terms in a compound SELECT
+PIPELINE_UNION_SIZE = 400
+# Applicants fetched per query, kept under SQLite's 32766 bound parameters
+PIPELINE_FETCH_SIZE = 5000
+
+
+def latest_application_ids(columns, per_column):
+    """
+    Ids of the newest ``per_column`` active applications in each of the
+    ``(job_id, status)`` columns. Every column is a LIMIT query seeking into
+    the (job, status, is_active, applied_at, id) index, glued together with
+    UNION ALL. A ROW_NUMBER() window would number every application first.
+    """
+    connection = connections[Application.objects.db]
+    table = connection.ops.quote_name(Application._meta.db_table)
+    column_sql = (
+        f"SELECT * FROM (SELECT id FROM {table} WHERE job_id = %s AND status = %s AND is_active = %s "
+        f"ORDER BY applied_at DESC, id DESC LIMIT %s) AS column_{{}}"
+    )
+    ids = []
+    with connection.cursor() as cursor:
+        for start in range(0, len(columns), PIPELINE_UNION_SIZE):
+            chunk = columns[start:start + PIPELINE_UNION_SIZE]
+            cursor.execute(
+                ' UNION ALL '.join(column_sql.format(i) for i in range(len(chunk))),
+                [param for job_id, status in chunk for param in (job_id, status, True, per_column)],
+            )
+            ids.extend(row[0] for row in cursor.fetchall())
+    return ids
 
 
 class ApplicationService:
@@ -65,6 +103,167 @@ class ApplicationService:
         ]
 
 
+    pipeline_fields = (
+        'id', 'applied_at', 'candidate_id', 'candidate__headline',
+        'candidate__user__first_name', 'candidate__user__last_name',
+    )
+
+    @staticmethod
+    def pipeline_applicant(row):
+        return {
+            'id': row['id'],
+            'candidate_id': row['candidate_id'],
+            'candidate_name': f"{row['candidate__user__first_name']} {row['candidate__user__last_name']}".strip(),
+            'candidate_headline': row['candidate__headline'] or '',
+            'applied_at': row['applied_at'].isoformat(),
+        }
+
+    @staticmethod
+    def get_pipeline(user, per_column, paginator):
+        """
+        The employer's jobs with a column per application status, holding its
+        applicant count and latest ``per_column`` applicants. Four queries for
+        up to PIPELINE_UNION_SIZE non-empty columns: the jobs, one GROUP BY
+        over the pipeline index, the latest applicant ids and their details.
+        """
+        try:
+            profile = user.employer_profile
+        except EmployerProfile.DoesNotExist:
+            raise NotFound("Employer profile not found")
+
+        jobs = list(JobPosting.objects.filter(employer=profile).order_by('-created_at').values('id', 'title', 'status'))
+        applications = Application.objects.filter(job_id__in=[job['id'] for job in jobs], is_active=True)
+
+        counts = {
+            (row['job_id'], row['status']): row['count']
+            for row in applications.values('job_id', 'status').annotate(count=Count('id')).order_by()
+        }
+        latest_ids = latest_application_ids(list(counts), per_column)
+        applicants = {}
+        for start in range(0, len(latest_ids), PIPELINE_FETCH_SIZE):
+            rows = (
+                Application.objects
+                .filter(id__in=latest_ids[start:start + PIPELINE_FETCH_SIZE])
+                .values('job_id', 'status', *ApplicationService.pipeline_fields)
+            )
+            for row in rows:
+                applicants.setdefault((row['job_id'], row['status']), []).append(row)
+        for rows in applicants.values():
+            rows.sort(key=lambda row: (row['applied_at'], row['id']), reverse=True)
+
+        board = []
+        for job in jobs:
+            columns = {}
+            for status in Application.Status.values:
+                rows = applicants.get((job['id'], status), [])
+                count = counts.get((job['id'], status), 0)
+                columns[status] = {
+                    'count': count,
+                    'applicants': [ApplicationService.pipeline_applicant(row) for row in rows],
+                    # Where the column's next page starts, see get_pipeline_column
+                    'cursor': paginator.encode_cursor(paginator.get_position(rows[-1])) if count > len(rows) else None,
+                }
+            board.append({**job, 'total': sum(column['count'] for column in columns.values()), 'columns': columns})
+        return {'jobs': board}
+
+    @staticmethod
+    def get_pipeline_column(user, job_id, status, request, paginator):
+        """One keyset page of a pipeline column, newest applicants first"""
+        if not JobPosting.objects.filter(id=job_id, employer__user=user).exists():
+            raise NotFound("Job not found")
+        rows = paginator.paginate_queryset(
+            Application.objects.filter(job_id=job_id, status=status, is_active=True)
+            .values(*ApplicationService.pipeline_fields),
+            request,
+        )
+        return {
+            'applicants': [ApplicationService.pipeline_applicant(row) for row in rows],
+            'next': paginator.get_next_link(),
+        }
+
+    export_fields = (
+        'application_id', 'job_id', 'job_title', 'status', 'applied_at', 'candidate_name', 'candidate_email',
+        'candidate_phone', 'candidate_headline', 'expected_salary', 'available_from', 'cover_letter',
+    )
+
+    @staticmethod
+    def export_applications(user, job_id=None, chunk_size=2000):
+        """
+        Yield every active application to the employer's jobs as a dict of
+        ``export_fields``. Rows are read through a server side cursor
+        ``chunk_size`` at a time, so memory stays flat for any number of them.
+        """
+        applications = (
+            Application.objects
+            .filter(job__employer__user=user, is_active=True)
+            .select_related('job', 'candidate__user')
+            .only(
+                'id', 'status', 'applied_at', 'expected_salary', 'available_from', 'cover_letter',
+                'job__id', 'job__title', 'candidate__phone', 'candidate__headline',
+                'candidate__user__first_name', 'candidate__user__last_name', 'candidate__user__email',
+            )
+            .order_by('job_id', 'id')
+        )
+        if job_id is not None:
+            applications = applications.filter(job_id=job_id)
+
+        for app in applications.iterator(chunk_size=chunk_size):
+            yield {
+                'application_id': app.id,
+                'job_id': app.job.id,
+                'job_title': app.job.title,
+                'status': app.status,
+                'applied_at': app.applied_at.isoformat() if app.applied_at else None,
+                'candidate_name': app.candidate.user.get_full_name(),
+                'candidate_email': app.candidate.user.email,
+                'candidate_phone': app.candidate.phone,
+                'candidate_headline': app.candidate.headline,
+                'expected_salary': str(app.expected_salary) if app.expected_salary is not None else None,
+                'available_from': app.available_from.isoformat() if app.available_from else None,
+                'cover_letter': app.cover_letter,
+            }
+
+    @staticmethod
+    def update_statuses(user, application_ids, new_status, notes=''):
+        """
+        Move the employer's applications to ``new_status`` in one transaction
+        and queue one task notifying their candidates. Returns the ids that
+        changed, or None when some ids aren't applications to the employer's
+        jobs. Takes the same handful of queries for any number of ids.
+        """
+        with transaction.atomic():
+            rows = list(
+                Application.objects
+                .select_for_update()
+                .filter(id__in=application_ids, job__employer__user=user, is_active=True)
+                .values_list('id', 'status', 'candidate__user_id')
+            )
+            if len(rows) != len(set(application_ids)):
+                return None
+
+            changed = [(pk, old_status) for pk, old_status, _ in rows if old_status != new_status]
+            if not changed:
+                return []
+            now = timezone.now()
+            # update() skips the post_save receivers, the caches are bumped below
+            Application.objects.filter(id__in=[pk for pk, _ in changed]).update(
+                status=new_status, reviewed_at=Coalesce('reviewed_at', now), updated_at=now,
+            )
+            history = ApplicationStatusHistory.objects.bulk_create([
+                ApplicationStatusHistory(
+                    application_id=pk, old_status=old_status, new_status=new_status, changed_by=user, notes=notes,
+                )
+                for pk, old_status in changed
+            ])
+            enqueue(tasks.send_status_notifications, history_ids=[entry.id for entry in history])
+
+        changed_ids = {pk for pk, _ in changed}
+        bump_many(APPLICATION, changed_ids)
+        bump_many(USER_APPLICATIONS, {user_id for pk, _, user_id in rows if pk in changed_ids})
+        bump(USER_APPLICATIONS, user.id)
+        return sorted(changed_ids)
+
+
 class SavedJobsService:
     """Service for retrieving saved jobs efficiently"""
 
@@ -94,10 +293,11 @@ class SavedJobsService:
 
 class NotificationService:
     """Service for retrieving notifications"""
+    fields = ('id', 'title', 'notification_type', 'created_at', 'is_read')
     
     @staticmethod
     def get_unread_notifications(user):
-        return Notification.objects.filter(user=user, is_read=False).count()
+        return NotificationCounter.objects.unread(user.id)
 
     @staticmethod
     def get_notifications(user, limit=5):
@@ -107,12 +307,25 @@ class NotificationService:
         if limit:
             notifications = notifications[:limit]
             
-        data = list(notifications.values('id', 'title', 'notification_type', 'created_at', 'is_read'))
+        data = list(notifications.values(*NotificationService.fields))
         return {
             "unread_count": unread_count,
             "notifications": data
         }
 
+    @staticmethod
+    def get_notification_page(user, request, paginator):
+        """One keyset page of the user's notifications, newest first"""
+        fields = NotificationService.fields
+        notifications = paginator.paginate_queryset(
+            Notification.objects.filter(user=user).only(*fields), request
+        )
+        return {
+            "unread_count": NotificationService.get_unread_notifications(user),
+            "notifications": [{field: getattr(notification, field) for field in fields} for notification in notifications],
+            "next": paginator.get_next_link(),
+        }
+
 
 
 class ReviewService:
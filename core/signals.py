@@ -1,13 +1,23 @@
-from django.db.models.signals import post_save
+from functools import partial
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
 from django.dispatch import receiver
 from .models import (
-    CandidateProfile, EmployerProfile, Address, 
-    Notification, Application, JobPosting, JobNotification
+    CandidateProfile, EmployerProfile, Address, Education, Certification,
+    Application, ApplicationCounterShard, JobPosting, JobSkill, Skill, CandidateSkill, JobAlert, Notification, NotificationCounter, Category
 )
 from django.contrib.auth import get_user_model
-from .utils import send_email
+from . import tasks
+from .queue import enqueue
+from .search import schedule_index_job
+from .facets import invalidate_facets
+from .matching import SkillMatcher
+from .alerts import AlertMatcher
+from .realtime import publish_notifications
+from .authentication import revoke_user_tokens
+from .cache import bump, bump_many, USER, USER_APPLICATIONS, USER_NOTIFICATIONS, APPLICATION, JOB
 import logging
-from django.core.cache import cache
 
 logger = logging.getLogger(__name__)
 
@@ -24,164 +34,235 @@ def create_candidate_or_employer_profile(sender, instance, created, **kwargs):
 
 
 @receiver(post_save, sender=Application)
-def send_employer_application_notification(sender, instance, created, **kwargs):
+def send_application_notifications(sender, instance, created, **kwargs):
     if created:
-        Notification.objects.create(
-            user=instance.job.employer.user,
-            title=f"New Application for {instance.job.title}",
-            notification_type=Notification.NotificationType.APPLICATION,
-            content=f"{instance.candidate.user.get_full_name()} has applied for the position of {instance.job.title}.",
-        )
-        cache.delete(f'user_notifications:{instance.job.id}')
+        enqueue(tasks.send_application_notifications, application_id=instance.id)
+
 
 @receiver(post_save, sender=Application)
-def send_candidate_application_notification(sender, instance, created, **kwargs):
+def count_application(sender, instance, created, **kwargs):
+    counted = instance.is_counted
     if created:
-        Notification.objects.create(
-            user=instance.candidate.user,
-            title=f"Application for {instance.job.title} has been submitted",
-            notification_type=Notification.NotificationType.APPLICATION,
-            content=f"You have successfully applied for the position of {instance.job.title} at {instance.job.employer.company_name}.",
-        )
-        cache.delete(f'user_notifications:{instance.candidate.user.id}')
+        delta = 1 if counted else 0
+    else:
+        was_counted = getattr(instance, '_loaded_counted', None)
+        if was_counted is None or was_counted == counted:
+            return
+        delta = 1 if counted else -1
+    instance._loaded_counted = counted
+    ApplicationCounterShard.objects.add(instance.job_id, delta)
 
 
-@receiver(post_save, sender=Application)
-def send_candidate_application_status_update_notification(sender, instance, created, **kwargs):
-    if created:
-        Notification.objects.create(
-            user=instance.candidate.user,
-            title=f"Application for {instance.job.title} has been updated",
-            notification_type=Notification.NotificationType.APPLICATION_STATUS,
-            content=f"Your application for the position of {instance.job.title} at {instance.job.employer.company_name} has been updated.",
-        )
-        cache.delete(f'user_notifications:{instance.candidate.user.id}')
-        try:
-            send_email(
-                to=instance.candidate.user.email,
-                subject=f"Application for {instance.job.title} has been updated",
-                message=f"Your application for the position of {instance.job.title} at {instance.job.employer.company_name} has been updated.",
-            )
-        except Exception as e:
-            print("send_email failed:", e)
+@receiver(post_delete, sender=Application)
+def uncount_deleted_application(sender, instance, **kwargs):
+    if instance.is_counted:
+        # After commit, the job may have been deleted along with it
+        transaction.on_commit(partial(uncount_application, instance.job_id))
+
+
+def uncount_application(job_id):
+    if JobPosting.objects.filter(pk=job_id).exists():
+        ApplicationCounterShard.objects.add(job_id, -1)
 
 
 @receiver(post_save, sender=JobPosting)
 def send_automatic_job_notifications(sender, instance, created, **kwargs):
     """
-    Automatically send job notifications to matching candidates when a new job is posted.
-    Matches candidates based on their skills (skill-based matching).
+    Notify candidates when a job is published, the first time it is saved as ACTIVE.
+    Matches candidates on their skills and on their instant job alerts.
     """
-    if not created:
-        return  # Only send notifications for new job postings
-    
-    # Only send notifications for active jobs
-    if instance.status != JobPosting.Status.ACTIVE:
-        logger.info(f"Job {instance.title} is not active, skipping automatic notifications")
+    if not instance.__dict__.pop('_published', False):
+        return
+
+    # Skills are attached after the job row is created, match once they are committed
+    enqueue(tasks.notify_matching_candidates, job_id=instance.id)
+    enqueue(tasks.notify_matching_alerts, job_id=instance.id)
+
+
+@receiver(post_save, sender=JobPosting)
+def update_job_search_document(sender, instance, **kwargs):
+    schedule_index_job(instance.id)
+
+
+@receiver(post_save, sender=JobSkill)
+@receiver(post_delete, sender=JobSkill)
+def update_job_search_document_skills(sender, instance, **kwargs):
+    schedule_index_job(instance.job_id)
+
+
+@receiver(post_save, sender=Skill)
+def update_skill_search_documents(sender, instance, created, **kwargs):
+    if created:
+        return
+    job_ids = JobSkill.objects.filter(skill=instance).values_list('job_id', flat=True)
+    for job_id in job_ids:
+        schedule_index_job(job_id)
+
+
+@receiver(post_save, sender=JobPosting)
+@receiver(post_delete, sender=JobPosting)
+def invalidate_job_facets(sender, instance, **kwargs):
+    update_fields = kwargs.get('update_fields')
+    if update_fields and set(update_fields) <= {'applications_count'}:
+        return  # Counters don't change any facet
+    invalidate_facets()
+
+
+@receiver(m2m_changed, sender=JobPosting.categories.through)
+def invalidate_job_category_facets(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_facets()
+
+
+@receiver(post_save, sender=CandidateSkill)
+@receiver(post_delete, sender=CandidateSkill)
+def invalidate_skill_match_index(sender, instance, **kwargs):
+    SkillMatcher.invalidate()
+
+
+@receiver(post_save, sender=JobAlert)
+@receiver(post_delete, sender=JobAlert)
+def invalidate_job_alert_index(sender, instance, **kwargs):
+    AlertMatcher.invalidate()
+
+
+@receiver(post_save, sender=User)
+def revoke_outdated_tokens(sender, instance, created, **kwargs):
+    loaded = getattr(instance, '_loaded_token_fields', None)
+    if created or loaded is None:
+        return
+    current = instance.token_fields()
+    # Fields left out of the save keep their loaded value
+    if any(old != new for old, new in zip(loaded, current) if new is not None):
+        revoke_user_tokens(instance.id)
+    instance._loaded_token_fields = current
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    bump(USER, instance.id)
+
+
+@receiver(post_save, sender=CandidateProfile)
+@receiver(post_delete, sender=CandidateProfile)
+@receiver(post_save, sender=EmployerProfile)
+@receiver(post_delete, sender=EmployerProfile)
+@receiver(post_save, sender=Address)
+@receiver(post_delete, sender=Address)
+def invalidate_profile_cache(sender, instance, **kwargs):
+    bump(USER, instance.user_id)
+
+
+@receiver(post_save, sender=CandidateSkill)
+@receiver(post_delete, sender=CandidateSkill)
+@receiver(post_save, sender=Education)
+@receiver(post_delete, sender=Education)
+@receiver(post_save, sender=Certification)
+@receiver(post_delete, sender=Certification)
+def invalidate_candidate_profile_cache(sender, instance, **kwargs):
+    user_id = CandidateProfile.objects.filter(id=instance.candidate_id).values_list('user_id', flat=True).first()
+    if user_id:
+        bump(USER, user_id)
+
+
+@receiver(post_save, sender=Application)
+@receiver(post_delete, sender=Application)
+def invalidate_application_cache(sender, instance, **kwargs):
+    bump(APPLICATION, instance.id)
+    user_ids = (
+        Application.objects.filter(id=instance.id)
+        .values_list('candidate__user_id', 'job__employer__user_id')
+        .first()
+    )
+    if user_ids is None:  # Deleted, fall back to the related objects
+        user_ids = (instance.candidate.user_id, instance.job.employer.user_id)
+    for user_id in user_ids:
+        bump(USER_APPLICATIONS, user_id)
+
+
+@receiver(post_save, sender=Notification)
+def count_unread_notification(sender, instance, created, **kwargs):
+    if created:
+        delta = 0 if instance.is_read else 1
+    else:
+        was_read = getattr(instance, '_loaded_is_read', None)
+        if was_read is None or was_read == instance.is_read:
+            return
+        delta = 1 if was_read else -1
+    instance._loaded_is_read = instance.is_read
+    NotificationCounter.objects.add({instance.user_id: delta})
+
+
+@receiver(post_delete, sender=Notification)
+def uncount_deleted_notification(sender, instance, **kwargs):
+    if not instance.is_read:
+        NotificationCounter.objects.add({instance.user_id: -1})
+
+
+@receiver(post_save, sender=Notification)
+def push_notification(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(partial(publish_notifications, [instance]))
+
+
+@receiver(post_save, sender=Notification)
+@receiver(post_delete, sender=Notification)
+def invalidate_notification_cache(sender, instance, **kwargs):
+    bump(USER_NOTIFICATIONS, instance.user_id)
+
+
+@receiver(post_save, sender=JobPosting)
+@receiver(post_delete, sender=JobPosting)
+def invalidate_job_cache(sender, instance, **kwargs):
+    bump(JOB, instance.id)
+    # The employer's pipeline lists their jobs
+    employer_user_id = (
+        EmployerProfile.objects.filter(id=instance.employer_id).values_list('user_id', flat=True).first()
+    )
+    if employer_user_id is not None:
+        bump(USER_APPLICATIONS, employer_user_id)
+
+
+@receiver(post_save, sender=JobSkill)
+@receiver(post_delete, sender=JobSkill)
+def invalidate_job_skill_cache(sender, instance, **kwargs):
+    bump(JOB, instance.job_id)
+
+
+@receiver(m2m_changed, sender=JobPosting.categories.through)
+def invalidate_job_category_cache(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            bump(JOB, instance.pk)
+    elif action in ('post_add', 'post_remove'):  # instance is a category
+        bump_many(JOB, pk_set)
+    elif action == 'pre_clear':
+        bump_many(JOB, instance.jobs.values_list('id', flat=True))
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def invalidate_category_job_cache(sender, instance, **kwargs):
+    if kwargs.get('created'):
         return
-    
-    # Get all required skills for this job
-    required_skill_ids = instance.job_skills.filter(
-        is_required=True
-    ).values_list('skill_id', flat=True)
-    
-    if not required_skill_ids:
-        logger.info(f"No required skills for job {instance.title}, skipping skill-based matching")
+    # Subcategories show their parent's name
+    job_ids = JobPosting.objects.filter(
+        Q(categories=instance) | Q(categories__parent=instance)
+    ).values_list('id', flat=True)
+    bump_many(JOB, job_ids)
+
+
+@receiver(post_save, sender=Skill)
+def invalidate_skill_job_cache(sender, instance, created, **kwargs):
+    if created:
         return
-    
-    # Find candidates who have at least one of the required skills
-    matching_candidates = CandidateProfile.objects.filter(
-        candidate_skills__skill_id__in=required_skill_ids,
-        user__is_active=True  # Only send to active users
-    ).distinct()
-    
-    logger.info(f"Found {matching_candidates.count()} skill-matching candidates for {instance.title}")
-    
-    for candidate in matching_candidates:
-        # Create job notification record
-        notification, notification_created = JobNotification.objects.get_or_create(
-            candidate=candidate,
-            job_posting=instance,
-            defaults={'source': 'SKILL_MATCH'}
-        )
-        
-        if not notification_created:
-            logger.info(f"Notification already exists for {candidate.user.email}")
-            continue
-        
-        # Get matching skills for personalization
-        candidate_skill_ids = candidate.candidate_skills.values_list('skill_id', flat=True)
-        matching_skills = instance.job_skills.filter(
-            skill_id__in=candidate_skill_ids
-        ).select_related('skill')
-        
-        matching_skill_names = [js.skill.name for js in matching_skills]
-        
-        # Prepare email content
-        subject = f"New Job Match: {instance.title}"
-        
-        body = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <style>
-                body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-                .header {{ background-color: #4CAF50; color: white; padding: 20px; text-align: center; }}
-                .content {{ padding: 20px; background-color: #f9f9f9; }}
-                .skills {{ background-color: #e8f5e9; padding: 10px; margin: 10px 0; border-radius: 5px; }}
-                .button {{ 
-                    display: inline-block; 
-                    padding: 12px 24px; 
-                    background-color: #4CAF50; 
-                    color: white; 
-                    text-decoration: none; 
-                    border-radius: 5px; 
-                    margin-top: 15px;
-                }}
-                .footer {{ text-align: center; padding: 20px; font-size: 12px; color: #666; }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <h1>New Job Match!</h1>
-                </div>
-                <div class="content">
-                    <h2>{instance.title}</h2>
-                    <p><strong>Company:</strong> {instance.company.name if hasattr(instance, 'company') else 'N/A'}</p>
-                    <p><strong>Location:</strong> {instance.location if hasattr(instance, 'location') else 'N/A'}</p>
-                    
-                    <div class="skills">
-                        <strong>Your Matching Skills:</strong>
-                        <ul>
-                            {"".join([f"<li>{skill}</li>" for skill in matching_skill_names])}
-                        </ul>
-                    </div>
-                    
-                    <p>{instance.description[:200] if hasattr(instance, 'description') else ''}...</p>
-                    
-                    <a href="{instance.get_absolute_url()}" class="button">View Job Details</a>
-                </div>
-                <div class="footer">
-                    <p>You're receiving this because your skills match this job.</p>
-                    <p>To stop receiving alerts, update your preferences.</p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
-        
-        # Send email
-        email_sent = send_email(
-            email_address=candidate.user.email,
-            subject=subject,
-            body=body,
-            html=True
-        )
-        
-        if email_sent:
-            logger.info(f"Alert sent to {candidate.user.email} for job {instance.title}")
-        else:
-            logger.error(f"Failed to send alert to {candidate.user.email} for job {instance.title}")
+    bump_many(JOB, JobSkill.objects.filter(skill=instance).values_list('job_id', flat=True))
+
 
+@receiver(post_save, sender=EmployerProfile)
+def invalidate_employer_job_cache(sender, instance, created, **kwargs):
+    if created:
+        return
+    # Job details embed the employer
+    bump_many(JOB, JobPosting.objects.filter(employer=instance).values_list('id', flat=True))
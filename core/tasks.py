@@ -0,0 +1,249 @@
+"""
+Task handlers for work that used to run inside post_save signals.
+
+Signals only enqueue these, the ``run_worker`` command executes them.
+Handlers take ids rather than instances and must be safe to run twice: a
+task is retried when it raises, or when its worker dies mid-run.
+"""
+import logging
+from collections import Counter
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+
+from .alerts import AlertMatcher
+from .cache import USER_NOTIFICATIONS, bump_many
+from .emails import JobAlertEmail, JobMatchEmail, application_update_email
+from .mail import EmailMessage, send_mass_mail
+from .matching import SkillMatcher
+from .models import (
+    Application, ApplicationStatusHistory, CandidateProfile, JobAlert, JobNotification, JobPosting, JobSkill, Notification, NotificationCounter
+)
+from .queue import backoff, enqueue, enqueue_many, task
+from .realtime import publish_notifications
+from .utils import send_email
+
+logger = logging.getLogger(__name__)
+
+# Candidates per query in a fan-out, kept under SQLite's 32766 bound parameters
+NOTIFICATION_CHUNK_SIZE = 5000
+# Sends of a bulk email's failed recipients before they are given up on
+BULK_EMAIL_ATTEMPTS = 8
+
+
+@task(max_attempts=8)
+def deliver_email(email_address, subject, body, html=True):
+    """Send one email, raising so the queue retries when delivery fails"""
+    if not send_email(email_address=email_address, subject=subject, body=body, html=html):
+        raise RuntimeError(f"Email delivery to {email_address} failed")
+
+
+@task(max_attempts=8)
+def deliver_bulk_email(subject, body, recipients, html=True, attempt=1):
+    """
+    Send one message to many recipients in a single provider request.
+    ``recipients`` holds ``{'to': ..., 'substitutions': {...}}`` dicts.
+
+    Failed recipients are queued again on their own rather than raising,
+    a retry of the whole task would mail the delivered ones twice.
+    """
+    report = send_mass_mail([
+        EmailMessage(recipient['to'], subject, body, html, recipient.get('substitutions'))
+        for recipient in recipients
+    ])
+    if not report.failed:
+        return
+    failed = {message.to for message in report.failed}
+    retry = [recipient for recipient in recipients if recipient['to'] in failed]
+    if attempt >= BULK_EMAIL_ATTEMPTS:
+        logger.error(f"Giving up on {len(retry)} emails for {subject!r} after {attempt} attempts")
+        return
+    logger.warning(f"{len(retry)} of {len(recipients)} emails for {subject!r} failed, retrying them")
+    enqueue(
+        deliver_bulk_email, delay=timedelta(seconds=backoff(attempt)),
+        subject=subject, body=body, recipients=retry, html=html, attempt=attempt + 1,
+    )
+
+
+@task()
+def send_application_notifications(application_id):
+    """Notify the employer and the candidate about a new application"""
+    application = (
+        Application.objects
+        .select_related('job__employer__user', 'candidate__user')
+        .filter(id=application_id)
+        .first()
+    )
+    if application is None:
+        return
+
+    job = application.job
+    candidate_user = application.candidate.user
+    employer_user = job.employer.user
+
+    with transaction.atomic():
+        # A candidate applies to a job once, so this marks a previous attempt
+        if Notification.objects.filter(
+            user=candidate_user,
+            title=f"Application for {job.title} has been submitted",
+            created_at__gte=application.created_at,
+        ).exists():
+            return
+
+        notifications = Notification.objects.bulk_create([
+            Notification(
+                user=employer_user,
+                title=f"New Application for {job.title}",
+                notification_type=Notification.NotificationType.APPLICATION,
+                content=f"{candidate_user.get_full_name()} has applied for the position of {job.title}.",
+            ),
+            Notification(
+                user=candidate_user,
+                title=f"Application for {job.title} has been submitted",
+                notification_type=Notification.NotificationType.APPLICATION,
+                content=f"You have successfully applied for the position of {job.title} at {job.employer.company_name}.",
+            ),
+            Notification(
+                user=candidate_user,
+                title=f"Application for {job.title} has been updated",
+                notification_type=Notification.NotificationType.APPLICATION_STATUS,
+                content=f"Your application for the position of {job.title} at {job.employer.company_name} has been updated.",
+            ),
+        ])
+        transaction.on_commit(partial(publish_notifications, notifications))
+        subject, body = application_update_email(application)
+        enqueue(deliver_email, email_address=candidate_user.email, subject=subject, body=body, html=False)
+
+        # bulk_create skips the post_save receivers
+        NotificationCounter.objects.add(Counter(notification.user_id for notification in notifications))
+
+    bump_many(USER_NOTIFICATIONS, [employer_user.id, candidate_user.id])
+
+
+@task()
+def send_status_notifications(history_ids):
+    """Notify the candidates of a batch of application status changes"""
+    with transaction.atomic():
+        # Changes notified by a previous attempt are referenced by their notification
+        notified = set(
+            Notification.objects
+            .filter(reference_type='ApplicationStatusHistory', reference_id__in=history_ids)
+            .values_list('reference_id', flat=True)
+        )
+        history = list(
+            ApplicationStatusHistory.objects
+            .select_related('application__job__employer', 'application__candidate__user')
+            .filter(id__in=[pk for pk in history_ids if pk not in notified])
+        )
+        if not history:
+            return
+
+        notifications = Notification.objects.bulk_create([
+            Notification(
+                user=entry.application.candidate.user,
+                title=f"Application for {entry.application.job.title} has been updated",
+                notification_type=Notification.NotificationType.APPLICATION_STATUS,
+                content=(
+                    f"Your application for the position of {entry.application.job.title} at "
+                    f"{entry.application.job.employer.company_name} is now {entry.application.get_status_display()}."
+                ),
+                reference_id=entry.id,
+                reference_type='ApplicationStatusHistory',
+            )
+            for entry in history
+        ])
+        transaction.on_commit(partial(publish_notifications, notifications))
+        emails = []
+        for entry in history:
+            subject, body = application_update_email(entry.application)
+            emails.append({
+                'email_address': entry.application.candidate.user.email,
+                'subject': subject, 'body': body, 'html': False,
+            })
+        enqueue_many(deliver_email, emails)
+
+        # bulk_create skips the post_save receivers
+        NotificationCounter.objects.add(Counter(notification.user_id for notification in notifications))
+
+    bump_many(USER_NOTIFICATIONS, {notification.user_id for notification in notifications})
+
+
+def notify_candidates(job, email, candidate_values):
+    """
+    Record a JobNotification of ``job`` for each candidate in
+    ``candidate_values`` and queue ``email`` to those that didn't have one.
+    ``candidate_values`` maps candidate ids to a function of the
+    candidate's first name returning their substitution values.
+
+    Costs two statements per chunk of candidates, their addresses and the
+    notification rows. A crash before commit leaves no rows behind, so a
+    retry emails everyone.
+    """
+    candidate_ids = list(candidate_values)
+    recipients = []
+    with transaction.atomic():
+        for start in range(0, len(candidate_ids), NOTIFICATION_CHUNK_SIZE):
+            users = {
+                candidate_id: (email_address, first_name)
+                for candidate_id, email_address, first_name in CandidateProfile.objects
+                .filter(id__in=candidate_ids[start:start + NOTIFICATION_CHUNK_SIZE], user__is_active=True)
+                .values_list('id', 'user__email', 'user__first_name')
+            }
+            for candidate_id in JobNotification.objects.create_missing(job, users, chunk_size=NOTIFICATION_CHUNK_SIZE):
+                email_address, first_name = users[candidate_id]
+                recipients.append({
+                    'to': email_address,
+                    'substitutions': email.substitutions(**candidate_values[candidate_id](first_name)),
+                })
+
+        # One bulk send per MAIL_BATCH_SIZE recipients, the provider fills in the tags
+        batch_size = settings.MAIL_BATCH_SIZE
+        enqueue_many(deliver_bulk_email, [
+            {'subject': email.subject, 'body': email.body, 'recipients': recipients[start:start + batch_size]}
+            for start in range(0, len(recipients), batch_size)
+        ])
+    return len(recipients)
+
+
+@task()
+def notify_matching_candidates(job_id):
+    """Queue a job match email for every active candidate sharing a required skill"""
+    job = JobPosting.objects.select_related('employer').filter(id=job_id).first()
+    if job is None:
+        return
+    matches = SkillMatcher.match_job(job)
+    if not matches:
+        logger.info(f"No skill-matching candidates for job {job.title}")
+        return
+
+    skill_names = dict(
+        JobSkill.objects.filter(job=job, is_required=True).values_list('skill_id', 'skill__name')
+    )
+    email = JobMatchEmail(job, skill_names)
+    sent = notify_candidates(job, email, {
+        match.candidate_id: partial(email.recipient_values, skill_ids=match.matched_skill_ids)
+        for match in matches
+    })
+    logger.info(f"Queued {sent} job match emails for {job.title}")
+
+
+@task()
+def notify_matching_alerts(job_id):
+    """Record and email every INSTANT job alert the newly active job matches"""
+    job = JobPosting.objects.select_related('employer').filter(id=job_id).first()
+    if job is None or job.status != JobPosting.Status.ACTIVE:
+        return
+    alerts = AlertMatcher.match_job(job, frequencies={JobAlert.Frequency.INSTANT})
+    if not alerts:
+        return
+
+    email = JobAlertEmail(job)
+    candidate_values = {}
+    for alert in alerts:
+        # A candidate with several matching alerts gets one email, named after the first
+        if alert.candidate_id not in candidate_values:
+            candidate_values[alert.candidate_id] = partial(email.recipient_values, alert_name=alert.name)
+    sent = notify_candidates(job, email, candidate_values)
+    logger.info(f"Queued {sent} job alert emails for {job.title}")
@@ -0,0 +1,62 @@
+import pytest
+from decimal import Decimal
+from django.core.cache import cache
+from core.alerts import AlertIndex, IndexedAlert, alert_keys
+from core.mail import LocmemTransport
+from core.models import User, JobAlert, JobPosting, JobNotification
+from core.queue import run_pending
+
+
+def make_alert(alert_id, salary_min=None, frequency='INSTANT', **criteria):
+    return IndexedAlert(alert_id, alert_id, f'Alert {alert_id}', frequency, alert_keys(**criteria), salary_min)
+
+
+class TestAlertIndex:
+    def test_all_criteria_must_match(self):
+        index = AlertIndex([
+            make_alert(1, keywords='django developer'),
+            make_alert(2, keywords='django', location='Nairobi'),
+            make_alert(3, keywords='golang'),
+            make_alert(4, experience_level='SENIOR', is_remote=True),
+            make_alert(5),
+            make_alert(6, keywords='django', salary_min=Decimal('5000')),
+        ])
+        keys = alert_keys(keywords='senior django developer', location='Nairobi Kenya',
+                          experience_level='SENIOR', job_type='ON_SITE')
+
+        assert [alert.id for alert in index.match(keys, salary=Decimal('4000'))] == [1, 2, 5]
+        assert [alert.id for alert in index.match(keys, salary=Decimal('6000'))] == [1, 2, 5, 6]
+
+    def test_alerts_are_filed_under_their_rarest_key(self):
+        index = AlertIndex([make_alert(i, keywords='python', location='Lagos' if i == 0 else 'Accra') for i in range(5)])
+        assert len(index.postings[('loc', 'lagos')]) == 1
+        assert ('kw', 'python') not in index.postings
+
+
+@pytest.mark.django_db
+def test_instant_alerts_notify_when_job_is_published(django_capture_on_commit_callbacks, settings):
+    cache.clear()
+    settings.MAIL_TRANSPORT = 'core.mail.LocmemTransport'
+    LocmemTransport.reset()
+
+    employer = User.objects.create_user(email='e@test.com', password='pw', role='EMPLOYER').employer_profile
+    instant = User.objects.create_user(email='i@test.com', password='pw', role='CANDIDATE').candidate
+    daily = User.objects.create_user(email='d@test.com', password='pw', role='CANDIDATE').candidate
+    JobAlert.objects.create(candidate=instant, alert_name='Remote Django', keywords='django', is_remote=True,
+                            frequency=JobAlert.Frequency.INSTANT)
+    JobAlert.objects.create(candidate=daily, alert_name='Django', keywords='django')
+
+    job = JobPosting.objects.create(
+        employer=employer, title='Django Developer', description='Desc', job_type='REMOTE',
+        employment_type='FULL_TIME', experience_level='SENIOR',
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        job.status = JobPosting.Status.ACTIVE
+        job.save()
+    for _ in range(2):
+        with django_capture_on_commit_callbacks(execute=True):
+            run_pending()
+
+    assert list(JobNotification.objects.values_list('candidate_id', flat=True)) == [instant.id]
+    assert [message.to for message in LocmemTransport.outbox] == ['i@test.com']
+    assert 'your alert "Remote Django"' in LocmemTransport.outbox[0].body
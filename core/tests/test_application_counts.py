@@ -0,0 +1,65 @@
+import pytest
+from django.core.management import call_command
+
+from core.models import Application, ApplicationCounterShard, JobPosting, User
+
+
+@pytest.fixture
+def job(db):
+    employer = User.objects.create_user(email='e@test.com', password='pw', role='EMPLOYER').employer_profile
+    return JobPosting.objects.create(employer=employer, title='Dev', description='Desc')
+
+
+def candidates(count):
+    return [
+        User.objects.create_user(email=f'c{i}@test.com', password='pw', role='CANDIDATE').candidate
+        for i in range(count)
+    ]
+
+
+def applications_count(job):
+    call_command('fold_application_counts')
+    job.refresh_from_db(fields=['applications_count'])
+    return job.applications_count
+
+
+def test_applies_and_withdrawals_are_counted(job, settings):
+    settings.APPLICATION_COUNTER_SHARDS = 4
+    applications = [Application.objects.create(job=job, candidate=candidate) for candidate in candidates(10)]
+    assert ApplicationCounterShard.objects.pending(job.id) == 10
+    job.refresh_from_db(fields=['applications_count'])
+    assert job.applications_count == 0  # Until the shards are folded
+
+    assert applications_count(job) == 10
+    assert ApplicationCounterShard.objects.pending(job.id) == 0
+
+    withdrawn = Application.objects.get(pk=applications[0].pk)
+    withdrawn.is_withdrawn = True
+    withdrawn.save()
+    withdrawn.save()  # Already withdrawn, not counted twice
+    applications[1].is_active = False
+    applications[1].save()
+    assert applications_count(job) == 8
+
+
+def test_deleted_applications_are_uncounted(job, django_capture_on_commit_callbacks):
+    applications = [Application.objects.create(job=job, candidate=candidate) for candidate in candidates(3)]
+    with django_capture_on_commit_callbacks(execute=True):
+        applications[0].delete()
+    assert applications_count(job) == 2
+
+    # The job going with its applications leaves nothing to count
+    with django_capture_on_commit_callbacks(execute=True):
+        job.delete()
+    assert not ApplicationCounterShard.objects.exists()
+
+
+def test_recount_repairs_drift(job):
+    for candidate in candidates(3):
+        Application.objects.create(job=job, candidate=candidate)
+    JobPosting.objects.filter(pk=job.pk).update(applications_count=7)
+
+    call_command('fold_application_counts', '--recount')
+    job.refresh_from_db(fields=['applications_count'])
+    assert job.applications_count == 3
+    assert ApplicationCounterShard.objects.pending(job.id) == 0
@@ -0,0 +1,119 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core import tasks
+from core.models import Application, ApplicationStatusHistory, JobPosting, Notification, Task, User
+
+
+def call(user, data):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client.post(reverse('applications-bulk-update-status'), data, format='json')
+
+
+def employer_with_applications(email, count):
+    employer = User.objects.create_user(email=email, password='pw', role='EMPLOYER')
+    job = JobPosting.objects.create(employer=employer.employer_profile, title='Dev', description='Desc')
+    applications = [
+        Application.objects.create(
+            job=job,
+            candidate=User.objects.create_user(email=f'{i}.{email}', password='pw', role='CANDIDATE').candidate,
+        )
+        for i in range(count)
+    ]
+    return employer, applications
+
+
+@pytest.mark.django_db
+def test_bulk_status_update(django_capture_on_commit_callbacks):
+    employer, applications = employer_with_applications('e@test.com', 3)
+    _, (foreign,) = employer_with_applications('o@test.com', 1)
+    ids = [application.id for application in applications]
+
+    response = call(employer, {'ids': ids + [foreign.id], 'status': 'SHORTLISTED'})
+    assert response.status_code == 403
+    assert not Application.objects.filter(status='SHORTLISTED').exists()
+
+    assert call(employer, {'ids': ids, 'status': 'WITHDRAWN'}).status_code == 400
+    assert call(employer, {'ids': [], 'status': 'SHORTLISTED'}).status_code == 400
+
+    Task.objects.all().delete()
+    with django_capture_on_commit_callbacks(execute=True):
+        response = call(employer, {'ids': ids, 'status': 'SHORTLISTED', 'notes': 'Strong batch'})
+    assert response.status_code == 200
+    assert response.data['updated'] == sorted(ids)
+    assert set(Application.objects.filter(id__in=ids).values_list('status', flat=True)) == {'SHORTLISTED'}
+    history = ApplicationStatusHistory.objects.filter(application_id__in=ids)
+    assert {(entry.old_status, entry.new_status, entry.changed_by_id) for entry in history} == {
+        ('PENDING', 'SHORTLISTED', employer.id)
+    }
+    task, = Task.objects.all()
+    assert task.name == tasks.send_status_notifications.task_name
+
+    # Safe to run twice
+    tasks.send_status_notifications(**task.payload)
+    tasks.send_status_notifications(**task.payload)
+    notifications = Notification.objects.filter(reference_type='ApplicationStatusHistory')
+    assert sorted(notifications.values_list('user_id', flat=True)) == sorted(
+        application.candidate.user_id for application in applications
+    )
+
+    # Applications already in the status are left alone
+    assert call(employer, {'ids': ids, 'status': 'SHORTLISTED'}).data['updated'] == []
+
+
+@pytest.mark.django_db
+def test_applications_are_read_only_over_the_router():
+    employer, (application,) = employer_with_applications('e@test.com', 1)
+    client = APIClient()
+    client.force_authenticate(user=employer)
+    assert client.get(reverse('applications-detail', args=[application.id])).status_code == 200
+    assert client.patch(reverse('applications-detail', args=[application.id]), {'status': 'ACCEPTED'}).status_code == 405
+    assert client.post(reverse('applications-list'), {}).status_code == 405
+
+
+@pytest.mark.django_db
+def test_bulk_status_update_takes_constant_queries():
+    small_employer, small = employer_with_applications('s@test.com', 2)
+    large_employer, large = employer_with_applications('l@test.com', 20)
+
+    with CaptureQueriesContext(connection) as small_queries:
+        call(small_employer, {'ids': [application.id for application in small], 'status': 'REVIEWED'})
+    with CaptureQueriesContext(connection) as large_queries:
+        call(large_employer, {'ids': [application.id for application in large], 'status': 'REVIEWED'})
+    assert len(large_queries) == len(small_queries)
+
+
+@pytest.mark.django_db
+def test_single_application_actions():
+    employer, (application,) = employer_with_applications('e@test.com', 1)
+    other_employer, _ = employer_with_applications('o@test.com', 0)
+    candidate = application.candidate.user
+    client = APIClient()
+
+    def post(user, url_name, data=None):
+        client.force_authenticate(user=user)
+        return client.post(reverse(f'applications-{url_name}', args=[application.id]), data, format='json')
+
+    client.force_authenticate(user=employer)
+    assert client.get(reverse('applications-view-application', args=[application.id])).status_code == 200
+    assert client.get(reverse('applications-view-application', args=[application.id + 100])).status_code == 404
+
+    response = post(employer, 'download-resume')
+    assert response.status_code == 404
+    assert response.data == {'error': 'This application does not have a resume'}
+
+    assert post(other_employer, 'update-application-status', {'status': 'REVIEWED'}).status_code == 404
+    assert post(employer, 'update-application-status', {'status': 'bogus'}).status_code == 400
+    assert post(employer, 'update-application-status', {'status': 'REVIEWED', 'notes': 'Looks good'}).status_code == 200
+    application.refresh_from_db()
+    assert application.status == 'REVIEWED'
+    assert ApplicationStatusHistory.objects.get(application=application).notes == 'Looks good'
+
+    assert post(employer, 'withdraw-application').status_code == 403
+    assert post(candidate, 'withdraw-application').status_code == 200
+    application.refresh_from_db()
+    assert (application.status, application.is_withdrawn) == ('WITHDRAWN', True)
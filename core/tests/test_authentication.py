@@ -0,0 +1,109 @@
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+
+from core.authentication import Denylist, StatelessJWTAuthentication
+from core.models import ClaimsUser, User
+
+
+def login(client, email='c@test.com', password='pw'):
+    response = client.post(reverse('auth-login'), {'email': email, 'password': password})
+    return response.data['access'], response.data['refresh']
+
+
+def login_earlier(client, email='c@test.com', seconds=1):
+    """Log in with tokens issued a little while ago"""
+    issued_at = timezone.now() - timedelta(seconds=seconds)
+    with mock.patch('rest_framework_simplejwt.tokens.aware_utcnow', return_value=issued_at):
+        return login(client, email)
+
+
+def authenticate(method, access):
+    request = getattr(APIRequestFactory(), method)('/api/auth/me/', HTTP_AUTHORIZATION=f'Bearer {access}')
+    return StatelessJWTAuthentication().authenticate(Request(request))
+
+
+@pytest.fixture
+def candidate(db):
+    return User.objects.create_user(email='c@test.com', password='pw', role='CANDIDATE', first_name='Ada')
+
+
+def test_safe_requests_authenticate_without_queries(candidate):
+    access, _ = login(APIClient())
+    Denylist.load()
+
+    with CaptureQueriesContext(connection) as queries:
+        user, _ = authenticate('get', access)
+        assert isinstance(user, ClaimsUser)
+        assert (user.id, user.email, user.is_candidate) == (candidate.id, 'c@test.com', True)
+    assert len(queries) == 0
+
+    # Any other field loads the row, once
+    with CaptureQueriesContext(connection) as queries:
+        assert (user.first_name, user.is_active, user.date_joined) == ('Ada', True, candidate.date_joined)
+    assert len(queries) == 1
+
+    user, _ = authenticate('post', access)
+    assert type(user) is User
+
+
+def test_logout_revokes_tokens(candidate):
+    client = APIClient()
+    access, refresh = login(client)
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+    assert client.get(reverse('auth-me')).status_code == 200
+
+    assert client.post(reverse('auth-logout'), {'refresh': refresh}).status_code == 200
+
+    assert client.get(reverse('auth-me')).status_code == 401
+    other_access, _ = login(APIClient())
+    assert authenticate('get', other_access)[0].id == candidate.id
+
+
+def test_password_change_revokes_earlier_tokens(candidate):
+    access, _ = login_earlier(APIClient())
+    candidate = User.objects.get(pk=candidate.pk)
+
+    candidate.first_name = 'Grace'
+    candidate.save()
+    assert authenticate('get', access)[0].id == candidate.id
+
+    candidate.set_password('new password')
+    candidate.save()
+    with pytest.raises(AuthenticationFailed):
+        authenticate('get', access)
+
+
+def test_tokens_issued_in_the_same_second_as_a_change_work(candidate):
+    candidate = User.objects.get(pk=candidate.pk)
+    candidate.set_password('new password')
+    candidate.save()
+
+    client = APIClient()
+    access, _ = login(client, password='new password')
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+    assert client.get(reverse('auth-me')).status_code == 200
+
+
+def test_deactivation_revokes_tokens(candidate):
+    access, _ = login_earlier(APIClient())
+    candidate = User.objects.get(pk=candidate.pk)
+    candidate.is_active = False
+    candidate.save()
+    with pytest.raises(AuthenticationFailed):
+        authenticate('get', access)
+
+    # Bulk updates skip the save signal but revoke all the same
+    other = User.objects.create_user(email='d@test.com', password='pw', role='CANDIDATE')
+    access, _ = login_earlier(APIClient(), 'd@test.com')
+    User.objects.filter(pk=other.pk).update(is_active=False)
+    with pytest.raises(AuthenticationFailed):
+        authenticate('get', access)
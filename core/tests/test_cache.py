@@ -0,0 +1,142 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.core.cache import cache
+from rest_framework.test import APIRequestFactory, force_authenticate
+from core.cache import make_key, bump, generation, get_or_compute, USER, USER_APPLICATIONS
+from core.models import User, JobPosting, Application
+from core.views import ApplicationView
+
+
+def test_bump_changes_dependent_keys_only():
+    cache.clear()
+    first = make_key('user_profile', 1, depends_on=[(USER, 1)])
+    other = make_key('user_profile', 2, depends_on=[(USER, 2)])
+
+    bump(USER, 1)
+
+    assert make_key('user_profile', 1, depends_on=[(USER, 1)]) != first
+    assert make_key('user_profile', 2, depends_on=[(USER, 2)]) == other
+
+
+def test_evicted_generation_never_goes_back():
+    cache.clear()
+    before = generation(USER, 1)
+    bump(USER, 1)
+    cache.delete('gen:user:1')
+    assert generation(USER, 1) > before + 1
+
+
+@pytest.mark.django_db
+def test_application_list_invalidated_on_status_change():
+    cache.clear()
+    candidate = User.objects.create_user(email='c@test.com', password='pw', role='CANDIDATE')
+    employer = User.objects.create_user(email='e@test.com', password='pw', role='EMPLOYER').employer_profile
+    job = JobPosting.objects.create(employer=employer, title='Dev', description='Desc')
+    application = Application.objects.create(candidate=candidate.candidate, job=job)
+
+    view = ApplicationView.as_view({'get': 'applications'})
+
+    def get():
+        request = APIRequestFactory().get('/api/applications/applications/')
+        force_authenticate(request, user=candidate)
+        return view(request)
+
+    assert get().data[0]['status'] == Application.Status.PENDING
+    employer_generation = generation(USER_APPLICATIONS, employer.user_id)
+
+    application.status = Application.Status.REVIEWED
+    application.save()
+
+    assert get().data[0]['status'] == Application.Status.REVIEWED
+    assert generation(USER_APPLICATIONS, employer.user_id) > employer_generation
+
+
+class SlowComputation:
+    def __init__(self, seconds=0.2):
+        self.seconds = seconds
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            self.calls += 1
+            calls = self.calls
+        time.sleep(self.seconds)
+        return f'value {calls}'
+
+
+def test_parallel_misses_compute_once():
+    cache.clear()
+    compute = SlowComputation()
+    barrier = threading.Barrier(100)
+
+    def read():
+        barrier.wait()
+        return get_or_compute('user_profile:1', compute)
+
+    with ThreadPoolExecutor(max_workers=100) as executor:
+        results = list(executor.map(lambda _: read(), range(100)))
+
+    assert compute.calls == 1
+    assert set(results) == {'value 1'}
+
+
+def test_waiters_take_over_when_the_computation_fails():
+    cache.clear()
+    started = threading.Event()
+
+    def failing():
+        started.set()
+        time.sleep(0.2)
+        raise LookupError('missing')
+
+    def waiting():
+        started.wait()
+        began = time.time()
+        with pytest.raises(LookupError):
+            get_or_compute('user_profile:1', failing)
+        return time.time() - began
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        first = executor.submit(get_or_compute, 'user_profile:1', failing)
+        waited = executor.submit(waiting)
+        with pytest.raises(LookupError):
+            first.result()
+        # Retries once the lock is released rather than waiting out LOCK_TIMEOUT
+        assert waited.result() < 2
+
+
+def test_expired_value_is_served_while_refreshing():
+    cache.clear()
+    compute = SlowComputation(seconds=0)
+    get_or_compute('user_profile:1', compute, timeout=60)
+    value, delta, expires = cache.get('user_profile:1')
+    cache.set('user_profile:1', (value, delta, time.time() - 1))
+
+    # Another request holds the refresh lock
+    cache.add('lock:user_profile:1', 'other')
+    assert get_or_compute('user_profile:1', compute) == 'value 1'
+    assert compute.calls == 1
+
+    cache.delete('lock:user_profile:1')
+    assert get_or_compute('user_profile:1', compute) == 'value 2'
+
+
+def test_values_are_refreshed_early_near_expiry():
+    cache.clear()
+    compute = SlowComputation(seconds=0)
+    get_or_compute('user_profile:1', compute, timeout=60)
+    value, _, _ = cache.get('user_profile:1')
+
+    # Far from expiry a cheap value is never refreshed early
+    for _ in range(100):
+        get_or_compute('user_profile:1', compute)
+    assert compute.calls == 1
+
+    # An expensive one close to expiry almost always is
+    cache.set('user_profile:1', (value, 100.0, time.time() + 0.01))
+    get_or_compute('user_profile:1', compute)
+    assert compute.calls == 2
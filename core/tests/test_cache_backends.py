@@ -0,0 +1,127 @@
+import time
+import uuid
+
+import pytest
+from django.core.cache import caches
+from rest_framework.test import APIRequestFactory
+
+from core import cache_backends
+from core.cache_backends import MISSING, LocalLRU, TwoTierCache
+from core.models import User, JobPosting, JobSkill, Skill
+from core.views import JobView
+
+
+def make_workers(settings, bus, count=2, **options):
+    """TwoTierCache instances as separate processes would build them"""
+    settings.CACHES = {
+        **settings.CACHES,
+        'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': uuid.uuid4().hex},
+    }
+    params = {'OPTIONS': {'BUS': bus, 'CHANNEL': uuid.uuid4().hex, **options}}
+    workers = []
+    for _ in range(count):
+        cache_backends._local_tiers.clear()
+        workers.append(TwoTierCache('shared', params))
+    cache_backends._local_tiers.clear()
+    return workers
+
+
+def test_lru_is_bounded_and_expires():
+    lru = LocalLRU(max_entries=2)
+    lru.set('a', 1, 60)
+    lru.set('b', 2, 60)
+    lru.get('a')
+    lru.set('c', 3, 60)
+
+    assert lru.get('b') is MISSING  # least recently used
+    assert (lru.get('a'), lru.get('c')) == (1, 3)
+
+    lru.set('d', 4, 0)
+    assert lru.get('d') is MISSING
+
+
+def test_reads_are_served_locally(settings):
+    first, = make_workers(settings, 'core.cache_backends.LocalInvalidationBus', count=1)
+    first.set('job_detail:1', {'title': 'Dev'})
+
+    caches['shared'].clear()
+
+    assert first.get('job_detail:1') == {'title': 'Dev'}
+
+
+def test_writes_invalidate_other_workers(settings):
+    first, second = make_workers(settings, 'core.cache_backends.LocalInvalidationBus')
+    first.set('user_login_data:1', {'first_name': 'Ada'})
+    assert second.get('user_login_data:1') == {'first_name': 'Ada'}
+
+    first.set('user_login_data:1', {'first_name': 'Grace'})
+    assert second.get('user_login_data:1') == {'first_name': 'Grace'}
+
+    first.add('gen:user:1', 1)
+    assert second.get('gen:user:1') == 1
+    second.incr('gen:user:1')
+    assert first.get('gen:user:1') == 2
+
+    second.delete('user_login_data:1')
+    assert first.get('user_login_data:1') is None
+
+
+@pytest.mark.django_db
+def test_job_detail_stays_coherent_across_workers(settings):
+    settings.CACHES = {
+        'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': uuid.uuid4().hex},
+        'default': {
+            'BACKEND': 'core.cache_backends.TwoTierCache',
+            'LOCATION': 'shared',
+            'OPTIONS': {'BUS': 'core.cache_backends.LocalInvalidationBus', 'CHANNEL': uuid.uuid4().hex},
+        },
+    }
+    employer = User.objects.create_user(email='e@test.com', password='pw', role='EMPLOYER').employer_profile
+    job = JobPosting.objects.create(employer=employer, title='Dev', description='Desc')
+    view = JobView.as_view({'get': 'retrieve'})
+
+    def get():
+        return view(APIRequestFactory().get(f'/api/jobs/{job.id}/'), pk=str(job.id)).data
+
+    assert get()['title'] == 'Dev'
+
+    job.title = 'Senior Dev'
+    job.save()
+    JobSkill.objects.create(job=job, skill=Skill.objects.create(name='Django'))
+    employer.company_name = 'Acme'
+    employer.save()
+
+    data = get()
+    assert data['title'] == 'Senior Dev'
+    assert [skill['skill']['name'] for skill in data['required_skills']] == ['Django']
+    assert data['employer']['company_name'] == 'Acme'
+
+
+def fake_redis_client():
+    return fake_redis_client.client
+
+
+def test_redis_bus_invalidates_other_workers(settings):
+    fakeredis = pytest.importorskip('fakeredis')
+    fake_redis_client.client = fakeredis.FakeRedis(server=fakeredis.FakeServer())
+
+    first, second = make_workers(
+        settings, 'core.cache_backends.RedisInvalidationBus',
+        CLIENT_FACTORY='core.tests.test_cache_backends.fake_redis_client',
+    )
+
+    def wait_for(condition):
+        deadline = time.monotonic() + 5
+        while not condition():
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+
+    channel = first.bus.channel
+    wait_for(lambda: fake_redis_client.client.pubsub_numsub(channel)[0][1] == 2)
+
+    first.set('job_detail:1', 'Dev')
+    assert second.get('job_detail:1') == 'Dev'
+
+    first.set('job_detail:1', 'Senior Dev')
+    wait_for(lambda: second.local.get(second.make_key('job_detail:1')) is MISSING)
+    assert second.get('job_detail:1') == 'Senior Dev'
@@ -0,0 +1,84 @@
+import pytest
+from datetime import timedelta
+from unittest.mock import patch
+from django.core.cache import cache
+from django.utils import timezone
+from core.digests import MAX_DIGEST_JOBS, MAX_SUBSTITUTION_BYTES, DigestEmail, run_digest, substitutions_size
+from core.mail import LocmemTransport
+from core.models import User, JobAlert, JobPosting, JobNotification, AlertDigestRun
+from core.queue import run_pending
+
+
+@pytest.fixture
+def digest_setup(settings):
+    cache.clear()
+    settings.MAIL_TRANSPORT = 'core.mail.LocmemTransport'
+    LocmemTransport.reset()
+    now = timezone.now()
+    employer = User.objects.create_user(email='e@test.com', password='pw', role='EMPLOYER').employer_profile
+
+    candidates = []
+    for i in range(3):
+        candidate = User.objects.create_user(email=f'c{i}@test.com', password='pw', role='CANDIDATE').candidate
+        JobAlert.objects.create(candidate=candidate, alert_name='Django', keywords='django')
+        candidates.append(candidate)
+    JobAlert.objects.filter(candidate=candidates[2]).update(last_sent_at=now - timedelta(hours=2))
+    JobAlert.objects.update(created_at=now - timedelta(days=3))
+
+    for title in ['Django Developer', 'Django Lead', 'Go Developer']:
+        JobPosting.objects.create(employer=employer, title=title, description='Desc', status=JobPosting.Status.ACTIVE)
+    # Already sent to the first candidate as a skill match
+    JobNotification.objects.create(candidate=candidates[0], job_posting=JobPosting.objects.get(title='Django Lead'))
+    return now + timedelta(minutes=1), candidates
+
+
+@pytest.mark.django_db
+def test_digest_groups_new_jobs_per_candidate(digest_setup, django_capture_on_commit_callbacks):
+    now, candidates = digest_setup
+
+    with django_capture_on_commit_callbacks(execute=True):
+        run = run_digest('DAILY', chunk_size=1, now=now)
+    with django_capture_on_commit_callbacks(execute=True):
+        run_pending()
+
+    assert run.finished_at and run.candidates_processed == 2  # The third alert isn't due yet
+    digests = {message.to: message.body for message in LocmemTransport.outbox}
+    assert set(digests) == {'c0@test.com', 'c1@test.com'}
+    assert 'job alerts: 1.' in digests['c0@test.com']
+    assert 'Django Lead' in digests['c1@test.com'] and 'Go Developer' not in digests['c1@test.com']
+    assert JobAlert.objects.filter(last_sent_at=now).count() == 2
+
+
+@pytest.mark.django_db
+def test_digest_resumes_after_crash(digest_setup, django_capture_on_commit_callbacks):
+    now, candidates = digest_setup
+
+    with patch('core.digests.send_chunk', side_effect=[1, RuntimeError('crash')]):
+        with pytest.raises(RuntimeError):
+            run_digest('DAILY', chunk_size=1, now=now)
+    run = AlertDigestRun.objects.get()
+    assert run.last_candidate_id == candidates[0].id and run.finished_at is None
+
+    with django_capture_on_commit_callbacks(execute=True):
+        run = run_digest('DAILY', chunk_size=1, now=now + timedelta(hours=1))
+    assert run.window_end == now
+    assert run.candidates_processed == 2
+    assert JobNotification.objects.filter(candidate=candidates[0]).count() == 1
+    assert JobNotification.objects.filter(candidate=candidates[1]).count() == 2
+
+
+def test_digest_substitutions_stay_under_the_size_limit():
+    email = DigestEmail(JobAlert.Frequency.DAILY)
+
+    values = email.recipient_values('Ada', ['<li>Job</li>'] * 3)
+    assert values['jobs'] == '<li>Job</li>' * 3 and values['more'] == ''
+
+    values = email.recipient_values('Ada', ['<li>Job</li>'] * (MAX_DIGEST_JOBS + 5))
+    assert values['jobs'] == '<li>Job</li>' * MAX_DIGEST_JOBS
+    assert values['job_count'] == str(MAX_DIGEST_JOBS + 5)
+    assert 'See more new jobs' in values['more']
+
+    long_item = f"<li>{'x' * 2000}</li>"
+    values = email.recipient_values('Ada', [long_item] * 10)
+    assert substitutions_size(email.substitutions(**values)) <= MAX_SUBSTITUTION_BYTES
+    assert values['jobs'].count('<li>') == 4 and values['more']
@@ -0,0 +1,30 @@
+import pytest
+from core.emails import JobAlertEmail, JobMatchEmail, PrecompiledEmail
+from core.mail import substitute
+from core.models import User, JobPosting
+
+
+def test_precompiled_email_fills_tags():
+    email = PrecompiledEmail('Subject', '<p>Hi -first_name-, -skills- and -first_name-</p>', tags=['first_name', 'skills'])
+    assert email.render(first_name='Ada', skills='Go') == '<p>Hi Ada, Go and Ada</p>'
+    assert email.render(first_name='Ada', skills='Go') == substitute(
+        email.body, email.substitutions(first_name='Ada', skills='Go')
+    )
+
+
+@pytest.mark.django_db
+def test_job_match_email_renders_job_once(settings):
+    settings.FRONTEND_URL = 'https://jobs.example.com/'
+    employer = User.objects.create_user(email='e@test.com', password='pw', role='EMPLOYER').employer_profile
+    employer.company_name = 'Acme & Co'
+    job = JobPosting.objects.create(employer=employer, title='Django <Dev>', description='Desc')
+
+    email = JobMatchEmail(job, {1: 'Python', 2: 'C++ & <Rust>'})
+    body = email.render(**email.recipient_values('<Ada>', [1, 2]))
+
+    assert email.subject == 'New Job Match: Django <Dev>'
+    assert 'Django &lt;Dev&gt;' in body and 'Acme &amp; Co' in body
+    assert 'Hi &lt;Ada&gt;,' in body
+    assert '<li>Python</li><li>C++ &amp; &lt;Rust&gt;</li>' in body
+    assert f'href="https://jobs.example.com/jobs/{job.pk}"' in body
+    assert f'href="https://jobs.example.com/jobs/{job.pk}"' in JobAlertEmail(job).body
@@ -0,0 +1,64 @@
+import csv
+import io
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.models import Application, JobPosting, User
+from core.services import ApplicationService
+
+
+def export(user, params=None):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client.get(reverse('applications-export'), params)
+
+
+@pytest.fixture
+def employer(db):
+    employer = User.objects.create_user(email='e@test.com', password='pw', role='EMPLOYER')
+    job = JobPosting.objects.create(employer=employer.employer_profile, title='Dev', description='Desc')
+    for i in range(3):
+        candidate = User.objects.create_user(
+            email=f'c{i}@test.com', password='pw', role='CANDIDATE', first_name='Ada', last_name=str(i),
+        ).candidate
+        Application.objects.create(job=job, candidate=candidate, cover_letter='=HYPERLINK("http://evil")')
+
+    other = User.objects.create_user(email='o@test.com', password='pw', role='EMPLOYER')
+    other_job = JobPosting.objects.create(employer=other.employer_profile, title='Other', description='Desc')
+    Application.objects.create(job=other_job, candidate=User.objects.get(email='c0@test.com').candidate)
+    return employer
+
+
+def test_csv_export_streams_the_employers_applicants(employer):
+    response = export(employer)
+    assert response.status_code == 200
+    assert response.streaming
+    assert response['Content-Type'] == 'text/csv'
+    assert response['Content-Disposition'].startswith('attachment; filename="applicants-')
+
+    chunks = iter(response.streaming_content)
+    with CaptureQueriesContext(connection) as queries:
+        header = next(chunks)
+    assert len(queries) == 0  # The header goes out before the applications are read
+
+    rows = list(csv.DictReader(io.StringIO(b''.join([header, *chunks]).decode())))
+    assert [row['candidate_email'] for row in rows] == ['c0@test.com', 'c1@test.com', 'c2@test.com']
+    assert rows[0]['job_title'] == 'Dev'
+    assert rows[0]['cover_letter'].startswith("'=")  # Not run as a formula
+
+
+def test_jsonl_export(employer):
+    job = JobPosting.objects.get(title='Dev')
+    response = export(employer, {'type': 'jsonl', 'job': job.id})
+    rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+    assert len(rows) == 3
+    assert list(rows[0]) == list(ApplicationService.export_fields)
+    assert rows[0]['cover_letter'] == '=HYPERLINK("http://evil")'
+
+    assert export(employer, {'type': 'xlsx'}).status_code == 400
+    assert export(User.objects.get(email='c0@test.com')).status_code == 403
@@ -0,0 +1,76 @@
+import pytest
+from django.core.cache import cache
+from django.http import QueryDict
+from django.urls import reverse
+from rest_framework.test import APIClient
+from core.models import User, JobPosting, Category
+from core.facets import normalize_filters, filter_signature, get_facets
+
+
+def facet_counts(data, key):
+    return {item['value']: item['count'] for item in data['facets'][key]}
+
+
+@pytest.mark.django_db
+class TestJobFacets:
+    @pytest.fixture(autouse=True)
+    def jobs(self):
+        cache.clear()
+        employer = User.objects.create_user(email='e@test.com', password='pw', role='EMPLOYER').employer_profile
+        self.category = Category.objects.create(name='Engineering')
+
+        def create(**kwargs):
+            kwargs.setdefault('status', JobPosting.Status.ACTIVE)
+            return JobPosting.objects.create(employer=employer, title='Job', description='Desc', **kwargs)
+
+        remote = create(job_type='REMOTE', employment_type='FULL_TIME', experience_level='SENIOR',
+                        city='Nairobi', country='Kenya', salary_min=120000)
+        remote.categories.add(self.category)
+        create(job_type='ON_SITE', employment_type='FULL_TIME', experience_level='ENTRY',
+               city='Lagos', country='Nigeria', salary_min=20000)
+        create(job_type='REMOTE', employment_type='CONTRACT', experience_level='SENIOR')
+        create(job_type='REMOTE', employment_type='CONTRACT', experience_level='SENIOR',
+               status=JobPosting.Status.DRAFT)
+
+    def test_normalize_filters(self):
+        a = normalize_filters(QueryDict('job_type=remote,HYBRID&city=Nairobi&unknown=1&category=3&salary=bogus'))
+        b = normalize_filters(QueryDict('city=Nairobi&category=3&job_type=HYBRID&job_type=REMOTE'))
+        assert a == {'job_type': ['HYBRID', 'REMOTE'], 'city': ['Nairobi'], 'category': [3]}
+        assert filter_signature(a) == filter_signature(b)
+
+    def test_counts_for_all_facets(self):
+        data = get_facets({})
+        assert data['total'] == 3
+        assert facet_counts(data, 'job_type') == {'REMOTE': 2, 'ON_SITE': 1}
+        assert facet_counts(data, 'employment_type') == {'FULL_TIME': 2, 'CONTRACT': 1}
+        assert facet_counts(data, 'country') == {'Kenya': 1, 'Nigeria': 1}
+        assert facet_counts(data, 'category') == {self.category.id: 1}
+        salary = facet_counts(data, 'salary')
+        assert salary['100k-150k'] == 1 and salary['0-30k'] == 1 and salary['not_specified'] == 1
+
+    def test_counts_follow_filters_and_invalidate(self):
+        filters = {'job_type': ['REMOTE']}
+        data = get_facets(filters)
+        assert data['total'] == 2
+        assert facet_counts(data, 'experience_level') == {'SENIOR': 2}
+
+        JobPosting.objects.filter(status=JobPosting.Status.DRAFT).get().save()
+        assert get_facets(filters)['total'] == 2
+
+        draft = JobPosting.objects.get(status=JobPosting.Status.DRAFT)
+        draft.status = JobPosting.Status.ACTIVE
+        draft.save()
+        assert get_facets(filters)['total'] == 3
+
+    def test_facets_endpoint(self):
+        response = APIClient().get(reverse('jobs-facets'), {'salary': '0-30k'})
+        assert response.status_code == 200
+        assert response.data['filters'] == {'salary': ['0-30k']}
+        assert response.data['total'] == 1
+
+    def test_invalid_category_ids_are_dropped(self):
+        assert normalize_filters(QueryDict('category=²,99999999999999999999999,-1,0,3')) == {'category': [3]}
+        assert APIClient().get(reverse('jobs-list'), {'category': '²'}).status_code == 200
+        response = APIClient().get(reverse('jobs-facets'), {'category': '99999999999999999999999'})
+        assert response.status_code == 200
+        assert response.data['filters'] == {}
@@ -0,0 +1,110 @@
+import asyncio
+import json
+import threading
+
+import pytest
+from django.test import AsyncClient
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.hashing import HashingBusy, HashingPool, KeyedTokenBuckets, get_admission, verify_credentials
+from core.models import User
+
+
+@pytest.fixture
+def admission(settings):
+    """Fresh login buckets built from the test's settings"""
+    get_admission.cache_clear()
+    yield settings
+    get_admission.cache_clear()
+
+
+def test_saturated_pool_turns_work_away():
+    pool = HashingPool(workers=1, queue=1)
+    release = threading.Event()
+    running = [pool.submit(release.wait), pool.submit(release.wait)]
+
+    with pytest.raises(HashingBusy):
+        pool.submit(release.wait)
+
+    release.set()
+    for future in running:
+        future.result()
+    assert pool.run(lambda: 'done') == 'done'
+
+
+def test_buckets_are_kept_per_key():
+    buckets = KeyedTokenBuckets(rate=1 / 60, capacity=2, max_keys=2)
+    assert buckets.try_acquire('a') and buckets.try_acquire('a')
+    assert not buckets.try_acquire('a')
+    assert buckets.try_acquire('b')
+    buckets.try_acquire('c')  # Pushes out 'a', the least recently used
+    assert buckets.try_acquire('a')
+
+
+@pytest.mark.django_db
+def test_verify_credentials():
+    user = User.objects.create_user(email='c@test.com', password='pw')
+    assert verify_credentials('c@test.com', 'pw') == user
+    assert verify_credentials('c@test.com', 'wrong') is None
+    assert verify_credentials('nobody@test.com', 'pw') is None
+
+
+@pytest.mark.django_db
+def test_login_is_throttled_per_email(admission):
+    admission.LOGIN_RATE_PER_EMAIL, admission.LOGIN_BURST_PER_EMAIL = 1, 2
+    User.objects.create_user(email='c@test.com', password='pw')
+    client = APIClient()
+
+    responses = [client.post(reverse('auth-login'), {'email': 'c@test.com', 'password': 'wrong'}) for _ in range(3)]
+    assert [response.status_code for response in responses] == [400, 400, 429]
+    assert responses[-1]['Retry-After'] == '60'  # From the per email bucket that tripped
+    # Other accounts from the same address are still let through
+    assert client.post(reverse('auth-login'), {'email': 'd@test.com', 'password': 'pw'}).status_code == 400
+    # And so is the account's owner from another address
+    owner = client.post(reverse('auth-login'), {'email': 'c@test.com', 'password': 'pw'}, REMOTE_ADDR='10.0.0.2')
+    assert owner.status_code == 200
+
+
+@pytest.mark.django_db
+def test_login_is_throttled_per_account_across_addresses(admission):
+    admission.LOGIN_RATE_PER_ACCOUNT, admission.LOGIN_BURST_PER_ACCOUNT = 2, 3
+    client = APIClient()
+
+    def attempt(ip):
+        return client.post(reverse('auth-login'), {'email': 'c@test.com', 'password': 'wrong'}, REMOTE_ADDR=ip)
+
+    assert [attempt(f'10.0.0.{i}').status_code for i in range(4)] == [400, 400, 400, 429]
+    assert attempt('10.0.0.9')['Retry-After'] == '30'
+
+
+@pytest.mark.django_db
+def test_login_is_throttled_per_ip(admission):
+    admission.LOGIN_RATE_PER_IP, admission.LOGIN_BURST_PER_IP = 4, 1
+    client = APIClient()
+    assert client.post(reverse('auth-login'), {'email': 'a@test.com', 'password': 'pw'}).status_code == 400
+    throttled = client.post(reverse('auth-login'), {'email': 'b@test.com', 'password': 'pw'})
+    assert throttled.status_code == 429
+    assert throttled['Retry-After'] == '15'
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_login(admission):
+    admission.LOGIN_RATE_PER_IP, admission.LOGIN_BURST_PER_IP = 1, 3
+    User.objects.create_user(email='c@test.com', password='pw', role='CANDIDATE')
+    url = reverse('auth-login-async')
+
+    async def login(password):
+        client = AsyncClient()
+        return await client.post(url, json.dumps({'email': 'c@test.com', 'password': password}),
+                                 content_type='application/json')
+
+    async def attempts():
+        return [await login('pw'), await login('wrong'), await login('pw'), await login('pw')]
+
+    ok, wrong, _, throttled = asyncio.run(attempts())
+    assert ok.status_code == 200
+    assert set(ok.json()) == {'user', 'access', 'refresh'}
+    assert wrong.json() == {'error': 'Invalid credentials'}
+    assert throttled.status_code == 429
+    assert throttled['Retry-After']
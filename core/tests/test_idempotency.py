@@ -0,0 +1,80 @@
+import pytest
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.idempotency import CACHE_ALIAS, store_key
+from core.models import Application, JobPosting, User
+from core.serializer import ApplyJobSerializer
+from core.views import JobView
+
+
+def apply(user, job, key=None, cover_letter='Hello'):
+    headers = {'HTTP_IDEMPOTENCY_KEY': key} if key is not None else {}
+    request = APIRequestFactory().post(f'/api/jobs/{job.id}/apply/', {'cover_letter': cover_letter}, **headers)
+    force_authenticate(request, user=user)
+    return JobView.as_view({'post': 'apply'})(request, pk=job.id)
+
+
+@pytest.fixture
+def store(db):
+    return caches[CACHE_ALIAS]
+
+
+@pytest.fixture
+def candidate(db):
+    return User.objects.create_user(email='c@test.com', password='pw', role='CANDIDATE')
+
+
+@pytest.fixture
+def jobs(db):
+    employer = User.objects.create_user(email='e@test.com', password='pw', role='EMPLOYER').employer_profile
+    return [
+        JobPosting.objects.create(employer=employer, title=title, description='Desc', status=JobPosting.Status.ACTIVE)
+        for title in ('Backend', 'Frontend')
+    ]
+
+
+def test_retries_replay_the_first_response(store, candidate, jobs):
+    store.clear()
+    first = apply(candidate, jobs[0], key='retry-1')
+    assert first.status_code == 201
+    caches['default'].clear()  # The retry may reach a worker with a cold local cache
+
+    with CaptureQueriesContext(connection) as queries:
+        replayed = apply(candidate, jobs[0], key='retry-1')
+    assert replayed.status_code == 201
+    assert replayed['Idempotent-Replayed'] == 'true'
+    assert replayed.data == first.data
+    assert not any('core_application' in query['sql'] for query in queries)
+    assert Application.objects.count() == 1
+
+    # The same key for another request
+    assert apply(candidate, jobs[1], key='retry-1').status_code == 422
+    assert apply(candidate, jobs[0], key='retry-1', cover_letter='Changed').status_code == 422
+
+
+def test_in_progress_and_failed_requests(store, candidate, jobs):
+    store.clear()
+    apply(candidate, jobs[0])
+    # A failed attempt leaves the key free for the next one
+    assert apply(candidate, jobs[0], key='dup').status_code == 400
+    assert apply(candidate, jobs[0], key='dup').status_code == 400
+
+    # Another worker is still running the first attempt
+    store.add(store_key('apply', candidate.pk, 'slow'), (b'', None, None))
+    assert apply(candidate, jobs[1], key='slow').status_code == 409
+    assert apply(candidate, jobs[1], key='x' * 256).status_code == 400
+    assert not Application.objects.filter(job=jobs[1]).exists()
+
+
+def test_concurrent_duplicate_is_a_validation_error(candidate, jobs):
+    Application.objects.create(job=jobs[0], candidate=candidate.candidate)
+    request = APIRequestFactory().post('/')
+    request.user = candidate
+    serializer = ApplyJobSerializer(context={'request': request, 'job': jobs[0]})
+    # The duplicate check already passed, as it would for a racing request
+    with pytest.raises(serializers.ValidationError):
+        serializer.create({'cover_letter': 'Again'})
@@ -0,0 +1,98 @@
+import pytest
+from core import tasks
+from core.mail import EmailMessage, LocmemTransport, MailDeliveryError, SendGridTransport, send_mass_mail
+from core.models import Task
+from core.ratelimit import TokenBucket
+
+
+class FailingTransport(LocmemTransport):
+    def send(self, messages):
+        if messages[0].subject == 'broken':
+            raise MailDeliveryError('503')
+        super().send(messages)
+
+
+class BouncingTransport(LocmemTransport):
+    """Fails every batch that has a recipient at bounce.test"""
+    def send(self, messages):
+        if any(message.to.endswith('@bounce.test') for message in messages):
+            raise MailDeliveryError('503')
+        super().send(messages)
+
+
+@pytest.fixture
+def locmem(settings):
+    settings.MAIL_TRANSPORT = 'core.mail.LocmemTransport'
+    settings.MAIL_BATCH_SIZE = 2
+    LocmemTransport.reset()
+    return LocmemTransport
+
+
+def test_messages_are_grouped_into_bulk_sends(locmem):
+    messages = [EmailMessage(f'c{i}@test.com', 'Match', 'Hi -name-', substitutions={'-name-': f'c{i}'}) for i in range(5)]
+    messages.append(EmailMessage('other@test.com', 'Other', 'Body'))
+
+    report = send_mass_mail(messages)
+
+    assert report.sent == 6 and not report.failed
+    assert report.requests == locmem.requests == 4  # 2 + 2 + 1 for "Match", 1 for "Other"
+    assert locmem.outbox[3].body == 'Hi c3'
+
+
+def test_failed_batches_are_reported(locmem):
+    report = send_mass_mail(
+        [EmailMessage('a@test.com', 'broken', 'x'), EmailMessage('b@test.com', 'fine', 'y')],
+        transport=FailingTransport(),
+    )
+    assert report.sent == 1
+    assert [message.to for message in report.failed] == ['a@test.com']
+
+
+def test_sendgrid_payload_has_one_personalization_per_recipient(settings):
+    settings.SENDGRID_API_KEY = 'key'
+    payload = SendGridTransport().build_payload([
+        EmailMessage('a@test.com', 'Match', 'Hi -name-', substitutions={'-name-': 'A'}),
+        EmailMessage('b@test.com', 'Match', 'Hi -name-', substitutions={'-name-': 'B'}),
+    ])
+    assert payload['content'] == [{'type': 'text/html', 'value': 'Hi -name-'}]
+    assert payload['personalizations'][1] == {'to': [{'email': 'b@test.com'}], 'substitutions': {'-name-': 'B'}}
+
+
+def test_sendgrid_sends_are_not_retried_once_they_may_have_been_delivered(settings):
+    settings.SENDGRID_API_KEY = 'key'
+    retries = SendGridTransport().http.connection_pool_kw['retries']
+    assert retries.connect == 2
+    assert retries.read == 0
+    assert 'POST' not in retries.allowed_methods
+    assert not retries.is_retry('POST', 503)
+
+
+def test_token_bucket_waits_for_tokens():
+    now = [0.0]
+
+    def sleep(seconds):
+        now[0] += seconds
+
+    bucket = TokenBucket(rate=10, capacity=10, clock=lambda: now[0], sleep=sleep)
+    assert bucket.acquire(10) == 0
+    assert not bucket.try_acquire()
+    assert bucket.acquire(5) == pytest.approx(0.5)
+
+
+@pytest.mark.django_db
+def test_bulk_email_retries_only_failed_recipients(locmem, settings, django_capture_on_commit_callbacks):
+    settings.MAIL_TRANSPORT = 'core.tests.test_mail.BouncingTransport'
+    recipients = [{'to': 'a@test.com'}, {'to': 'b@bounce.test'}, {'to': 'c@test.com'}]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        tasks.deliver_bulk_email(subject='Match', body='Hi', recipients=recipients)
+
+    assert [message.to for message in locmem.outbox] == ['c@test.com']
+    retry, = Task.objects.all()
+    assert retry.payload['recipients'] == [{'to': 'a@test.com'}, {'to': 'b@bounce.test'}]
+    assert retry.payload['attempt'] == 2
+
+    # The last attempt gives up instead of queueing another
+    with django_capture_on_commit_callbacks(execute=True):
+        tasks.deliver_bulk_email(**{**retry.payload, 'attempt': tasks.BULK_EMAIL_ATTEMPTS})
+    assert Task.objects.count() == 1
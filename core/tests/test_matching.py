@@ -0,0 +1,78 @@
+import pytest
+from django.core.cache import cache
+from core.models import User, JobPosting, JobSkill, Skill, CandidateSkill, JobNotification
+from core.matching import CandidateSkillIndex, SkillMatcher
+from core.queue import run_pending
+from core.mail import LocmemTransport
+
+
+class TestCandidateSkillIndex:
+    def test_match_ranks_by_overlap(self):
+        index = CandidateSkillIndex([
+            (1, 10), (1, 11), (1, 12),
+            (2, 10),
+            (3, 11), (3, 12),
+            (4, 99),
+        ])
+        matches = index.match([10, 11, 12])
+        assert [(m.candidate_id, m.score) for m in matches] == [(1, 3), (3, 2), (2, 1)]
+        assert matches[1].matched_skill_ids == [11, 12]
+
+    def test_min_score_and_unknown_skills(self):
+        index = CandidateSkillIndex([(1, 10), (1, 11), (2, 10)])
+        assert [m.candidate_id for m in index.match([10, 11], min_score=2)] == [1]
+        assert index.match([500]) == []
+
+
+@pytest.mark.django_db
+class TestSkillMatchNotifications:
+    def test_new_job_notifies_matching_candidates(self, django_capture_on_commit_callbacks, settings):
+        cache.clear()
+        settings.MAIL_TRANSPORT = 'core.mail.LocmemTransport'
+        LocmemTransport.reset()
+        python, django, go = (Skill.objects.create(name=name) for name in ['Python', 'Django', 'Go'])
+        employer = User.objects.create_user(email='e@test.com', password='pw', role='EMPLOYER').employer_profile
+
+        both = User.objects.create_user(email='both@test.com', password='pw', role='CANDIDATE').candidate
+        CandidateSkill.objects.create(candidate=both, skill=python)
+        CandidateSkill.objects.create(candidate=both, skill=django)
+        gopher = User.objects.create_user(email='go@test.com', password='pw', role='CANDIDATE').candidate
+        CandidateSkill.objects.create(candidate=gopher, skill=go)
+        inactive = User.objects.create_user(email='off@test.com', password='pw', role='CANDIDATE', is_active=False)
+        CandidateSkill.objects.create(candidate=inactive.candidate, skill=python)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            job = JobPosting.objects.create(
+                employer=employer, title='Django Dev', description='Desc', status=JobPosting.Status.ACTIVE
+            )
+            JobSkill.objects.create(job=job, skill=python)
+            JobSkill.objects.create(job=job, skill=django)
+        with django_capture_on_commit_callbacks(execute=True):
+            run_pending()
+        with django_capture_on_commit_callbacks(execute=True):
+            run_pending()
+
+        assert list(JobNotification.objects.values_list('candidate_id', flat=True)) == [both.id]
+        assert [message.to for message in LocmemTransport.outbox] == ['both@test.com']
+        assert '<li>Python</li><li>Django</li>' in LocmemTransport.outbox[0].body
+
+        matches = SkillMatcher.match_job(job)
+        assert matches[0].candidate_id == both.id
+        assert matches[0].matched_skills == ['Python', 'Django']
+
+
+@pytest.mark.django_db
+def test_create_missing_job_notifications_skips_existing():
+    employer = User.objects.create_user(email='e@test.com', password='pw', role='EMPLOYER').employer_profile
+    job = JobPosting.objects.create(employer=employer, title='Dev', description='Desc')
+    candidates = [
+        User.objects.create_user(email=f'c{i}@test.com', password='pw', role='CANDIDATE').candidate.id
+        for i in range(5)
+    ]
+    JobNotification.objects.create(candidate_id=candidates[1], job_posting=job)
+
+    created = JobNotification.objects.create_missing(job, candidates, chunk_size=2)
+
+    assert sorted(created) == sorted(candidates[:1] + candidates[2:])
+    assert JobNotification.objects.filter(job_posting=job).count() == 5
+    assert JobNotification.objects.create_missing(job, candidates) == []
@@ -0,0 +1,122 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.models import User, Notification, NotificationCounter
+from core.services import NotificationService
+
+
+def create_notifications(user, count):
+    return [
+        Notification.objects.create(
+            user=user, title=f'Notification {i}', content='Content',
+            notification_type=Notification.NotificationType.SYSTEM,
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.mark.django_db
+def test_unread_counter_follows_notifications():
+    user = User.objects.create_user(email='u@test.com', password='pw')
+    other = User.objects.create_user(email='o@test.com', password='pw')
+    first, second, third, fourth = create_notifications(user, 4)
+    create_notifications(other, 2)
+    assert NotificationCounter.objects.unread(user.id) == 4
+
+    first.mark_as_read()
+    first.mark_as_read()
+    assert first.is_read and first.read_at
+    assert NotificationCounter.objects.unread(user.id) == 3
+
+    # A stale copy of an already read notification must not count again
+    Notification.objects.get(pk=first.pk).mark_as_read()
+    assert NotificationCounter.objects.unread(user.id) == 3
+
+    second.is_read = True
+    second.save()
+    assert NotificationCounter.objects.unread(user.id) == 2
+
+    third.delete()
+    assert NotificationCounter.objects.unread(user.id) == 1
+
+    assert Notification.objects.filter(user=user).mark_read() == 1
+    assert NotificationCounter.objects.unread(user.id) == 0
+    assert NotificationCounter.objects.unread(other.id) == 2
+
+    data = NotificationService.get_notifications(other)
+    assert data['unread_count'] == 2
+
+
+@pytest.mark.django_db
+def test_reconcile_repairs_drift():
+    user = User.objects.create_user(email='u@test.com', password='pw')
+    other = User.objects.create_user(email='o@test.com', password='pw')
+    create_notifications(user, 3)
+    create_notifications(other, 1)
+
+    NotificationCounter.objects.filter(user=user).update(unread=10)
+    NotificationCounter.objects.filter(user=other).delete()
+
+    call_command('reconcile_notification_counters', '--dry-run')
+    assert NotificationCounter.objects.unread(user.id) == 10
+
+    call_command('reconcile_notification_counters')
+    assert NotificationCounter.objects.unread(user.id) == 3
+    assert NotificationCounter.objects.unread(other.id) == 1
+
+
+def call(user, url_name, method='get', data=None):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    url = reverse(f'notifications-{url_name}')
+    if method == 'get':
+        return client.get(url, data)
+    return client.post(url, data, format='json')
+
+
+@pytest.mark.django_db
+def test_mark_all_read():
+    user = User.objects.create_user(email='u@test.com', password='pw')
+    other = User.objects.create_user(email='o@test.com', password='pw')
+    first, second, third = create_notifications(user, 3)
+    foreign, = create_notifications(other, 1)
+
+    response = call(user, 'mark-all-read', 'post', data={'ids': [first.id, foreign.id]})
+    assert response.data['updated'] == 1
+    assert response.data['unread_count'] == 2
+    assert not Notification.objects.get(pk=foreign.pk).is_read
+
+    with CaptureQueriesContext(connection) as queries:
+        response = call(user, 'mark-all-read', 'post')
+    updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "core_notification"')]
+    assert len(updates) == 1
+    assert response.data['updated'] == 2
+    assert not Notification.objects.filter(user=user, is_read=False).exists()
+
+    response = call(user, 'mark-all-read', 'post', data={'ids': 'all'})
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_notifications_are_paginated_newest_first():
+    user = User.objects.create_user(email='u@test.com', password='pw')
+    notifications = create_notifications(user, 5)
+
+    client = APIClient()
+    client.force_authenticate(user=user)
+    seen = []
+    url = f"{reverse('notifications-notifications')}?page_size=2"
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.data['unread_count'] == 5
+        assert len(response.data['notifications']) <= 2
+        seen.extend(notification['id'] for notification in response.data['notifications'])
+        # Follow the link as a client would
+        url = response.data['next']
+
+    assert seen == [notification.id for notification in reversed(notifications)]
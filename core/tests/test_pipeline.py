@@ -0,0 +1,81 @@
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.models import Application, JobPosting, User
+
+
+def call(user, url_name, params=None):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client.get(reverse(f'applications-{url_name}'), params)
+
+
+@pytest.fixture
+def board(db):
+    employer = User.objects.create_user(email='e@test.com', password='pw', role='EMPLOYER')
+    backend, frontend = (
+        JobPosting.objects.create(employer=employer.employer_profile, title=title, description='Desc')
+        for title in ('Backend', 'Frontend')
+    )
+    applications = []
+    for i in range(7):
+        candidate = User.objects.create_user(
+            email=f'c{i}@test.com', password='pw', role='CANDIDATE', first_name='Candidate', last_name=str(i),
+        ).candidate
+        applications.append(Application.objects.create(job=backend, candidate=candidate))
+    Application.objects.filter(id__in=[application.id for application in applications[:2]]).update(status='REJECTED')
+    Application.objects.filter(id=applications[2].id).update(is_active=False)
+    return employer, backend, frontend, applications
+
+
+def test_pipeline_counts_and_latest_applicants(board):
+    employer, backend, frontend, applications = board
+
+    response = call(employer, 'pipeline', {'page_size': 2})
+    assert response.status_code == 200
+    jobs = {job['id']: job for job in response.data['jobs']}
+    assert jobs[frontend.id]['total'] == 0
+    assert jobs[backend.id]['total'] == 6
+
+    pending = jobs[backend.id]['columns']['PENDING']
+    assert pending['count'] == 4
+    assert [applicant['id'] for applicant in pending['applicants']] == [applications[6].id, applications[5].id]
+    assert pending['applicants'][0]['candidate_name'] == 'Candidate 6'
+    assert jobs[backend.id]['columns']['REJECTED']['cursor'] is None
+
+    # The rest of the column, from the board's cursor
+    response = call(employer, 'pipeline-column', {
+        'job': backend.id, 'status': 'PENDING', 'cursor': pending['cursor'], 'page_size': 2,
+    })
+    assert [applicant['id'] for applicant in response.data['applicants']] == [applications[4].id, applications[3].id]
+    assert response.data['next'] is None
+
+
+def test_pipeline_is_for_the_employers_own_jobs(board):
+    employer, backend, _, _ = board
+    other = User.objects.create_user(email='o@test.com', password='pw', role='EMPLOYER')
+    candidate = User.objects.get(email='c0@test.com')
+
+    assert call(candidate, 'pipeline').status_code == 403
+    assert call(other, 'pipeline-column', {'job': backend.id, 'status': 'PENDING'}).status_code == 404
+    assert call(employer, 'pipeline-column', {'job': backend.id, 'status': 'MAYBE'}).status_code == 400
+
+
+def test_pipeline_column_links_page_through_the_column(board):
+    employer, backend, _, applications = board
+    client = APIClient()
+    client.force_authenticate(user=employer)
+
+    pending = {
+        job['id']: job for job in client.get(reverse('applications-pipeline'), {'page_size': 1}).data['jobs']
+    }[backend.id]['columns']['PENDING']
+    seen = [applicant['id'] for applicant in pending['applicants']]
+    url = pending['next']
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        seen.extend(applicant['id'] for applicant in response.data['applicants'])
+        url = response.data['next']
+
+    assert seen == [application.id for application in reversed(applications[3:])]
@@ -0,0 +1,90 @@
+import pytest
+from datetime import timedelta
+from unittest.mock import patch
+from django.utils import timezone
+from core.models import Task, User, JobPosting, Application, Notification, NotificationCounter
+from core.queue import task, enqueue, claim, run_pending, release_expired_leases
+
+calls = []
+
+
+@task(name='tests.record', max_attempts=2)
+def record(value):
+    if value == 'fail':
+        raise ValueError('boom')
+    calls.append(value)
+
+
+@pytest.mark.django_db
+class TestTaskQueue:
+    def setup_method(self):
+        calls.clear()
+
+    def test_enqueue_waits_for_commit(self, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=False) as callbacks:
+            enqueue(record, value='a')
+            assert not Task.objects.exists()
+        callbacks[0]()
+
+        assert run_pending() == 1
+        assert calls == ['a']
+        assert Task.objects.get().status == Task.Status.SUCCEEDED
+
+    def test_failed_task_is_retried_with_backoff(self, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            enqueue(record, value='fail')
+
+        run_pending()
+        task_obj = Task.objects.get()
+        assert task_obj.status == Task.Status.PENDING
+        assert task_obj.attempts == 1
+        assert task_obj.run_at > timezone.now()
+        assert 'boom' in task_obj.last_error
+
+        # Not due yet
+        assert run_pending() == 0
+
+        Task.objects.update(run_at=timezone.now())
+        run_pending()
+        task_obj.refresh_from_db()
+        assert task_obj.status == Task.Status.FAILED
+        assert task_obj.attempts == 2
+
+    def test_claim_leases_each_task_once(self):
+        Task.objects.bulk_create([Task(name='tests.record', payload={'value': i}) for i in range(3)])
+        first = claim('w1', 2)
+        second = claim('w2', 2)
+        assert len(first) == 2 and len(second) == 1
+        assert {t.id for t in first}.isdisjoint(t.id for t in second)
+        assert claim('w3', 2) == []
+
+    def test_expired_lease_is_released(self):
+        Task.objects.create(
+            name='tests.record', payload={'value': 'x'}, status=Task.Status.RUNNING,
+            locked_by='dead', locked_at=timezone.now() - timedelta(hours=1),
+        )
+        assert release_expired_leases() == 1
+        assert run_pending() == 1
+        assert calls == ['x']
+
+
+@pytest.mark.django_db
+def test_application_notifications_run_in_worker(django_capture_on_commit_callbacks):
+    employer = User.objects.create_user(email='e@test.com', password='pw', role='EMPLOYER').employer_profile
+    candidate = User.objects.create_user(email='c@test.com', password='pw', role='CANDIDATE').candidate
+    job = JobPosting.objects.create(employer=employer, title='Dev', description='Desc')
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Application.objects.create(job=job, candidate=candidate)
+    assert not Notification.objects.exists()
+
+    with patch('core.tasks.send_email', return_value=True) as send_email:
+        with django_capture_on_commit_callbacks(execute=True):
+            run_pending()
+        with django_capture_on_commit_callbacks(execute=True):
+            run_pending()
+
+    assert Notification.objects.filter(user=employer.user).count() == 1
+    assert Notification.objects.filter(user=candidate.user).count() == 2
+    assert NotificationCounter.objects.unread(candidate.user_id) == 2
+    assert send_email.call_args.kwargs['email_address'] == 'c@test.com'
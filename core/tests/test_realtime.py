@@ -0,0 +1,87 @@
+import asyncio
+import json
+import threading
+
+import pytest
+from asgiref.sync import sync_to_async
+from django.test import RequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.models import User, Notification
+from core.realtime import InMemoryBroker, get_broker
+from core.views import notification_stream
+
+
+def test_in_memory_broker_delivers_across_threads():
+    broker = InMemoryBroker()
+
+    async def scenario():
+        subscription = broker.subscribe(1)
+        other = broker.subscribe(2)
+        threading.Thread(target=broker.publish, args=(1, {'id': 7})).start()
+
+        assert await subscription.get(timeout=1) == {'id': 7}
+        with pytest.raises(asyncio.TimeoutError):
+            await other.get(timeout=0.05)
+
+        broker.unsubscribe(subscription)
+        broker.unsubscribe(other)
+        assert broker.subscriber_count() == 0
+
+    asyncio.run(scenario())
+
+
+def create_notification(user, title):
+    return Notification.objects.create(
+        user=user, title=title, content='Content', notification_type=Notification.NotificationType.SYSTEM,
+    )
+
+
+@pytest.fixture
+def broker(settings):
+    settings.NOTIFICATION_BROKER = 'core.realtime.DatabaseBroker'
+    settings.NOTIFICATION_POLL_INTERVAL = 0.05
+    get_broker.cache_clear()
+    yield
+    get_broker().close()
+    get_broker.cache_clear()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_stream_pushes_new_notifications(broker):
+    user = User.objects.create_user(email='c@test.com', password='pw', role='CANDIDATE')
+    missed = create_notification(user, 'Missed')
+    token = str(AccessToken.for_user(user))
+
+    async def scenario():
+        request = RequestFactory().get(
+            '/api/notifications/stream/', HTTP_AUTHORIZATION=f'Bearer {token}', HTTP_LAST_EVENT_ID=str(missed.id - 1),
+        )
+        response = await notification_stream(request)
+        assert response['Content-Type'] == 'text/event-stream'
+        events = response.streaming_content
+
+        assert (await anext(events)).startswith(b'retry:')
+        replayed = await anext(events)
+        assert replayed.startswith(f'id: {missed.id}\n'.encode())
+
+        # Created as run_worker would, the stream's process only sees the row
+        notification = await sync_to_async(create_notification)(user, 'Application received')
+        event = (await asyncio.wait_for(anext(events), timeout=1)).decode()
+        lines = event.strip().split('\n')
+        assert lines[:2] == [f'id: {notification.id}', 'event: notification']
+        assert json.loads(lines[2][len('data: '):])['title'] == 'Application received'
+        assert get_broker().subscriber_count(user.id) == 1
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.django_db(transaction=True)
+def test_stream_requires_a_valid_token():
+    async def scenario():
+        response = await notification_stream(RequestFactory().get('/api/notifications/stream/?token=nope'))
+        assert response.status_code == 401
+        response = await notification_stream(RequestFactory().get('/api/notifications/stream/'))
+        assert response.status_code == 401
+
+    asyncio.run(scenario())
@@ -0,0 +1,57 @@
+import gzip
+import json
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from core.models import User, JobPosting, JobNotification, Notification, NotificationCounter
+from core.retention import coalesce_notifications
+
+
+def notify(user, title, **fields):
+    return Notification.objects.create(
+        user=user, title=title, content='Content',
+        notification_type=Notification.NotificationType.SYSTEM, **fields,
+    )
+
+
+@pytest.mark.django_db
+def test_coalesce_keeps_newest_copy():
+    user = User.objects.create_user(email='u@test.com', password='pw')
+    notify(user, 'Profile incomplete')
+    notify(user, 'Profile incomplete')
+    newest = notify(user, 'Profile incomplete')
+    other = notify(user, 'Welcome')
+
+    assert coalesce_notifications(batch_size=1) == 2
+    assert set(Notification.objects.values_list('id', flat=True)) == {newest.id, other.id}
+    assert NotificationCounter.objects.unread(user.id) == 2
+
+
+@pytest.mark.django_db
+def test_archive_moves_old_rows_to_compressed_files(tmp_path):
+    user = User.objects.create_user(email='u@test.com', password='pw')
+    candidate = User.objects.create_user(email='c@test.com', password='pw', role='CANDIDATE').candidate
+    employer = User.objects.create_user(email='e@test.com', password='pw', role='EMPLOYER').employer_profile
+    job = JobPosting.objects.create(employer=employer, title='Dev', description='Desc')
+
+    old = [notify(user, f'Old {i}') for i in range(5)]
+    old[0].mark_as_read()
+    recent = notify(user, 'Recent')
+    Notification.objects.filter(id__in=[n.id for n in old]).update(created_at=timezone.now() - timedelta(days=200))
+    JobNotification.objects.create(candidate=candidate, job_posting=job)
+    JobNotification.objects.update(sent_at=timezone.now() - timedelta(days=100))
+
+    call_command('archive_notifications', '--archive-dir', str(tmp_path), '--batch-size', '2', '--pause', '0')
+
+    assert list(Notification.objects.values_list('id', flat=True)) == [recent.id]
+    assert not JobNotification.objects.exists()
+    assert NotificationCounter.objects.unread(user.id) == 1
+
+    notification_file, = tmp_path.glob('notification-*.jsonl.gz')
+    with gzip.open(notification_file, 'rt') as archive:
+        rows = [json.loads(line) for line in archive]
+    assert [row['title'] for row in rows] == [f'Old {i}' for i in range(5)]
+    assert len(list(tmp_path.glob('jobnotification-*.jsonl.gz'))) == 1
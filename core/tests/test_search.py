@@ -0,0 +1,71 @@
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+from core.models import User, JobPosting, JobSkill, Skill, JobSearchDocument
+from core.search import search_jobs, rebuild_search_index
+
+
+def create_job(employer_profile, **kwargs):
+    defaults = {
+        'employer': employer_profile,
+        'title': 'Developer',
+        'description': 'Desc',
+        'status': JobPosting.Status.ACTIVE,
+    }
+    defaults.update(kwargs)
+    return JobPosting.objects.create(**defaults)
+
+
+@pytest.mark.django_db
+class TestJobSearch:
+    @pytest.fixture
+    def employer_profile(self):
+        employer_user = User.objects.create_user(email='e@test.com', password='pw', role='EMPLOYER')
+        return employer_user.employer_profile
+
+    def test_document_is_kept_up_to_date(self, employer_profile, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            job = create_job(employer_profile, title='Backend Engineer', requirements=['Kubernetes'])
+        assert [job_id for job_id, _ in search_jobs('kubernetes')] == [job.id]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            skill = Skill.objects.create(name='Terraform')
+            JobSkill.objects.create(job=job, skill=skill)
+        assert [job_id for job_id, _ in search_jobs('terraform')] == [job.id]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            job.title = 'Platform Engineer'
+            job.save()
+        assert search_jobs('backend') == []
+        assert [job_id for job_id, _ in search_jobs('platf')] == [job.id]
+
+    def test_ranking_and_filtering(self, employer_profile, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            in_title = create_job(employer_profile, title='Python Developer')
+            in_body = create_job(employer_profile, title='Developer', description='Some Python scripting')
+            create_job(employer_profile, title='Python Intern', status=JobPosting.Status.DRAFT)
+            create_job(employer_profile, title='Go Developer')
+
+        hits = search_jobs('python developer')
+        assert [job_id for job_id, _ in hits] == [in_title.id, in_body.id]
+        assert hits[0][1] > hits[1][1]
+
+    def test_rebuild_search_index(self, employer_profile):
+        job = create_job(employer_profile, title='Data Scientist')
+        JobSearchDocument.objects.all().delete()
+
+        assert rebuild_search_index() == 1
+        assert [job_id for job_id, _ in search_jobs('scientist')] == [job.id]
+
+    def test_search_endpoint(self, employer_profile, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            job = create_job(employer_profile, title='Rust Engineer')
+
+        client = APIClient()
+        response = client.get(reverse('jobs-search'), {'q': 'rust'})
+        assert response.status_code == 200
+        assert [hit['id'] for hit in response.data['results']] == [job.id]
+        assert 'score' in response.data['results'][0]
+
+        response = client.get(reverse('jobs-search'))
+        assert response.status_code == 400
@@ -1,7 +1,7 @@
 
 import pytest
 from core.models import (
-    User, JobPosting
+    User, JobPosting,
     Application, Notification, SavedJob, CompanyReview
 )
 from core.services import (
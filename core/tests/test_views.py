@@ -1,8 +1,11 @@
+import base64
+import json
+
 import pytest
 from rest_framework.test import APIClient
 from django.contrib.auth import get_user_model
 from django.urls import reverse
-from core.models import Application, JobPosting
+from core.models import Application, Category, JobPosting, JobSkill, Skill
 
 User = get_user_model()
 
@@ -81,4 +84,83 @@ def test_me_endpoint_unauthenticated():
     url = reverse('auth-me')
     response = client.get(url)
     
-    assert response.status_code == 401
\ No newline at end of file
+    assert response.status_code == 401
+
+@pytest.mark.django_db
+def test_job_list_cursor_pagination():
+    client = APIClient()
+    employer_user = User.objects.create_user(email='emp@example.com', password='password', role='EMPLOYER')
+    employer_profile = employer_user.employer_profile
+
+    jobs = [
+        JobPosting.objects.create(
+            employer=employer_profile, title=f'Job {i}', description='Desc',
+            status=JobPosting.Status.ACTIVE,
+        )
+        for i in range(5)
+    ]
+    JobPosting.objects.create(employer=employer_profile, title='Draft', description='Desc')
+
+    url = reverse('jobs-list') + '?page_size=2'
+    seen = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        assert len(response.data['results']) <= 2
+        seen.extend(job['id'] for job in response.data['results'])
+        url = response.data['next']
+
+    assert seen == [job.id for job in reversed(jobs)]
+    assert set(response.data['results'][0]) >= {'id', 'title', 'employer', 'posted_at'}
+    assert 'description' not in response.data['results'][0]
+
+
+@pytest.mark.django_db
+def test_job_list_invalid_cursor():
+    client = APIClient()
+    response = client.get(reverse('jobs-list') + '?cursor=not-a-cursor')
+    assert response.status_code == 404
+
+    # Well formed cursors holding the wrong types
+    for position in (['abc', 1], [123, 1], ['2024-01-01T00:00:00+00:00', 'abc'], ['2024-01-01T00:00:00+00:00', True]):
+        cursor = base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+        assert client.get(reverse('jobs-list'), {'cursor': cursor}).status_code == 404
+
+
+@pytest.mark.django_db
+def test_job_detail_conditional_get(django_assert_num_queries):
+    client = APIClient()
+    employer_profile = User.objects.create_user(email='emp@example.com', password='password', role='EMPLOYER').employer_profile
+    job = JobPosting.objects.create(employer=employer_profile, title='Dev', description='Desc')
+    category = Category.objects.create(name='Engineering')
+    job.categories.add(category)
+    url = reverse('jobs-detail', args=[job.id])
+
+    response = client.get(url)
+    assert response.status_code == 200
+    etag = response['ETag']
+    assert etag.startswith('"') and response['Last-Modified']
+
+    with django_assert_num_queries(0):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert response['ETag'] == etag
+
+    category.name = 'Software'
+    category.save()
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response.data['categories'][0]['name'] == 'Software'
+    etag = response['ETag']
+
+    skill = Skill.objects.create(name='Django')
+    JobSkill.objects.create(job=job, skill=skill)
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response['ETag'] != etag
+
+
+@pytest.mark.django_db
+def test_job_detail_not_found():
+    response = APIClient().get(reverse('jobs-detail', args=[999]))
+    assert response.status_code == 404
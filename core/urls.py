@@ -1,13 +1,17 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import AuthViewSet, JobView
+from .views import ApplicationView, AuthViewSet, JobView, NotificationView, login_async, notification_stream
 
 
 # Create a router and register viewsets
 router = DefaultRouter()
 router.register(r'auth', AuthViewSet, basename='auth')
 router.register(r'jobs', JobView, basename='jobs')
+router.register(r'applications', ApplicationView, basename='applications')
+router.register(r'notifications', NotificationView, basename='notifications')
 
 urlpatterns = [
+    path('auth/login-async/', login_async, name='auth-login-async'),
+    path('notifications/stream/', notification_stream, name='notification-stream'),
     path('', include(router.urls)),
 ]
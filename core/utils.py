@@ -2,9 +2,7 @@ import boto3
 from django.conf import settings
 from django.core.mail import send_mail
 import logging
-import os
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
+from .mail import EmailMessage, send_mass_mail
 
 
 logger = logging.getLogger(__name__)
@@ -43,35 +41,9 @@ def send_email(email_address, subject, body, html=True):
     """
     Sends an email to the specified address.
     """
-
-    
-    try:
-        if html:
-            message = Mail(
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to_emails=email_address,
-                subject=subject,
-                html_content=body
-            )
-            sg = SendGridAPIClient(os.getenv('SENDGRID_API_KEY'))
-            response = sg.send(message)
-            logger.info(response.status_code)
-            logger.info(response.body)
-            logger.info(response.headers)
-        else:
-            message = Mail(
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to_emails=[email_address],
-                subject=subject,
-                plain_text_content=body
-            )
-            sg = SendGridAPIClient(os.getenv('SENDGRID_API_KEY'))
-            response = sg.send(message)
-            logger.info(response.status_code)
-            logger.info(response.body)
-            logger.info(response.headers)
-        logger.info(f"Email sent successfully to {email_address}")
-        return True
-    except Exception as e:
-        logger.error(f"Failed to send email to {email_address}: {str(e)}")
-        return False
\ No newline at end of file
+    report = send_mass_mail([EmailMessage(email_address, subject, body, html)])
+    if report.failed:
+        logger.error(f"Failed to send email to {email_address}")
+        return False
+    logger.info(f"Email sent successfully to {email_address}")
+    return True
@@ -1,5 +1,20 @@
+import asyncio
+import hashlib
+import json
+from asgiref.sync import sync_to_async
 from core.models import CompanyReview, Application
-from rest_framework.viewsets import ModelViewSet, GenericViewSet
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework.exceptions import Throttled
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.tokens import RefreshToken
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.urls import reverse
+from django.utils.http import http_date, quote_etag, urlencode
+from rest_framework.viewsets import ModelViewSet, GenericViewSet, ReadOnlyModelViewSet
 from rest_framework.decorators import action
 from rest_framework import status
 from rest_framework.response import Response
@@ -11,6 +26,7 @@ from .serializer import (
     UserSerializer, 
     ApplyJobSerializer, 
     JobPostingSerializer,
+    JobListSerializer,
     GetJobSerializer,
     CandidateProfileSerializer,
     EmployerProfileSerializer,
@@ -27,7 +43,18 @@ from .services import (
 from .models import JobPosting, CandidateProfile, EmployerProfile, Notification, Application
 from rest_framework.parsers import MultiPartParser, FormParser
 from .utils import generate_resume_url
-from django.core.cache import cache
+from .pagination import ApplicationCursorPagination, JobCursorPagination, NotificationCursorPagination
+from .search import search_jobs
+from .facets import normalize_filters, apply_job_filters, get_facets
+from .authentication import StatelessJWTAuthentication, revoke_token
+from .idempotency import idempotent
+from .hashing import check_credentials, login_admission
+from .exports import FORMATS as EXPORT_FORMATS
+from .realtime import get_broker, format_event, notification_message
+from .cache import (
+    make_key, bump, get_or_compute,
+    USER, USER_APPLICATIONS, USER_NOTIFICATIONS, APPLICATION, JOB,
+)
 
 
 class AuthViewSet(GenericViewSet):
@@ -53,11 +80,8 @@ class AuthViewSet(GenericViewSet):
         user = serializer.validated_data['user']
         access_token = serializer.validated_data['access']
         refresh_token = serializer.validated_data['refresh']
-        cache_key = f"user_login_data:{user.id}"
-        user_data = cache.get(cache_key)
-        if not user_data:
-            user_data = UserSerializer(user).data
-            cache.set(cache_key, user_data, timeout=60 * 60)
+        cache_key = make_key('user_login_data', user.id, depends_on=[(USER, user.id)])
+        user_data = get_or_compute(cache_key, lambda: UserSerializer(user).data)
         
         return Response({
             'user': user_data,
@@ -68,11 +92,8 @@ class AuthViewSet(GenericViewSet):
     @action(detail=False, methods=['get'])
     def me(self, request):
         user = request.user
-        cache_key = f"user_login_data:{user.id}"
-        user_data = cache.get(cache_key)
-        if not user_data:
-            user_data = UserSerializer(user).data
-            cache.set(cache_key, user_data, timeout=60 * 60)
+        cache_key = make_key('user_login_data', user.id, depends_on=[(USER, user.id)])
+        user_data = get_or_compute(cache_key, lambda: UserSerializer(user).data)
         return Response({
             'user': user_data,
         }, status=status.HTTP_200_OK)
@@ -82,14 +103,14 @@ class AuthViewSet(GenericViewSet):
     def profile(self, request):
         """Get current user's profile"""
         user = request.user
-        cache_key = f"user_profile:{user.id}"
-
-        cached_data = cache.get(cache_key)
-        if cached_data:
-            return Response(cached_data, status=status.HTTP_200_OK)
+        if not (user.is_candidate or user.is_employer):
+            return Response(
+                {'error': 'User role not recognized'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        if user.is_candidate:
-            try:
+        def serialize_profile():
+            if user.is_candidate:
                 profile = (
                     CandidateProfile.objects
                     .select_related('user')
@@ -101,33 +122,23 @@ class AuthViewSet(GenericViewSet):
                     )
                     .get(user=user)
                 )
-                serializer = CandidateProfileSerializer(profile)
-
-            except CandidateProfile.DoesNotExist:
-                return Response(
-                    {'error': 'Candidate profile not found'},
-                    status=status.HTTP_404_NOT_FOUND
-                )
-
-        elif user.is_employer:
-            try:
-                profile = user.employer_profile
-                serializer = EmployerProfileSerializer(profile)
+                return CandidateProfileSerializer(profile).data
+            return EmployerProfileSerializer(user.employer_profile).data
 
-            except EmployerProfile.DoesNotExist:
-                return Response(
-                    {'error': 'Employer profile not found'},
-                    status=status.HTTP_404_NOT_FOUND
-                )
-
-        else:
+        cache_key = make_key('user_profile', user.id, depends_on=[(USER, user.id)])
+        try:
+            data = get_or_compute(cache_key, serialize_profile)
+        except CandidateProfile.DoesNotExist:
             return Response(
-                {'error': 'User role not recognized'},
-                status=status.HTTP_400_BAD_REQUEST
+                {'error': 'Candidate profile not found'},
+                status=status.HTTP_404_NOT_FOUND
             )
-
-        cache.set(cache_key, serializer.data, timeout=60 * 60)  # 1 hour
-        return Response(serializer.data, status=status.HTTP_200_OK)    
+        except EmployerProfile.DoesNotExist:
+            return Response(
+                {'error': 'Employer profile not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(data, status=status.HTTP_200_OK)
                 
         
 
@@ -136,7 +147,6 @@ class AuthViewSet(GenericViewSet):
         """Update current user's profile"""
         user = request.user
         partial = request.method == 'PATCH'
-        cache_key = f"user_profile:{user.id}"
 
         if user.is_candidate:
             model = CandidateProfile
@@ -170,8 +180,8 @@ class AuthViewSet(GenericViewSet):
         serializer.is_valid(raise_exception=True)
         serializer.save()
 
-        # Invalidate cache after successful update
-        cache.delete(cache_key)
+        # Invalidate cache after successful update, nested rows saved without signals
+        bump(USER, user.id)
 
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -208,6 +218,21 @@ class AuthViewSet(GenericViewSet):
             'user': UserSerializer(user).data,
         }, status=status.HTTP_201_CREATED)
 
+    @action(detail=False, methods=['post'])
+    def logout(self, request):
+        """Revoke the access token of the request and the refresh token, if given"""
+        if request.auth is not None:
+            revoke_token(request.auth)
+        if request.data.get('refresh'):
+            try:
+                revoke_token(RefreshToken(request.data['refresh']))
+            except TokenError:
+                return Response(
+                    {'error': 'Invalid refresh token'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        return Response({'message': 'Logged out'}, status=status.HTTP_200_OK)
+
     @action(detail=False, methods=['post'])
     def refresh(self, request):
         serializer = self.get_serializer(data=request.data)
@@ -217,23 +242,37 @@ class AuthViewSet(GenericViewSet):
 class JobView(ModelViewSet):
     queryset = JobPosting.objects.all()
     serializer_class = JobPostingSerializer
+    pagination_class = JobCursorPagination
 
     def get_serializer_class(self):
         if self.action in ['retrieve']:
             return GetJobSerializer
+        if self.action in ['list', 'search']:
+            return JobListSerializer
         return JobPostingSerializer
 
     def get_permissions(self):
         # Public read access, authenticated write access
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'search', 'facets']:
             return [AllowAny()]
         return [IsAuthenticated()]
 
     def get_queryset(self):
         """Filter queryset based on user role"""
-        if self.action in ['list']:
-            # Public: only show active jobs
-            return self.queryset.filter(status=JobPosting.Status.ACTIVE, is_active=True)
+        if self.action in ['list', 'search']:
+            # Public: only show active jobs, loading just the card columns
+            return (
+                self.queryset
+                .filter(status=JobPosting.Status.ACTIVE, is_active=True)
+                .select_related('employer')
+                .only(*JobListSerializer.load_fields)
+            )
+        elif self.action == 'retrieve':
+            return (
+                self.queryset
+                .select_related('employer')
+                .prefetch_related('categories', 'job_skills__skill')
+            )
         elif self.action in ['update', 'partial_update', 'destroy']:
             # Employer: only their own jobs
             if self.request.user.is_authenticated and self.request.user.is_employer:
@@ -241,10 +280,86 @@ class JobView(ModelViewSet):
         return self.queryset
 
     def list(self, request, *args, **kwargs):
-        """List all active jobs"""
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        """List active jobs, newest first, one cursor page at a time"""
+        queryset = apply_job_filters(self.get_queryset(), normalize_filters(request.query_params))
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Job detail, cached until the job, its skills, categories or employer
+        change. Conditional requests are answered from the cache alone.
+        """
+        pk = kwargs[self.lookup_field]
+        cache_key = make_key('job_detail', pk, depends_on=[(JOB, pk)])
+        detail = get_or_compute(cache_key, lambda: self.build_detail(self.get_object()))
+
+        response = get_conditional_response(
+            request, etag=detail['etag'], last_modified=detail['last_modified'],
+        )
+        if response is None:
+            response = Response(detail['data'], status=status.HTTP_200_OK)
+        response['ETag'] = detail['etag']
+        response['Last-Modified'] = http_date(detail['last_modified'])
+        return response
+
+    def build_detail(self, job):
+        """Serialized job with the validators conditional requests compare against"""
+        data = self.get_serializer(job).data
+        body = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True).encode()
+        # Everything the detail shows can change the timestamp
+        changed = [job.updated_at, job.employer.updated_at]
+        changed += [category.updated_at for category in job.categories.all()]
+        changed += [max(job_skill.updated_at, job_skill.skill.updated_at) for job_skill in job.job_skills.all()]
+        return {
+            'data': data,
+            'etag': quote_etag(hashlib.md5(body).hexdigest()),
+            'last_modified': int(max(changed).timestamp()),
+        }
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Full-text search over active jobs, best match first"""
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response(
+                {'error': 'Search query parameter "q" is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+            offset = min(max(int(request.query_params.get('offset', 0)), 0), 1000)
+        except ValueError:
+            return Response(
+                {'error': 'limit and offset must be integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        hits = search_jobs(query, limit=limit, offset=offset)
+        jobs = self.get_queryset().in_bulk([job_id for job_id, _ in hits])
+
+        results = []
+        for job_id, score in hits:
+            job = jobs.get(job_id)
+            if job is None:
+                continue
+            data = self.get_serializer(job).data
+            data['score'] = round(score, 4)
+            results.append(data)
+
+        return Response({
+            'query': query,
+            'results': results,
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """Sidebar facet counts for the current filter set"""
+        filters = normalize_filters(request.query_params)
+        data = get_facets(filters)
+        return Response({'filters': filters, **data}, status=status.HTTP_200_OK)
 
     def create(self, request, *args, **kwargs):
         """Create a new job posting (employer only)"""
@@ -276,7 +391,7 @@ class JobView(ModelViewSet):
         serializer.is_valid(raise_exception=True)
         serializer.save()
 
-        cache.delete(f'job_{job.id}')
+        bump(JOB, job.id)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def destroy(self, request, *args, **kwargs):
@@ -298,7 +413,7 @@ class JobView(ModelViewSet):
         job_id = job.id
         job.delete()
 
-        cache.delete(f'job_{job_id}')
+        bump(JOB, job_id)
         return Response(
             {'message': 'Job deleted successfully'},
             status=status.HTTP_204_NO_CONTENT
@@ -306,6 +421,7 @@ class JobView(ModelViewSet):
 
 
     @action(detail=True, methods=['post'], url_path='apply', parser_classes=[MultiPartParser, FormParser])
+    @idempotent('apply')
     def apply(self, request, pk=None):
         """Apply for a job (candidate only)"""
         if not request.user.is_candidate:
@@ -336,7 +452,13 @@ class JobView(ModelViewSet):
         )
 
 
-class ApplicationView(ModelViewSet):
+# Applications one bulk status update may move, keeps the transaction short
+BULK_STATUS_LIMIT = 1000
+# Most applicants shown per pipeline column, the rest are paged in
+PIPELINE_COLUMN_LIMIT = 20
+
+
+class ApplicationView(ReadOnlyModelViewSet):
     queryset = Application.objects.all()
     serializer_class = ApplicationSerializer
     permission_classes = [IsAuthenticated]
@@ -359,17 +481,13 @@ class ApplicationView(ModelViewSet):
     def applications(self, request):
         """Get user's applications (candidate's or employer's)"""
         user = request.user
-        cache_key = f"user_applications:{user.id}"
-        cached_data = cache.get(cache_key)
-        if cached_data:
-            return Response(cached_data, status=status.HTTP_200_OK)
+        cache_key = make_key('user_applications', user.id, depends_on=[(USER_APPLICATIONS, user.id)])
         if user.is_candidate:
-            data = ApplicationService.get_candidate_applications(user)
+            data = get_or_compute(cache_key, lambda: ApplicationService.get_candidate_applications(user))
         elif user.is_employer:
-            data = ApplicationService.get_employer_applications(user)
+            data = get_or_compute(cache_key, lambda: ApplicationService.get_employer_applications(user))
         else:
             data = []
-        cache.set(cache_key, data, timeout=60 * 60)
         return Response(data, status=status.HTTP_200_OK)
 
 
@@ -385,8 +503,14 @@ class ApplicationView(ModelViewSet):
                 'candidate__user',
                 'job__employer__user'
             )
-            .get(pk=pk)
+            .filter(pk=pk)
+            .first()
         )
+        if application is None:
+            return Response(
+                {'error': 'Application not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
 
         # Authorization checks
         if user.is_candidate:
@@ -408,18 +532,12 @@ class ApplicationView(ModelViewSet):
             )
 
         # Cache key
-        cache_key = f"application:{application.id}:user:{user.id}"
-        cached_data = cache.get(cache_key)
-        if cached_data:
-            return Response(cached_data, status=status.HTTP_200_OK)
-
-        # Serialize and cache
-        data = self.get_serializer(application).data
-        cache.set(cache_key, data, timeout=60 * 60)
+        cache_key = make_key('application', application.id, 'user', user.id, depends_on=[(APPLICATION, application.id)])
+        data = get_or_compute(cache_key, lambda: self.get_serializer(application).data)
 
         return Response(data, status=status.HTTP_200_OK)
 
-    @action(detail=False, methods=['post'])
+    @action(detail=True, methods=['post'])
     def withdraw_application(self, request, pk=None):
         user = request.user
         if not user.is_candidate:
@@ -436,7 +554,7 @@ class ApplicationView(ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        application.status = 'Withdrawn'
+        application.status = Application.Status.WITHDRAWN
         application.is_withdrawn = True
         application.save()
         
@@ -446,8 +564,8 @@ class ApplicationView(ModelViewSet):
         )
 
     
-    @action(detail=False, methods=['post'])
-    def update_application_status(self, request):
+    @action(detail=True, methods=['post'])
+    def update_application_status(self, request, pk=None):
         user = request.user
         if not user.is_employer:
             return Response(
@@ -463,8 +581,21 @@ class ApplicationView(ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        application.status = request.data.get('status')
-        application.save()
+        new_status = request.data.get('status')
+        if new_status not in Application.Status.values or new_status == Application.Status.WITHDRAWN:
+            return Response(
+                {'error': 'Invalid application status'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        notes = request.data.get('notes', '')
+        if not isinstance(notes, str):
+            return Response(
+                {'error': 'notes must be a string'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Same path as a bulk update, so the change is recorded and the candidate told
+        ApplicationService.update_statuses(user, [application.id], new_status, notes)
         
         return Response(
             {'message': 'Application status updated successfully'},
@@ -472,8 +603,134 @@ class ApplicationView(ModelViewSet):
         )
     
 
+    @action(detail=False, methods=['post'], url_path='bulk-status')
+    def bulk_update_status(self, request):
+        """Move many applications to one status, e.g. shortlist a batch of applicants"""
+        user = request.user
+        if not user.is_employer:
+            return Response(
+                {'error': 'Only employers can update application status'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        ids = request.data.get('ids')
+        new_status = request.data.get('status')
+        notes = request.data.get('notes', '')
+        if not isinstance(ids, list) or not ids or not all(isinstance(pk, int) for pk in ids):
+            return Response(
+                {'error': 'ids must be a non-empty list of application ids'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(ids) > BULK_STATUS_LIMIT:
+            return Response(
+                {'error': f'At most {BULK_STATUS_LIMIT} applications can be updated at once'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if new_status not in Application.Status.values or new_status == Application.Status.WITHDRAWN:
+            return Response(
+                {'error': 'Invalid application status'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not isinstance(notes, str):
+            return Response(
+                {'error': 'notes must be a string'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        updated = ApplicationService.update_statuses(user, ids, new_status, notes)
+        if updated is None:
+            return Response(
+                {'error': 'You can only update the status of applications for your own jobs'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        return Response({
+            'message': f'{len(updated)} applications moved to {new_status}',
+            'updated': updated,
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'])
+    def pipeline(self, request):
+        """Employer's applicant board, counts and latest applicants per job and status"""
+        user = request.user
+        if not user.is_employer:
+            return Response(
+                {'error': 'Only employers can view their pipeline'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        paginator = ApplicationCursorPagination()
+        per_column = min(paginator.get_page_size(request), PIPELINE_COLUMN_LIMIT)
+        cache_key = make_key('employer_pipeline', user.id, per_column, depends_on=[(USER_APPLICATIONS, user.id)])
+        data = get_or_compute(cache_key, lambda: ApplicationService.get_pipeline(user, per_column, paginator))
+        # Links are added per request, the cached board only holds the cursors
+        column_url = request.build_absolute_uri(reverse('applications-pipeline-column'))
+        for job in data['jobs']:
+            for application_status, column in job['columns'].items():
+                column['next'] = None
+                if column['cursor']:
+                    query = urlencode({
+                        'job': job['id'], 'status': application_status,
+                        'cursor': column['cursor'], 'page_size': per_column,
+                    })
+                    column['next'] = f'{column_url}?{query}'
+        return Response(data, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'], url_path='pipeline/column')
+    def pipeline_column(self, request):
+        """More applicants of one pipeline column, ?job=&status=&cursor= from the board"""
+        user = request.user
+        if not user.is_employer:
+            return Response(
+                {'error': 'Only employers can view their pipeline'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        job_id = request.query_params.get('job', '')
+        application_status = request.query_params.get('status')
+        if not job_id.isdigit() or application_status not in Application.Status.values:
+            return Response(
+                {'error': 'job and status are required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        paginator = ApplicationCursorPagination()
+        cache_key = make_key(
+            'employer_pipeline_column', user.id, job_id, application_status,
+            request.query_params.get(paginator.cursor_query_param, ''), paginator.get_page_size(request),
+            depends_on=[(USER_APPLICATIONS, user.id)],
+        )
+        data = get_or_compute(cache_key, lambda: ApplicationService.get_pipeline_column(
+            user, int(job_id), application_status, request, paginator
+        ))
+        return Response(data, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Download the applicants to the employer's jobs, ?type=csv|jsonl and an optional ?job="""
+        user = request.user
+        if not user.is_employer:
+            return Response(
+                {'error': 'Only employers can export applicants'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        # ?format= is taken by DRF's content negotiation
+        export_type = request.query_params.get('type', 'csv')
+        job_id = request.query_params.get('job')
+        if export_type not in EXPORT_FORMATS or (job_id is not None and not job_id.isdigit()):
+            return Response(
+                {'error': f'type must be one of {", ".join(EXPORT_FORMATS)} and job an id'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        content_type, formatter = EXPORT_FORMATS[export_type]
+        rows = ApplicationService.export_applications(user, job_id=int(job_id) if job_id else None)
+        response = StreamingHttpResponse(
+            formatter(rows, ApplicationService.export_fields), content_type=content_type
+        )
+        filename = f'applicants-{timezone.localdate().isoformat()}.{export_type}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response['Cache-Control'] = 'no-store'
+        return response
+
     @action(detail=True, methods=['post'], url_path='download-resume')
-    def download_resume(self, request):
+    def download_resume(self, request, pk=None):
         """Generate signed URL for downloading applicant resume (employer only)"""
         user = request.user
         
@@ -530,16 +787,38 @@ class NotificationView(ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def notifications(self, request):
-        """Get user's notifications"""
+        """Get user's notifications, newest first, one cursor page at a time"""
         user = request.user
-        cache_key = f"user_notifications:{user.id}"
-        cached_data = cache.get(cache_key)
-        if cached_data:
-            return Response(cached_data, status=status.HTTP_200_OK)
-        data = NotificationService.get_notifications(user, limit=None)
-        cache.set(cache_key, data, timeout=60 * 60)
+        paginator = NotificationCursorPagination()
+        cache_key = make_key(
+            'user_notifications', user.id,
+            request.query_params.get(paginator.cursor_query_param, ''), paginator.get_page_size(request),
+            depends_on=[(USER_NOTIFICATIONS, user.id)],
+        )
+        data = get_or_compute(cache_key, lambda: NotificationService.get_notification_page(user, request, paginator))
         return Response(data, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=['post'], url_path='mark-all-read')
+    def mark_all_read(self, request):
+        """Mark the given notification ids read, or all of them without ids, in one UPDATE"""
+        user = request.user
+        notifications = Notification.objects.filter(user=user)
+        ids = request.data.get('ids')
+        if ids is not None:
+            if not isinstance(ids, list) or not all(isinstance(pk, int) for pk in ids):
+                return Response(
+                    {'error': 'ids must be a list of notification ids'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            notifications = notifications.filter(id__in=ids)
+
+        updated = notifications.mark_read(user_id=user.id)
+        return Response({
+            'message': f'{updated} notifications marked as read',
+            'updated': updated,
+            'unread_count': NotificationService.get_unread_notifications(user),
+        }, status=status.HTTP_200_OK)
+
     @action(detail=True, methods=['post'], url_path='mark-read')
     def mark_read(self, request, pk=None):
         """Mark notification as read"""
@@ -569,4 +848,104 @@ class ReviewView(ModelViewSet):
 
     def perform_create(self, serializer):
         """Set the reviewer to current user when creating a review"""
-        serializer.save(reviewer=self.request.user)
\ No newline at end of file
+        serializer.save(reviewer=self.request.user)
+
+
+# Comment lines keep proxies from closing idle streams
+STREAM_KEEPALIVE = 15
+STREAM_RETRY_MS = 3000
+
+
+async def notification_stream(request):
+    """
+    Server-Sent Events stream of the user's new notifications.
+
+    EventSource can't send headers, so the access token may also come as
+    ``?token=``. On reconnect the browser sends ``Last-Event-ID`` and the
+    notifications created since are replayed from the database first.
+    """
+    authentication = StatelessJWTAuthentication()
+    authentication.stateless = True
+    header = authentication.get_header(request)
+    raw_token = authentication.get_raw_token(header) if header else request.GET.get('token')
+    if not raw_token:
+        return JsonResponse({'error': 'Authentication credentials were not provided'}, status=401)
+    try:
+        token = authentication.get_validated_token(raw_token)
+        user = await sync_to_async(authentication.get_user)(token)
+    except (InvalidToken, TokenError):
+        return JsonResponse({'error': 'Invalid or expired token'}, status=401)
+
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    # Subscribe before replaying so nothing created in between is lost
+    subscription = get_broker().subscribe(user.id)
+    response = StreamingHttpResponse(
+        notification_events(subscription, int(last_event_id) if last_event_id.isdigit() else None),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+async def notification_events(subscription, last_event_id=None):
+    try:
+        yield f'retry: {STREAM_RETRY_MS}\n\n'
+
+        if last_event_id is not None:
+            missed = await sync_to_async(list)(
+                Notification.objects
+                .filter(user_id=subscription.user_id, id__gt=last_event_id)
+                .order_by('id')
+            )
+            for notification in missed:
+                last_event_id = notification.id
+                yield format_event(notification_message(notification))
+
+        while True:
+            try:
+                message = await subscription.get(timeout=STREAM_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            if message is None:
+                return
+            if last_event_id is not None and message['id'] <= last_event_id:
+                continue  # Already replayed
+            yield format_event(message)
+    finally:
+        get_broker().unsubscribe(subscription)
+
+
+@csrf_exempt
+@require_POST
+async def login_async(request):
+    """
+    Same as ``auth/login/`` for ASGI deployments.
+
+    The password hash is awaited on the hashing pool, so a slow login holds
+    no worker thread while it waits.
+    """
+    try:
+        body = json.loads(request.body or b'{}')
+    except ValueError:
+        return JsonResponse({'error': 'Request body must be JSON'}, status=400)
+    email, password = body.get('email'), body.get('password')
+    if not isinstance(email, str) or not isinstance(password, str) or not email or not password:
+        return JsonResponse({'error': 'email and password are required'}, status=400)
+
+    try:
+        login_admission(request, email)
+        user = await check_credentials(email, password)
+    except Throttled as exc:
+        response = JsonResponse({'error': exc.detail}, status=exc.status_code)
+        response['Retry-After'] = str(int(exc.wait or 1))
+        return response
+    if user is None:
+        return JsonResponse({'error': 'Invalid credentials'}, status=400)
+    if not user.is_active:
+        return JsonResponse({'error': 'User is not active'}, status=400)
+
+    cache_key = make_key('user_login_data', user.id, depends_on=[(USER, user.id)])
+    user_data = await sync_to_async(get_or_compute)(cache_key, lambda: UserSerializer(user).data)
+    return JsonResponse({'user': user_data, **LoginSerializer.issue_tokens(user)}, encoder=DjangoJSONEncoder)
@@ -82,7 +82,7 @@ WSGI_APPLICATION = 'jobboard.wsgi.application'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'core.authentication.StatelessJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
@@ -191,11 +191,72 @@ AWS_S3_OBJECT_PARAMETERS = {
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Redis Cache Settings
-CACHES = {
-    "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+# With REDIS_URL, workers share Redis behind a small per-process LRU that is
+# kept coherent through invalidation messages, see core/cache_backends.py
+REDIS_URL = os.getenv('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        "shared": {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": REDIS_URL,
+        },
+        "default": {
+            "BACKEND": "core.cache_backends.TwoTierCache",
+            "LOCATION": "shared",
+            "OPTIONS": {
+                "LOCAL_MAX_ENTRIES": int(os.getenv('CACHE_LOCAL_MAX_ENTRIES', 2048)),
+                "LOCAL_TIMEOUT": int(os.getenv('CACHE_LOCAL_TIMEOUT', 5)),
+            },
+        },
+        "idempotency": {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": REDIS_URL,
+        },
     }
-}
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        },
+        # Created by migration 0025, or `python manage.py createcachetable`
+        "idempotency": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "core_idempotency_cache",
+        },
+    }
+
+# Real-time notifications, fanned out across workers through Redis when there is one,
+# otherwise every process with open streams polls the notifications table
+NOTIFICATION_BROKER = 'core.realtime.RedisBroker' if REDIS_URL else 'core.realtime.DatabaseBroker'
+NOTIFICATION_POLL_INTERVAL = float(os.getenv('NOTIFICATION_POLL_INTERVAL', 1))  # seconds
+
+# Notification retention, see the archive_notifications command
+NOTIFICATION_RETENTION_DAYS = int(os.getenv('NOTIFICATION_RETENTION_DAYS', 180))
+JOB_NOTIFICATION_RETENTION_DAYS = int(os.getenv('JOB_NOTIFICATION_RETENTION_DAYS', 90))
+ARCHIVE_DIR = os.getenv('ARCHIVE_DIR', BASE_DIR / 'archive')
+
+# Rows a job's applications_count changes are spread over, see fold_application_counts
+APPLICATION_COUNTER_SHARDS = int(os.getenv('APPLICATION_COUNTER_SHARDS', 16))
+
+# Seconds a response stays replayable for retries with the same Idempotency-Key
+IDEMPOTENCY_KEY_TTL = int(os.getenv('IDEMPOTENCY_KEY_TTL', 24 * 60 * 60))
+
+# Password hashing pool, 0 workers means half the cores, see core.hashing
+PASSWORD_HASHING_WORKERS = int(os.getenv('PASSWORD_HASHING_WORKERS', 0))
+PASSWORD_HASHING_QUEUE = int(os.getenv('PASSWORD_HASHING_QUEUE', 32))
+
+# Login attempts per minute and burst size, per client IP and per email from one IP
+LOGIN_RATE_PER_IP = int(os.getenv('LOGIN_RATE_PER_IP', 60))
+LOGIN_BURST_PER_IP = int(os.getenv('LOGIN_BURST_PER_IP', 30))
+LOGIN_RATE_PER_EMAIL = int(os.getenv('LOGIN_RATE_PER_EMAIL', 10))
+LOGIN_BURST_PER_EMAIL = int(os.getenv('LOGIN_BURST_PER_EMAIL', 10))
+# Per email from any IP, well above a single client's limit
+LOGIN_RATE_PER_ACCOUNT = int(os.getenv('LOGIN_RATE_PER_ACCOUNT', 30))
+LOGIN_BURST_PER_ACCOUNT = int(os.getenv('LOGIN_BURST_PER_ACCOUNT', 50))
+
+# Background tasks, run them inline on commit instead of through run_worker
+TASK_QUEUE_EAGER = os.getenv('TASK_QUEUE_EAGER', 'False') == 'True'
 
 # Email Configuration
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
@@ -205,3 +266,11 @@ EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'True') == 'True'
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', 'apikey')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', os.getenv('API'))
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'support@jobboard.com')
+SENDGRID_API_KEY = os.getenv('SENDGRID_API_KEY')
+# Where links in emails point, the front end rather than the API
+FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:3000')
+
+# Bulk mail, core.mail.LocmemTransport keeps messages in memory instead of sending them
+MAIL_TRANSPORT = os.getenv('MAIL_TRANSPORT', 'core.mail.SendGridTransport')
+MAIL_BATCH_SIZE = int(os.getenv('MAIL_BATCH_SIZE', 1000))  # recipients per request, SendGrid allows 1000
+MAIL_RATE_LIMIT = int(os.getenv('MAIL_RATE_LIMIT', 0))  # messages per second, 0 for no limit